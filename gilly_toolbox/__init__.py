@@ -0,0 +1,104 @@
+bl_info = {
+    "name": "Gilly Toolbox",
+    "blender": (3, 0, 0),
+    "author": "Gilahd Yefet",
+    "version": (1,0),
+    "description": "Set of tools that will help speed up repetative tasks",
+}
+
+import bpy
+
+# Only the modules with classes to register are imported here. The heavy ones, geometry,
+# query, bake, batch and benchmark, pull in NumPy and are imported by the operators that
+# need them the first time they run, so enabling the add-on stays cheap.
+from . import core, objects, custom_properties, profiler, mesh_tools, curves, particles, ui
+from .core import (
+    BatchScopeSettings,
+    InstrumentationSettings,
+    clear_scene_object_indexes,
+    instrument_operators,
+    update_scene_object_indexes,
+)
+from .curves import ExtrudeSettings, SetCurveResolutionSettings
+from .custom_properties import AddCustomPropertySettings, RemoveCustomPropertySettings, SelectCustomPropertySettings
+from .mesh_tools import RenameUVSettings, UVAuditSettings
+from .objects import (
+    CollectionRelinkSettings,
+    DeduplicateMeshSettings,
+    InstanceConversionSettings,
+    LinkedDuplicateSettings,
+    SceneQuerySettings,
+    clear_collection_cache,
+    get_collection_items,
+    update_collection_cache,
+)
+from .particles import ParticleBakeSettings
+from .profiler import SceneProfileSettings
+
+classes = (
+    core.classes
+    + objects.classes
+    + custom_properties.classes
+    + profiler.classes
+    + mesh_tools.classes
+    + curves.classes
+    + particles.classes
+    + ui.classes
+)
+
+register_classes, unregister_classes = bpy.utils.register_classes_factory(classes)
+
+# Settings stored on every scene
+scene_settings = (
+    ("batch_scope_settings", BatchScopeSettings),
+    ("linked_duplicate_settings", LinkedDuplicateSettings),
+    ("deduplicate_mesh_settings", DeduplicateMeshSettings),
+    ("instance_conversion_settings", InstanceConversionSettings),
+    ("collection_relink_settings", CollectionRelinkSettings),
+    ("select_custom_property_settings", SelectCustomPropertySettings),
+    ("remove_custom_property_settings", RemoveCustomPropertySettings),
+    ("add_custom_property_settings", AddCustomPropertySettings),
+    ("scene_query_settings", SceneQuerySettings),
+    ("scene_profile_settings", SceneProfileSettings),
+    ("instrumentation_settings", InstrumentationSettings),
+    ("rename_uv_settings", RenameUVSettings),
+    ("uv_audit_settings", UVAuditSettings),
+    ("extrude_settings", ExtrudeSettings),
+    ("particle_bake_settings", ParticleBakeSettings),
+    ("set_curve_resolution_settings", SetCurveResolutionSettings),
+)
+
+def register():
+    # Wrap execute() of every operator before Blender sees the classes
+    instrument_operators(classes)
+    register_classes()
+    for name, settings in scene_settings:
+        setattr(bpy.types.Scene, name, bpy.props.PointerProperty(type=settings))
+    # Property to store the chosen collection name
+    bpy.types.Scene.chosen_collection = bpy.props.EnumProperty(
+        items=get_collection_items,
+        name="Chosen Collection"
+    )
+    # Handlers to keep the collection items in the dropdown up to date
+    bpy.app.handlers.depsgraph_update_post.append(update_collection_cache)
+    bpy.app.handlers.load_post.append(clear_collection_cache)
+    bpy.app.handlers.depsgraph_update_post.append(update_scene_object_indexes)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        handlers.append(clear_scene_object_indexes)
+
+def unregister():
+    if update_collection_cache in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(update_collection_cache)
+    if clear_collection_cache in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_collection_cache)
+    clear_collection_cache()
+    if update_scene_object_indexes in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(update_scene_object_indexes)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        if clear_scene_object_indexes in handlers:
+            handlers.remove(clear_scene_object_indexes)
+    clear_scene_object_indexes()
+    del bpy.types.Scene.chosen_collection
+    for name, settings in reversed(scene_settings):
+        delattr(bpy.types.Scene, name)
+    unregister_classes()
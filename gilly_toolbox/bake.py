@@ -0,0 +1,705 @@
+import json
+import os
+import subprocess
+import time
+
+import bpy
+import numpy as np
+from bpy_extras import anim_utils
+
+from .cli import WORKER_SCRIPT
+from .core import instrument_log, offset_steps, run_steps
+from .geometry import (add_math_node, add_nodes_modifier, add_sample_index_node, new_group_socket,
+                       quaternions_to_euler)
+
+#--------------------------
+# PARTICLE SIMULATION BAKE
+#--------------------------
+# Set these to False if you don't want to key that property.
+KEYFRAME_LOCATION = True
+KEYFRAME_ROTATION = True
+KEYFRAME_SCALE = True
+KEYFRAME_VISIBILITY = False  # Viewport and render visibility.
+KEYFRAME_VISIBILITY_SCALE = True
+
+# Scale given to particles that are unborn or dead when KEYFRAME_VISIBILITY_SCALE is on
+HIDDEN_PARTICLE_SCALE = 0.001
+
+# Group keyframe_insert() puts object transform F-curves in
+TRANSFORM_GROUP = "Object Transforms"
+
+# F-curves of an object's action, creating the action if needed, and the keyword that
+# puts a new F-curve in a group. Since Blender 4.4 the F-curves live in a channelbag per
+# action slot, and 5.0 removed Action.fcurves.
+def object_action_fcurves(obj):
+    anim = obj.animation_data_create()
+    if anim.action is None:
+        anim.action = bpy.data.actions.new(name=obj.name + "Action")
+    action = anim.action
+    if hasattr(action, "fcurves"):
+        return action.fcurves, "action_group"
+    if anim.action_slot is None:
+        anim.action_slot = action.slots.new('OBJECT', obj.name)
+    return anim_utils.action_ensure_channelbag_for_slot(action, anim.action_slot).fcurves, "group_name"
+
+# Look up the integer RNA stores for an enum item, as used by foreach_get/foreach_set
+def rna_enum_value(rna_type, prop_name, identifier):
+    return rna_type.bl_rna.properties[prop_name].enum_items[identifier].value
+
+def create_objects_for_particles(particle_count, obj):
+    # Duplicate the given object for every particle and return the duplicates.
+    # Use instances instead of full copies.
+    obj_list = []
+    mesh = obj.data
+    particles_coll = bpy.data.collections.new(name="particles")
+    bpy.context.scene.collection.children.link(particles_coll)
+
+    with instrument_log.phase("create objects"):
+        for i in range(particle_count):
+            dupli = bpy.data.objects.new(
+                        name="particle.{:03d}".format(i),
+                        object_data=mesh)
+            particles_coll.objects.link(dupli)
+            obj_list.append(dupli)
+    return obj_list
+
+def match_and_keyframe_object_steps(ps, obj_list, start_frame, end_frame):
+    # Match and keyframe the objects to the particles for every frame in the
+    # given range, yielding progress after each frame.
+    frame_count = end_frame - start_frame + 1
+    for i, frame in enumerate(range(start_frame, end_frame + 1)):
+        with instrument_log.phase("frame_set"):
+            bpy.context.scene.frame_set(frame)
+        with instrument_log.phase("keyframing"):
+            for p, obj in zip(ps.particles, obj_list):
+                match_object_to_particle(p, obj)
+                keyframe_obj(obj)
+        yield i + 1, frame_count
+
+def match_object_to_particle(p, obj):
+    # Match the location, rotation, scale and visibility of the object to
+    # the particle.
+    loc = p.location
+    rot = p.rotation
+    size = p.size
+    if p.alive_state == 'ALIVE':
+        vis = True
+    else:
+        vis = False
+    obj.location = loc
+    # Set rotation mode to quaternion to match particle rotation.
+    obj.rotation_mode = 'QUATERNION'
+    obj.rotation_quaternion = rot
+    if KEYFRAME_VISIBILITY_SCALE:
+        if vis:
+            obj.scale = (size, size, size)
+        if not vis:
+            obj.scale = (HIDDEN_PARTICLE_SCALE, HIDDEN_PARTICLE_SCALE, HIDDEN_PARTICLE_SCALE)
+    obj.hide_viewport = not(vis) # <<<-- this was called "hide" in <= 2.79
+    obj.hide_render = not(vis)
+
+def keyframe_obj(obj):
+    # Keyframe location, rotation, scale and visibility if specified.
+    if KEYFRAME_LOCATION:
+        obj.keyframe_insert("location")
+    if KEYFRAME_ROTATION:
+        obj.keyframe_insert("rotation_quaternion")
+    if KEYFRAME_SCALE:
+        obj.keyframe_insert("scale")
+    if KEYFRAME_VISIBILITY:
+        obj.keyframe_insert("hide_viewport") # <<<-- this was called "hide" in <= 2.79
+        obj.keyframe_insert("hide_render")
+
+# Per-frame state of every particle in a system, stored as (frames, particles, ...) arrays
+class ParticleSamples:
+    def __init__(self, frames, locations, rotations, sizes, alive):
+        self.frames = frames
+        self.locations = locations
+        self.rotations = rotations
+        self.sizes = sizes
+        self.alive = alive
+
+    @property
+    def particle_count(self):
+        return self.locations.shape[1]
+
+    # Scale each particle is shown at, matching match_object_to_particle()
+    def scales(self):
+        if not KEYFRAME_VISIBILITY_SCALE:
+            return np.ones_like(self.sizes)
+        return np.where(self.alive, self.sizes, np.float32(HIDDEN_PARTICLE_SCALE))
+
+# Read the alive state of every particle into a boolean array
+def read_particle_alive(particles, states, alive_value):
+    try:
+        particles.foreach_get("alive_state", states)
+    except (TypeError, RuntimeError):
+        # Fall back for builds that refuse raw access to enum properties
+        return np.fromiter((p.alive_state == 'ALIVE' for p in particles), dtype=bool, count=len(particles))
+    return states == alive_value
+
+# Step through the frame range once, reading every particle's state with foreach_get
+# and yielding progress after each frame
+def sample_particle_frame_steps(ps, start_frame, end_frame):
+    scene = bpy.context.scene
+    count = len(ps.particles)
+    frames = np.arange(start_frame, end_frame + 1, dtype=np.float32)
+    frame_count = len(frames)
+
+    locations = np.empty((frame_count, count, 3), dtype=np.float32)
+    rotations = np.empty((frame_count, count, 4), dtype=np.float32)
+    sizes = np.empty((frame_count, count), dtype=np.float32)
+    alive = np.empty((frame_count, count), dtype=bool)
+    states = np.empty(count, dtype=np.int32)
+    alive_value = rna_enum_value(bpy.types.Particle, "alive_state", 'ALIVE')
+
+    for i, frame in enumerate(range(start_frame, end_frame + 1)):
+        with instrument_log.phase("frame_set"):
+            scene.frame_set(frame)
+        with instrument_log.phase("read particles"):
+            particles = ps.particles
+            particles.foreach_get("location", locations[i].reshape(-1))
+            particles.foreach_get("rotation", rotations[i].reshape(-1))
+            particles.foreach_get("size", sizes[i])
+            alive[i] = read_particle_alive(particles, states, alive_value)
+        yield i + 1, frame_count
+
+    return ParticleSamples(frames, locations, rotations, sizes, alive)
+
+# List the F-curves to write as (data_path, index, values[frames, particles], discrete, alive_only).
+# alive_only channels only matter while a particle is alive, since it is hidden otherwise.
+def particle_channels(samples):
+    channels = []
+    if KEYFRAME_LOCATION:
+        channels += [("location", i, samples.locations[:, :, i], False, True) for i in range(3)]
+    if KEYFRAME_ROTATION:
+        channels += [("rotation_quaternion", i, samples.rotations[:, :, i], False, True) for i in range(4)]
+    if KEYFRAME_SCALE:
+        scales = samples.scales()
+        channels += [("scale", i, scales, False, not KEYFRAME_VISIBILITY_SCALE) for i in range(3)]
+    if KEYFRAME_VISIBILITY:
+        hidden = (~samples.alive).astype(np.float32)
+        channels += [("hide_viewport", 0, hidden, True, False), ("hide_render", 0, hidden, True, False)]
+    return channels
+
+# Set an enum property on every keyframe of an F-curve in one call
+def set_keyframe_enum(fc, prop_name, identifier):
+    value = rna_enum_value(bpy.types.Keyframe, prop_name, identifier)
+    points = fc.keyframe_points
+    try:
+        points.foreach_set(prop_name, np.full(len(points), value, dtype=np.int32))
+    except (TypeError, RuntimeError):
+        for point in points:
+            setattr(point, prop_name, identifier)
+
+# Set the interpolation of each keyframe of an F-curve from an array of RNA enum values
+def set_keyframe_interpolations(fc, values):
+    points = fc.keyframe_points
+    try:
+        points.foreach_set("interpolation", values)
+    except (TypeError, RuntimeError):
+        items = bpy.types.Keyframe.bl_rna.properties["interpolation"].enum_items
+        identifiers = {item.value: item.identifier for item in items}
+        for point, value in zip(points, values):
+            point.interpolation = identifiers[int(value)]
+
+# Choose the keys of every particle (columns) needed so that interpolating between them
+# reproduces values within tolerance on the frames in care. Keys at alive state
+# transitions are always kept, and the key before one is stepped (held constant) so
+# births and deaths stay instant. Returns the keep and step masks.
+def decimate_channel(values, care, transitions, tolerance):
+    frame_count, count = values.shape
+    rows = np.arange(frame_count)[:, None]
+    cols = np.arange(count)[None, :]
+    no_frame = np.zeros((1, count), dtype=bool)
+
+    # Start from the first and last frame of every cared for run, the transitions and
+    # every bend that is not just a step into the next alive state
+    keep = care & ~np.vstack([no_frame, care[:-1]])
+    keep |= care & ~np.vstack([care[1:], no_frame])
+    keep |= care & transitions
+    if frame_count > 2:
+        bend = np.abs(values[:-2] - 2 * values[1:-1] + values[2:]) > tolerance
+        keep[1:-1] |= care[1:-1] & bend & ~transitions[2:]
+    # A particle that never needs a value still gets one key
+    keep[0] |= ~care.any(axis=0)
+
+    # Add back frames the interpolation misses until every cared for frame is within tolerance
+    while True:
+        prev_key = np.maximum.accumulate(np.where(keep, rows, -1), axis=0)
+        next_key = np.minimum.accumulate(np.where(keep, rows, frame_count)[::-1], axis=0)[::-1]
+        first = np.where(prev_key >= 0, prev_key, next_key)
+        second = np.where(next_key < frame_count, next_key, first)
+        first_values = values[first, cols]
+        span = np.maximum(second - first, 1)
+        interpolated = first_values + (values[second, cols] - first_values) * ((rows - first) / span)
+        interpolated = np.where(transitions[second, cols], first_values, interpolated)
+        missed = care & ~keep & (np.abs(interpolated - values) > tolerance)
+        if not missed.any():
+            break
+        keep |= missed
+
+    # A key is stepped when the key after it starts a new alive state
+    following = np.vstack([next_key[1:], np.full((1, count), frame_count)])
+    has_following = following < frame_count
+    step = keep & has_following & transitions[np.minimum(following, frame_count - 1), cols]
+    return keep, step
+
+# Decimate every channel of the samples, sharing the work between channels that hold
+# the same values. Returns {channel index: (keep, step)}.
+def decimate_particle_channels(samples, channels, tolerance):
+    alive = samples.alive
+    transitions = np.zeros_like(alive)
+    transitions[1:] = alive[1:] != alive[:-1]
+    everything = np.ones_like(alive)
+
+    results = {}
+    shared = {}
+    for i, (_, _, values, _, alive_only) in enumerate(channels):
+        key = (id(values), alive_only)
+        if key not in shared:
+            shared[key] = decimate_channel(values, alive if alive_only else everything, transitions, tolerance)
+        results[i] = shared[key]
+    return results
+
+# Create each F-curve once and fill all its keyframes in a single pass. With a tolerance,
+# only the keys needed to reproduce every frame within it are written, with linear
+# interpolation between them.
+def keyframe_objects_bulk_steps(samples, obj_list, tolerance=None):
+    channels = particle_channels(samples)
+    frame_count = len(samples.frames)
+    co = np.empty((frame_count, 2), dtype=np.float32)
+    co[:, 0] = samples.frames
+    scales = samples.scales()
+
+    decimated = None
+    if tolerance is not None:
+        with instrument_log.phase("decimate"):
+            decimated = decimate_particle_channels(samples, channels, tolerance)
+
+    yield from write_particle_keyframe_steps(samples, obj_list, channels, decimated, co, scales)
+
+# Write the keyframes of every particle object, yielding progress after each object,
+# see keyframe_objects_bulk_steps
+def write_particle_keyframe_steps(samples, obj_list, channels, decimated, co, scales):
+    edit_prefs = bpy.context.preferences.edit
+    interpolation = edit_prefs.keyframe_new_interpolation_type
+    handle_type = edit_prefs.keyframe_new_handle_type
+    frame_count = len(samples.frames)
+    last_alive = samples.alive[-1]
+    if decimated is not None:
+        linear = rna_enum_value(bpy.types.Keyframe, "interpolation", 'LINEAR')
+        constant = rna_enum_value(bpy.types.Keyframe, "interpolation", 'CONSTANT')
+
+    for p_index, obj in enumerate(obj_list):
+        with instrument_log.phase("keyframing"):
+            obj.rotation_mode = 'QUATERNION'
+            fcurves, group_keyword = object_action_fcurves(obj)
+
+            for c_index, (data_path, index, values, discrete, _) in enumerate(channels):
+                fc = fcurves.new(data_path, index=index, **{group_keyword: TRANSFORM_GROUP})
+                if decimated is not None:
+                    keep, step = decimated[c_index]
+                    rows = np.flatnonzero(keep[:, p_index])
+                    keys = np.empty((len(rows), 2), dtype=np.float32)
+                    keys[:, 0] = samples.frames[rows]
+                    keys[:, 1] = values[rows, p_index]
+                    fc.keyframe_points.add(len(rows))
+                    fc.keyframe_points.foreach_set("co", keys.reshape(-1))
+                    instrument_log.count("keyframes", len(rows))
+                    stepped = step[rows, p_index] | discrete
+                    set_keyframe_interpolations(fc, np.where(stepped, constant, linear).astype(np.int32))
+                    fc.update()
+                    continue
+
+                co[:, 1] = values[:, p_index]
+                fc.keyframe_points.add(frame_count)
+                fc.keyframe_points.foreach_set("co", co.reshape(-1))
+                instrument_log.count("keyframes", frame_count)
+                # keyframe_points.add() creates Bezier keys with auto clamped handles
+                if discrete:
+                    set_keyframe_enum(fc, "interpolation", 'CONSTANT')
+                elif interpolation != 'BEZIER':
+                    set_keyframe_enum(fc, "interpolation", interpolation)
+                if handle_type != 'AUTO_CLAMPED':
+                    set_keyframe_enum(fc, "handle_left_type", handle_type)
+                    set_keyframe_enum(fc, "handle_right_type", handle_type)
+                fc.update()
+
+            # Leave the object in its last frame state, like the per-key bake does
+            vis = bool(last_alive[p_index])
+            obj.location = samples.locations[-1, p_index]
+            obj.rotation_quaternion = samples.rotations[-1, p_index]
+            if KEYFRAME_VISIBILITY_SCALE:
+                obj.scale = (scales[-1, p_index],) * 3
+            obj.hide_viewport = not(vis)
+            obj.hide_render = not(vis)
+        yield p_index + 1, len(obj_list)
+
+# Bake one particle system onto new objects using the chosen method
+# A decimation tolerance always uses the bulk writer.
+# Yields progress per frame while sampling or keying and per object while writing the
+# bulk keyframes. Creating the objects is a single step.
+def bake_particle_system_steps(ps, obj, start_frame, end_frame, method='BULK', tolerance=None):
+    obj_list = create_objects_for_particles(len(ps.particles), obj)
+    if method == 'BULK' or tolerance is not None:
+        samples = yield from sample_particle_frame_steps(ps, start_frame, end_frame)
+        yield from keyframe_objects_bulk_steps(samples, obj_list, tolerance)
+    else:
+        yield from match_and_keyframe_object_steps(ps, obj_list, start_frame, end_frame)
+    return obj_list
+
+def bake_particle_system(ps, obj, start_frame, end_frame, method='BULK', tolerance=None):
+    return run_steps(bake_particle_system_steps(ps, obj, start_frame, end_frame, method, tolerance))
+
+# Turn sampled particle state into keyframed objects or a point cache object,
+# yielding progress per keyframed object. The point cache object is built in one step,
+# its writes are a few foreach_set calls.
+def apply_particle_samples_steps(samples, obj, target='OBJECTS', tolerance=None):
+    if target == 'POINTS':
+        return create_point_cache_object(samples, obj)
+    obj_list = create_objects_for_particles(samples.particle_count, obj)
+    yield from keyframe_objects_bulk_steps(samples, obj_list, tolerance)
+    return obj_list
+
+def apply_particle_samples(samples, obj, target='OBJECTS', tolerance=None):
+    return run_steps(apply_particle_samples_steps(samples, obj, target, tolerance))
+
+#--------------------------
+# ON-DISK PARTICLE CACHE
+#--------------------------
+# The streamed cache of a particle system is a directory holding a manifest and one
+# .npz file per block of frames. Chunks are written to a temporary file and renamed,
+# so every chunk on disk is complete and a crashed bake resumes at the first missing one.
+CACHE_MANIFEST = "manifest.json"
+CACHE_VERSION = 1
+
+# Manifest keys that must match for an existing cache to be resumed
+CACHE_KEYS = ("version", "particle_count", "frame_start", "frame_end", "chunk_frames")
+
+# Directory the cache of one particle system lives in, below the user's cache root
+def particle_cache_directory(root, ps_obj, ps):
+    return os.path.join(bpy.path.abspath(root), bpy.path.clean_name(ps_obj.name + "_" + ps.name))
+
+def cache_chunk_path(directory, first, last):
+    return os.path.join(directory, "chunk_{:06d}_{:06d}.npz".format(first, last))
+
+# Split a frame range into (first, last) blocks of at most chunk_frames frames
+def frame_chunks(start_frame, end_frame, chunk_frames):
+    return [(first, min(first + chunk_frames - 1, end_frame))
+            for first in range(start_frame, end_frame + 1, chunk_frames)]
+
+# Join samples of consecutive frame ranges into one
+def concatenate_samples(samples_list):
+    return ParticleSamples(
+        np.concatenate([s.frames for s in samples_list]),
+        np.concatenate([s.locations for s in samples_list]),
+        np.concatenate([s.rotations for s in samples_list]),
+        np.concatenate([s.sizes for s in samples_list]),
+        np.concatenate([s.alive for s in samples_list]),
+    )
+
+def write_cache_chunk(path, samples):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, frames=samples.frames, locations=samples.locations,
+                 rotations=samples.rotations, sizes=samples.sizes, alive=samples.alive)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_cache_chunk(path):
+    with np.load(path) as data:
+        return ParticleSamples(data["frames"], data["locations"], data["rotations"],
+                               data["sizes"], data["alive"])
+
+def read_cache_manifest(directory):
+    path = os.path.join(directory, CACHE_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_cache_manifest(directory, manifest):
+    path = os.path.join(directory, CACHE_MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+# Delete the manifest and every chunk of a cache directory
+def clear_particle_cache(directory):
+    for name in os.listdir(directory):
+        if name.startswith("chunk_") or name.startswith(CACHE_MANIFEST):
+            os.remove(os.path.join(directory, name))
+
+# Bring the simulation up to resume_frame without recording it. An unbaked particle
+# system has to be stepped frame by frame, a baked point cache can be jumped into.
+def prepare_particle_frame(ps, start_frame, resume_frame):
+    if ps.point_cache.is_baked:
+        return
+    scene = bpy.context.scene
+    for frame in range(start_frame, resume_frame):
+        scene.frame_set(frame)
+
+# Create or reopen the cache directory of a bake and return its manifest, the chunks
+# that still have to be written and whether a cache left by a different bake was
+# cleared first
+def open_particle_cache(ps, directory, start_frame, end_frame, chunk_frames, instance_name=""):
+    os.makedirs(directory, exist_ok=True)
+    manifest = {
+        "version": CACHE_VERSION,
+        "particle_count": len(ps.particles),
+        "frame_start": start_frame,
+        "frame_end": end_frame,
+        "chunk_frames": chunk_frames,
+        "instance_object": instance_name,
+    }
+    existing = read_cache_manifest(directory)
+    cleared = existing is not None and any(existing.get(key) != manifest[key] for key in CACHE_KEYS)
+    if cleared:
+        clear_particle_cache(directory)
+    write_cache_manifest(directory, manifest)
+
+    chunks = frame_chunks(start_frame, end_frame, chunk_frames)
+    missing = [chunk for chunk in chunks if not os.path.exists(cache_chunk_path(directory, *chunk))]
+    return manifest, missing, cleared
+
+# Sample and write the given chunks in order, starting the simulation at start_frame and
+# bringing it forward over any frames between chunks. Yields progress in frames.
+def cache_particle_chunk_steps(ps, directory, start_frame, chunks):
+    next_frame = start_frame
+    total = sum(last - first + 1 for first, last in chunks)
+    done = 0
+    for first, last in chunks:
+        if first > next_frame:
+            with instrument_log.phase("resume"):
+                prepare_particle_frame(ps, next_frame, first)
+        samples = yield from offset_steps(sample_particle_frame_steps(ps, first, last), done, total)
+        with instrument_log.phase("write chunk"):
+            write_cache_chunk(cache_chunk_path(directory, first, last), samples)
+        next_frame = last + 1
+        done += last - first + 1
+
+def cache_particle_chunks(ps, directory, start_frame, chunks):
+    run_steps(cache_particle_chunk_steps(ps, directory, start_frame, chunks))
+
+# Sample the particle system chunk by chunk into the cache directory, resuming after
+# the last complete chunk left by an earlier bake of the same range. Returns the
+# manifest, the number of chunks written and whether an old cache was cleared.
+def stream_particle_cache_steps(ps, directory, start_frame, end_frame, chunk_frames, instance_name=""):
+    manifest, missing, cleared = open_particle_cache(ps, directory, start_frame, end_frame,
+                                                     chunk_frames, instance_name)
+    yield from cache_particle_chunk_steps(ps, directory, start_frame, missing)
+    return manifest, len(missing), cleared
+
+def stream_particle_cache(ps, directory, start_frame, end_frame, chunk_frames, instance_name=""):
+    return run_steps(stream_particle_cache_steps(ps, directory, start_frame, end_frame, chunk_frames, instance_name))
+
+# Read a complete cache back into a manifest and one ParticleSamples for its frame range
+def load_particle_cache(directory):
+    manifest = read_cache_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError("No particle cache found in {}".format(directory))
+    chunks = frame_chunks(manifest["frame_start"], manifest["frame_end"], manifest["chunk_frames"])
+    paths = [cache_chunk_path(directory, *chunk) for chunk in chunks]
+    for (first, _), path in zip(chunks, paths):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                "Particle cache in {} is incomplete, bake again to resume from frame {}".format(directory, first))
+    return manifest, concatenate_samples([read_cache_chunk(path) for path in paths])
+
+#--------------------------
+# PARALLEL PARTICLE BAKE
+#--------------------------
+# A parallel bake splits the chunks of the disk cache between background Blender
+# processes. Each one opens the saved .blend, runs this file as a script and writes
+# its own chunks, after which the main process loads the cache as usual.
+
+# Seconds between checks on running bake workers
+WORKER_POLL_SECONDS = 0.02
+
+# Split chunks into at most worker_count contiguous runs of similar length
+def split_chunks(chunks, worker_count):
+    worker_count = max(1, min(worker_count, len(chunks)))
+    size, extra = divmod(len(chunks), worker_count)
+    runs = []
+    first = 0
+    for i in range(worker_count):
+        last = first + size + (1 if i < extra else 0)
+        runs.append(chunks[first:last])
+        first = last
+    return runs
+
+# Command line that runs one bake worker over the frames first..last
+def bake_worker_command(scene, ps_obj, ps, directory, first, last):
+    return [
+        bpy.app.binary_path, "-b", bpy.data.filepath,
+        "--scene", scene.name,
+        "--python-exit-code", "1",
+        "--python", WORKER_SCRIPT,
+        "--", "bake-worker",
+        "--emitter", ps_obj.name,
+        "--particle-system", ps.name,
+        "--cache-dir", directory,
+        "--first", str(first),
+        "--last", str(last),
+    ]
+
+# Write the missing chunks of a particle system's cache with worker_count background
+# Blender processes. The .blend has to be saved, since that is what the workers open,
+# and the particle system's point cache baked, since a worker can only start in the
+# middle of the range by reading it. Raises RuntimeError when it is not. Returns what
+# stream_particle_cache_steps does.
+def bake_particle_cache_parallel_steps(ps_obj, ps, directory, start_frame, end_frame, chunk_frames,
+                                       worker_count, instance_name=""):
+    manifest, missing, cleared = open_particle_cache(ps, directory, start_frame, end_frame,
+                                                     chunk_frames, instance_name)
+    if not missing:
+        return manifest, 0, cleared
+    if not ps.point_cache.is_baked:
+        raise RuntimeError("Bake the point cache of {} before a parallel bake, otherwise every worker "
+                           "simulates from frame {} again".format(ps.name, start_frame))
+
+    scene = bpy.context.scene
+    workers = []
+
+    # Start the workers, then poll them, counting written chunks as progress. Closing the
+    # generator, as cancelling does, or failing to start a worker stops any worker
+    # already running.
+    try:
+        for i, run in enumerate(split_chunks(missing, worker_count)):
+            log = open(os.path.join(directory, "worker_{:02d}.log".format(i)), "w")
+            try:
+                command = bake_worker_command(scene, ps_obj, ps, directory, run[0][0], run[-1][1])
+                process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+            except BaseException:
+                log.close()
+                raise
+            workers.append((process, log, run))
+
+        while any(process.poll() is None for process, _, _ in workers):
+            done = sum(1 for chunk in missing if os.path.exists(cache_chunk_path(directory, *chunk)))
+            yield done, len(missing)
+            time.sleep(WORKER_POLL_SECONDS)
+    finally:
+        for process, log, _ in workers:
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+            log.close()
+
+    failed = [run[0][0] for process, _, run in workers if process.returncode != 0]
+    if failed:
+        raise RuntimeError("Bake workers starting at frames {} failed, see the worker logs in {}".format(
+            ", ".join(str(frame) for frame in failed), directory))
+    return manifest, len(missing), cleared
+
+def bake_particle_cache_parallel(ps_obj, ps, directory, start_frame, end_frame, chunk_frames,
+                                 worker_count, instance_name=""):
+    return run_steps(bake_particle_cache_parallel_steps(ps_obj, ps, directory, start_frame, end_frame,
+                                                        chunk_frames, worker_count, instance_name))
+
+# Entry point of a bake worker: write the missing chunks between --first and --last
+def run_bake_worker(args):
+    manifest = read_cache_manifest(args.cache_dir)
+    chunks = [chunk for chunk in frame_chunks(manifest["frame_start"], manifest["frame_end"], manifest["chunk_frames"])
+              if args.first <= chunk[0] and chunk[1] <= args.last
+              and not os.path.exists(cache_chunk_path(args.cache_dir, *chunk))]
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    ps = depsgraph.objects[args.emitter].particle_systems[args.particle_system]
+    if len(ps.particles) != manifest["particle_count"]:
+        raise RuntimeError("Particle count changed since the cache was started")
+    cache_particle_chunks(ps, args.cache_dir, manifest["frame_start"], chunks)
+
+# Build a Geometry Nodes group that instances obj on the cached points of the current frame.
+# The cache stores frame_count blocks of particle_count points, one block per frame. The
+# group makes a new line of particle_count points and looks up the current block's
+# positions and attributes by index, so each frame only evaluates particle_count points
+# however long the bake is. The cached points themselves are never drawn.
+def build_point_cache_node_group(name, obj, frame_start, frame_count, particle_count):
+    tree = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+    new_group_socket(tree, "Geometry", 'INPUT', 'NodeSocketGeometry')
+    attribute_sockets = {
+        "rotation": new_group_socket(tree, "Rotation", 'INPUT', 'NodeSocketVector'),
+        "scale": new_group_socket(tree, "Scale", 'INPUT', 'NodeSocketFloat'),
+        "alive": new_group_socket(tree, "Alive", 'INPUT', 'NodeSocketBool'),
+    }
+    new_group_socket(tree, "Geometry", 'OUTPUT', 'NodeSocketGeometry')
+
+    nodes, links = tree.nodes, tree.links
+    group_in = nodes.new("NodeGroupInput")
+    group_in.location = (-800, 0)
+    group_out = nodes.new("NodeGroupOutput")
+    group_out.location = (800, 0)
+    cache = group_in.outputs["Geometry"]
+
+    # Frame block shown now, held at the first and last frame outside the baked range
+    scene_time = nodes.new("GeometryNodeInputSceneTime")
+    scene_time.location = (-800, 400)
+    block = add_math_node(tree, 'SUBTRACT', scene_time.outputs["Frame"], frame_start, location=(-600, 400))
+    block = add_math_node(tree, 'FLOOR', block, location=(-450, 400))
+    block = add_math_node(tree, 'MAXIMUM', block, 0.0, location=(-300, 400))
+    block = add_math_node(tree, 'MINIMUM', block, frame_count - 1, location=(-150, 400))
+    first_index = add_math_node(tree, 'MULTIPLY', block, particle_count, location=(0, 400))
+
+    # One point per particle, reading the cached point at the same place in the block
+    index = nodes.new("GeometryNodeInputIndex")
+    index.location = (-150, 250)
+    cache_index = add_math_node(tree, 'ADD', index.outputs[0], first_index, location=(150, 400))
+    position = nodes.new("GeometryNodeInputPosition")
+    position.location = (-150, 150)
+    line = nodes.new("GeometryNodeMeshLine")
+    line.location = (150, 150)
+    line.inputs["Count"].default_value = particle_count
+    line.inputs["Offset"].default_value = (0.0, 0.0, 0.0)
+    set_position = nodes.new("GeometryNodeSetPosition")
+    set_position.location = (350, 150)
+    links.new(line.outputs["Mesh"], set_position.inputs["Geometry"])
+    links.new(add_sample_index_node(tree, 'FLOAT_VECTOR', cache, position.outputs[0], cache_index,
+                                    location=(150, 0)), set_position.inputs["Position"])
+
+    object_info = nodes.new("GeometryNodeObjectInfo")
+    object_info.location = (350, -250)
+    object_info.inputs["Object"].default_value = obj
+
+    instance = nodes.new("GeometryNodeInstanceOnPoints")
+    instance.location = (600, 0)
+    links.new(set_position.outputs["Geometry"], instance.inputs["Points"])
+    links.new(add_sample_index_node(tree, 'BOOLEAN', cache, group_in.outputs["Alive"], cache_index,
+                                    location=(350, -50)), instance.inputs["Selection"])
+    links.new(object_info.outputs["Geometry"], instance.inputs["Instance"])
+    links.new(add_sample_index_node(tree, 'FLOAT_VECTOR', cache, group_in.outputs["Rotation"], cache_index,
+                                    location=(350, -450)), instance.inputs["Rotation"])
+    links.new(add_sample_index_node(tree, 'FLOAT', cache, group_in.outputs["Scale"], cache_index,
+                                    location=(350, -650)), instance.inputs["Scale"])
+    links.new(instance.outputs["Instances"], group_out.inputs[0])
+    return tree, attribute_sockets
+
+# Store every sampled frame as packed point attributes on a single mesh object and
+# instance obj on the current frame's particles with Geometry Nodes
+def create_point_cache_object(samples, obj, name="particles"):
+    frame_count, particle_count = samples.sizes.shape
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(frame_count * particle_count)
+    mesh.vertices.foreach_set("co", samples.locations.reshape(-1))
+    rotation = mesh.attributes.new("rotation", 'FLOAT_VECTOR', 'POINT')
+    rotation.data.foreach_set("vector", quaternions_to_euler(samples.rotations).reshape(-1))
+    scale = mesh.attributes.new("scale", 'FLOAT', 'POINT')
+    scale.data.foreach_set("value", samples.scales().reshape(-1))
+    alive = mesh.attributes.new("alive", 'BOOLEAN', 'POINT')
+    alive.data.foreach_set("value", samples.alive.reshape(-1))
+    mesh.update()
+
+    cache_obj = bpy.data.objects.new(name, mesh)
+    cache_obj["frame_start"] = int(samples.frames[0])
+    cache_obj["frame_count"] = frame_count
+    cache_obj["particle_count"] = particle_count
+    particles_coll = bpy.data.collections.new(name=name)
+    bpy.context.scene.collection.children.link(particles_coll)
+    particles_coll.objects.link(cache_obj)
+
+    tree, attribute_sockets = build_point_cache_node_group(
+        name, obj, int(samples.frames[0]), frame_count, particle_count)
+    add_nodes_modifier(cache_obj, "Particle Instances", tree, attribute_sockets)
+    return cache_obj
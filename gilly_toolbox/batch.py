@@ -0,0 +1,249 @@
+import csv
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+import bpy
+import numpy as np
+
+from .cli import WORKER_SCRIPT
+from .core import run_batch, run_steps, set_if_changed
+from .curves import set_curve_fill_mode
+from .custom_properties import run_property_batch_steps, set_custom_property
+from .geometry import adaptive_curve_resolution, remove_unused_materials
+from .mesh_tools import remove_inactive_uv_maps, rename_active_uv_map
+
+#---------------------
+# HEADLESS BATCH MODE
+#---------------------
+# Runs a pipeline of toolbox operations over many .blend files from the command line:
+#   blender -b --python gilly_toolbox/worker.py -- batch jobs.json --workers 8 --report report.json
+# The driver hands every file to a pool of background Blender processes, each opening
+# one file, running the pipeline on every object in it and saving the result. A job
+# manifest looks like:
+#   {
+#     "files": ["assets/**/*.blend"],
+#     "output_dir": "cleaned",
+#     "workers": 8,
+#     "timeout": 600,
+#     "pipeline": [
+#       {"op": "remove_inactive_uv"},
+#       {"op": "remove_unused_materials"},
+#       {"op": "set_custom_property", "name": "checked", "value": true, "target": "OBJECT"},
+#       {"op": "set_curve_resolution", "resolution": 6}
+#     ]
+#   }
+# Relative paths are relative to the manifest. Without output_dir files are saved in
+# place, and only when the pipeline changed something.
+def pipeline_remove_inactive_uv(objects):
+    return run_batch("remove_inactive_uv", objects, {'MESH'}, remove_inactive_uv_maps)[0]
+
+def pipeline_rename_uv(objects, name):
+    return run_batch("rename_uv", objects, {'MESH'}, lambda mesh: rename_active_uv_map(mesh, name))[0]
+
+def pipeline_remove_unused_materials(objects):
+    return remove_unused_materials(objects)[1]
+
+def pipeline_set_custom_property(objects, name, value, target='OBJECT'):
+    return run_steps(run_property_batch_steps(
+        "set_custom_property", objects, target, lambda owner: set_custom_property(owner, name, value)))[0]
+
+def pipeline_remove_custom_property(objects, name, target='OBJECT'):
+    def edit(owner):
+        if name not in owner:
+            return False
+        del owner[name]
+        return True
+    return run_steps(run_property_batch_steps("remove_custom_property", objects, target, edit))[0]
+
+def pipeline_set_curve_resolution(objects, resolution):
+    return run_batch("set_curve_resolution", objects, {'CURVE'},
+                     lambda curve: set_if_changed(curve, "resolution_u", resolution))[0]
+
+# max_angle is in degrees, as manifests are written by hand. Raises ValueError when
+# max_resolution is below min_resolution, which is more likely a typo than a cap.
+def pipeline_adaptive_curve_resolution(objects, mode='BOTH', segment_length=0.1, max_angle=10.0,
+                                       min_resolution=1, max_resolution=32):
+    if max_resolution < min_resolution:
+        raise ValueError("max_resolution {} is below min_resolution {}".format(max_resolution, min_resolution))
+    angle = np.radians(max_angle)
+    return run_batch("adaptive_curve_resolution", objects, {'CURVE'}, lambda curve: set_if_changed(
+        curve, "resolution_u",
+        adaptive_curve_resolution(curve, mode, segment_length, angle, min_resolution, max_resolution)))[0]
+
+def pipeline_curve_fill_mode(objects, mode):
+    return run_batch("curve_fill_mode", objects, {'CURVE'}, lambda curve: set_curve_fill_mode(curve, mode))[0]
+
+def pipeline_extrude_curves(objects, value):
+    return run_batch("extrude_curves", objects, {'CURVE'}, lambda curve: set_if_changed(curve, "extrude", value))[0]
+
+# Operations a pipeline step can name. Each takes the objects and the step's options
+# and returns how many objects or data blocks it changed.
+PIPELINE_OPERATIONS = {
+    "remove_inactive_uv": pipeline_remove_inactive_uv,
+    "rename_uv": pipeline_rename_uv,
+    "remove_unused_materials": pipeline_remove_unused_materials,
+    "set_custom_property": pipeline_set_custom_property,
+    "remove_custom_property": pipeline_remove_custom_property,
+    "set_curve_resolution": pipeline_set_curve_resolution,
+    "adaptive_curve_resolution": pipeline_adaptive_curve_resolution,
+    "curve_fill_mode": pipeline_curve_fill_mode,
+    "extrude_curves": pipeline_extrude_curves,
+}
+
+BATCH_REPORT_COLUMNS = ["file", "status", "seconds", "changed", "output", "error", "log"]
+
+# Seconds between checks on running batch workers
+BATCH_POLL_SECONDS = 0.1
+
+# Read a job manifest, expanding file patterns. Raises ValueError for unknown operations.
+def read_batch_manifest(path):
+    with open(path, encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    root = os.path.dirname(os.path.abspath(path))
+    files = []
+    for pattern in manifest.get("files", []):
+        matches = sorted(glob.glob(os.path.join(root, pattern), recursive=True))
+        files.extend(matches if glob.has_magic(pattern) else [os.path.join(root, pattern)])
+    manifest["files"] = list(dict.fromkeys(os.path.normpath(f) for f in files))
+    if manifest.get("output_dir"):
+        manifest["output_dir"] = os.path.join(root, manifest["output_dir"])
+    for step in manifest.get("pipeline", []):
+        if step.get("op") not in PIPELINE_OPERATIONS:
+            raise ValueError("Unknown pipeline operation '{}'".format(step.get("op")))
+    return manifest
+
+# Where a file is saved: in place, or below output_dir mirroring the input folders
+def batch_output_path(filepath, files, output_dir):
+    if not output_dir:
+        return filepath
+    common = os.path.commonpath([os.path.dirname(f) for f in files])
+    return os.path.join(output_dir, os.path.relpath(filepath, common))
+
+def batch_worker_command(filepath, pipeline_path, result_path, output_path):
+    return [
+        bpy.app.binary_path, "-b", filepath,
+        "--python-exit-code", "1",
+        "--python", WORKER_SCRIPT,
+        "--", "batch-file",
+        "--pipeline", pipeline_path,
+        "--result", result_path,
+        "--output", output_path,
+    ]
+
+def write_batch_report(path, results):
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, BATCH_REPORT_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"files": results}, handle, indent=1)
+
+# Outcome of a finished worker: the result it wrote, or why it did not write one
+def collect_batch_result(filepath, returncode, result_path, log_path, seconds, timed_out):
+    result = None
+    if os.path.exists(result_path):
+        with open(result_path, encoding="utf-8") as handle:
+            result = json.load(handle)
+    if result is None:
+        status = "timeout" if timed_out else "crashed"
+        result = {"status": status, "error": "exit code {}".format(returncode)}
+    result.update({"file": filepath, "seconds": seconds, "log": log_path})
+    return result
+
+# Run the manifest's pipeline over its files with a pool of background Blender processes
+# and write a report with the timing and outcome of every file. Returns the results.
+def run_batch_manifest(manifest, worker_count, report_path):
+    files = manifest["files"]
+    timeout = manifest.get("timeout")
+    work_dir = tempfile.mkdtemp(prefix="gilly_batch_")
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(report_path)), "batch_logs")
+    os.makedirs(log_dir, exist_ok=True)
+    pipeline_path = os.path.join(work_dir, "pipeline.json")
+    with open(pipeline_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest.get("pipeline", []), handle)
+
+    pending = list(enumerate(files))
+    running = []
+    results = []
+    start = time.perf_counter()
+    try:
+        while pending or running:
+            while pending and len(running) < worker_count:
+                i, filepath = pending.pop(0)
+                result_path = os.path.join(work_dir, "result_{:05d}.json".format(i))
+                log_path = os.path.join(log_dir, "{:05d}_{}.log".format(i, os.path.basename(filepath)))
+                output_path = batch_output_path(filepath, files, manifest.get("output_dir"))
+                log = open(log_path, "w")
+                command = batch_worker_command(filepath, pipeline_path, result_path, output_path)
+                process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+                running.append((process, log, filepath, result_path, log_path, time.perf_counter()))
+
+            time.sleep(BATCH_POLL_SECONDS)
+            for job in list(running):
+                process, log, filepath, result_path, log_path, started = job
+                seconds = time.perf_counter() - started
+                timed_out = timeout is not None and seconds > timeout and process.poll() is None
+                if timed_out:
+                    process.kill()
+                    process.wait()
+                if process.poll() is None:
+                    continue
+                log.close()
+                running.remove(job)
+                result = collect_batch_result(filepath, process.returncode, result_path, log_path, seconds, timed_out)
+                results.append(result)
+                print("[{}/{}] {} {} in {:.1f}s".format(len(results), len(files), result["status"], filepath, seconds))
+    finally:
+        for process, log, *_ in running:
+            process.kill()
+            process.wait()
+            log.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    write_batch_report(report_path, results)
+    failed = sum(1 for result in results if result["status"] != "ok")
+    print("Processed {} files in {:.1f}s, {} failed, report in {}".format(
+        len(results), time.perf_counter() - start, failed, report_path))
+    return results
+
+# Entry point of a batch worker: run the pipeline on the open file, save it and write
+# the outcome to --result
+def run_batch_file(args):
+    with open(args.pipeline, encoding="utf-8") as handle:
+        pipeline = json.load(handle)
+    result = {"status": "ok", "steps": [], "changed": 0, "output": None, "error": None}
+    try:
+        for step in pipeline:
+            options = {key: value for key, value in step.items() if key != "op"}
+            objects = [obj for obj in bpy.data.objects if obj.library is None]
+            start = time.perf_counter()
+            changed = PIPELINE_OPERATIONS[step["op"]](objects, **options)
+            result["steps"].append({"op": step["op"], "changed": changed, "seconds": time.perf_counter() - start})
+            result["changed"] += changed
+
+        if result["changed"] or os.path.normpath(args.output) != os.path.normpath(bpy.data.filepath):
+            os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+            bpy.ops.wm.save_as_mainfile(filepath=args.output, copy=True)
+            result["output"] = args.output
+    except Exception as error:
+        traceback.print_exc()
+        result.update(status="error", error="{}: {}".format(type(error).__name__, error))
+    with open(args.result, "w", encoding="utf-8") as handle:
+        json.dump(result, handle)
+
+# Entry point of the batch driver
+def run_batch_driver(args):
+    manifest = read_batch_manifest(args.manifest)
+    worker_count = args.workers or manifest.get("workers") or os.cpu_count() or 1
+    results = run_batch_manifest(manifest, worker_count, args.report)
+    if any(result["status"] != "ok" for result in results):
+        sys.exit(1)
@@ -0,0 +1,717 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+import types
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+import bpy
+import numpy as np
+
+from . import classes, register, unregister
+from .bake import (bake_particle_cache_parallel, bake_particle_system, object_action_fcurves,
+                   particle_cache_directory, rna_enum_value, stream_particle_cache)
+from .batch import pipeline_set_custom_property
+from .core import deselect_selected_objects, instrument_log, set_objects_selected, update_scene_object_indexes
+from .custom_properties import collect_custom_properties, custom_property_index, write_custom_properties
+from .geometry import convert_duplicates_to_instancers
+from .objects import linked_duplicate_index, update_collection_cache
+from .profiler import scene_profiler
+from .ui import GILLY_TOOLS_SUBPANELS
+
+#-----------------
+# BENCHMARK SUITE
+#-----------------
+# Times every registered operator on synthetic scenes and writes the results as JSON
+# that a later run can be compared against:
+#   blender -b --factory-startup --python gilly_toolbox/worker.py -- benchmark --output bench.json
+#   blender -b --factory-startup --python gilly_toolbox/worker.py -- benchmark --baseline bench.json
+# Every run of a case starts from an empty file with freshly generated data, so runs do
+# not see each other's changes. Generation is not timed. Comparisons, which time the
+# variants of one job against each other, run after the operator cases.
+# Viewport frame rates need a window to redraw. Under -b they are reported as skipped;
+# run without -b to measure them, Blender stays open once the suite is done:
+#   blender --factory-startup --python gilly_toolbox/worker.py -- benchmark --only instancing
+
+# Sizes of the synthetic scenes. --scale multiplies the counts, --size overrides one.
+BENCHMARK_SIZES = {
+    "objects": 10000,       # linked duplicates
+    "groups": 100,          # meshes they share
+    "curves": 2000,
+    "curve_points": 8,
+    "uv_meshes": 500,
+    "uv_layers": 8,
+    "material_slots": 8,
+    "particles": 2000,
+    "frames": 50,
+    "instancing_objects": 50000,    # linked duplicates of the instancing comparison
+    "bake_workers": 8,      # most processes of the parallel bake comparison
+    "redraws": 100,         # draws of each panel section in the panel draw comparison
+}
+BENCHMARK_SCALED = {"objects", "groups", "curves", "uv_meshes", "particles", "instancing_objects"}
+
+# Regressions smaller than this are noise, whatever the ratio
+BENCHMARK_MIN_SECONDS = 0.005
+
+CUBE_VERTICES = [(-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1), (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)]
+CUBE_FACES = [(0, 1, 2, 3), (4, 7, 6, 5), (0, 4, 5, 1), (1, 5, 6, 2), (2, 6, 7, 3), (3, 7, 4, 0)]
+
+def new_cube_mesh(name):
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(CUBE_VERTICES, [], CUBE_FACES)
+    return mesh
+
+# Flat grid of size x size quads
+def new_grid_mesh(name, size):
+    x, y = np.meshgrid(np.arange(size + 1, dtype=np.float32), np.arange(size + 1, dtype=np.float32))
+    vertices = np.column_stack([x.ravel(), y.ravel(), np.zeros(x.size, dtype=np.float32)])
+    rows = np.arange(size)[:, None] * (size + 1) + np.arange(size)[None, :]
+    corners = rows.ravel()[:, None] + np.array([0, 1, size + 2, size + 1])
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(vertices.tolist(), [], corners.tolist())
+    return mesh
+
+# object_count objects spread over group_count cube meshes. With linked False every
+# object gets its own copy of its group's mesh, for deduplication to find.
+def generate_linked_duplicates(collection, object_count, group_count, rng, linked=True):
+    meshes = [new_cube_mesh("benchmark.{:03d}".format(i)) for i in range(group_count)]
+    locations = rng.uniform(-500, 500, (object_count, 3))
+    objects = []
+    for i in range(object_count):
+        mesh = meshes[i % group_count]
+        obj = bpy.data.objects.new("benchmark.{:05d}".format(i), mesh if linked else mesh.copy())
+        obj.location = locations[i]
+        collection.objects.link(obj)
+        objects.append(obj)
+    if not linked:
+        bpy.data.batch_remove(meshes)
+    return objects
+
+# Beveled 3D Bezier curves wandering from random starting points
+def generate_curves(collection, count, point_count, rng):
+    auto = rna_enum_value(bpy.types.BezierSplinePoint, "handle_left_type", 'AUTO')
+    objects = []
+    for i in range(count):
+        curve = bpy.data.curves.new("benchmark_curve.{:05d}".format(i), 'CURVE')
+        curve.dimensions = '3D'
+        curve.bevel_depth = 0.05
+        spline = curve.splines.new('BEZIER')
+        points = spline.bezier_points
+        points.add(point_count - 1)
+        co = np.cumsum(rng.normal(0, 1, (point_count, 3)), axis=0) + rng.uniform(-200, 200, 3)
+        points.foreach_set("co", co.astype(np.float32).ravel())
+        for name in ("handle_left_type", "handle_right_type"):
+            points.foreach_set(name, np.full(point_count, auto, dtype=np.int32))
+        obj = bpy.data.objects.new(curve.name, curve)
+        collection.objects.link(obj)
+        objects.append(obj)
+    return objects
+
+# Grid meshes with layer_count UV maps, all copies of the first, and slot_count material
+# slots of which only the first half are used
+def generate_uv_material_meshes(collection, count, layer_count, slot_count):
+    materials = [bpy.data.materials.new("benchmark_material.{:02d}".format(i)) for i in range(slot_count)]
+    objects = []
+    for i in range(count):
+        mesh = new_grid_mesh("benchmark_uv.{:05d}".format(i), 10)
+        for layer in range(layer_count):
+            mesh.uv_layers.new(name="UVMap.{:02d}".format(layer))
+        for material in materials:
+            mesh.materials.append(material)
+        used = max(1, slot_count // 2)
+        mesh.polygons.foreach_set("material_index", np.arange(len(mesh.polygons), dtype=np.int32) % used)
+        obj = bpy.data.objects.new(mesh.name, mesh)
+        collection.objects.link(obj)
+        objects.append(obj)
+    return objects
+
+# Plane emitting particle_count particles over frame_count frames, and a cube to
+# instance on them
+def generate_particle_emitter(collection, scene, particle_count, frame_count):
+    emitter = bpy.data.objects.new("benchmark_emitter", new_grid_mesh("benchmark_emitter", 10))
+    collection.objects.link(emitter)
+    emitter.modifiers.new("particles", 'PARTICLE_SYSTEM')
+    settings = emitter.particle_systems[0].settings
+    settings.count = particle_count
+    settings.frame_start = 1
+    settings.frame_end = frame_count
+    settings.lifetime = frame_count
+    instance = bpy.data.objects.new("benchmark_instance", new_cube_mesh("benchmark_instance"))
+    collection.objects.link(instance)
+    scene.frame_start = 1
+    scene.frame_end = frame_count
+    return emitter, instance
+
+# Start from an empty file and generate the parts of the synthetic scene a case needs.
+# Returns {part: objects}.
+def build_benchmark_scene(parts, sizes, seed=0):
+    bpy.ops.wm.read_homefile(use_empty=True)
+    context = bpy.context
+    scene = context.scene
+    scene.batch_scope_settings.scope = 'VIEW_LAYER'
+    collection = bpy.data.collections.new("Benchmark")
+    scene.collection.children.link(collection)
+    rng = np.random.default_rng(seed)
+    built = {}
+    if "duplicates" in parts:
+        built["duplicates"] = generate_linked_duplicates(collection, sizes["objects"], sizes["groups"], rng)
+    if "instancing" in parts:
+        built["instancing"] = generate_linked_duplicates(collection, sizes["instancing_objects"], sizes["groups"], rng)
+    if "copies" in parts:
+        built["copies"] = generate_linked_duplicates(collection, sizes["objects"], sizes["groups"], rng, linked=False)
+    if "curves" in parts:
+        built["curves"] = generate_curves(collection, sizes["curves"], sizes["curve_points"], rng)
+    if "uv_meshes" in parts:
+        built["uv_meshes"] = generate_uv_material_meshes(
+            collection, sizes["uv_meshes"], sizes["uv_layers"], sizes["material_slots"])
+    if "particles" in parts:
+        built["particles"] = generate_particle_emitter(collection, scene, sizes["particles"], sizes["frames"])
+    return built
+
+def select_only(context, objects, active=None):
+    deselect_selected_objects(context)
+    set_objects_selected(objects, True)
+    context.view_layer.objects.active = active or (objects[0] if objects else None)
+
+def bench_realize_setup(context, built):
+    instancers = convert_duplicates_to_instancers(context.scene, built["duplicates"])
+    select_only(context, instancers)
+
+def bench_move_setup(context, built):
+    target = bpy.data.collections.new("Benchmark Target")
+    context.scene.collection.children.link(target)
+    select_only(context, built["duplicates"])
+    return {"collection_name": target.name}
+
+# Point the custom property tools at the "benchmark" property, without adding it
+def bench_property_settings(context, built):
+    settings = context.scene.add_custom_property_settings
+    settings.property_name = "benchmark"
+    settings.property_type = 'INT'
+    settings.int_value = 1
+    for settings in (context.scene.remove_custom_property_settings, context.scene.select_custom_property_settings):
+        settings.property_name = "benchmark"
+
+def bench_tag_objects(context, built):
+    bench_property_settings(context, built)
+    pipeline_set_custom_property(built["duplicates"], "benchmark", 1)
+
+def bench_export_properties_setup(context, built):
+    bench_tag_objects(context, built)
+    return {"filepath": os.path.join(tempfile.mkdtemp(prefix="gilly_benchmark_"), "properties.json")}
+
+def bench_import_properties_setup(context, built):
+    kwargs = bench_export_properties_setup(context, built)
+    write_custom_properties(kwargs["filepath"], collect_custom_properties(built["duplicates"]))
+    return kwargs
+
+def bench_query_setup(context, built):
+    context.scene.scene_query_settings.query = "type = MESH and faces > 5 and uv_maps > 1"
+
+def bench_export_profile_setup(context, built):
+    scene_profiler.refresh(context.scene, context.evaluated_depsgraph_get())
+    return {"filepath": os.path.join(tempfile.mkdtemp(prefix="gilly_benchmark_"), "profile.json")}
+
+def bench_particle_setup(context, built):
+    emitter, instance = built["particles"]
+    select_only(context, [emitter, instance], emitter)
+
+def bench_particle_cache_setup(context, built):
+    bench_particle_setup(context, built)
+    emitter = built["particles"][0]
+    settings = context.scene.particle_bake_settings
+    settings.cache_directory = tempfile.mkdtemp(prefix="gilly_benchmark_")
+    ps = context.evaluated_depsgraph_get().objects[emitter.name].particle_systems[0]
+    scene = context.scene
+    stream_particle_cache(ps, particle_cache_directory(settings.cache_directory, emitter, ps),
+                          scene.frame_start, scene.frame_end, settings.cache_chunk_frames, built["particles"][1].name)
+
+# Setup that sets one scene setting, given by its path from the scene
+def bench_set(path, value):
+    def setup(context, built):
+        owner_path, attr = path.rsplit(".", 1)
+        setattr(context.scene.path_resolve(owner_path), attr, value)
+    return setup
+
+# (operator, scene parts, setup). setup(context, built) prepares selection and settings
+# and returns the operator's keyword arguments, or None for none.
+BENCHMARK_CASES = [
+    ("object.selected_linked_duplicates", {"duplicates"}, lambda context, built: select_only(context, built["duplicates"][:1])),
+    ("object.select_data_users", {"duplicates"}, lambda context, built: select_only(context, built["duplicates"][:1])),
+    ("object.select_duplicate_group", {"duplicates"},
+     lambda context, built: {"group": str(built["duplicates"][0].data.as_pointer())}),
+    ("object.select_by_query", {"duplicates", "uv_meshes"}, bench_query_setup),
+    ("object.deduplicate_meshes", {"copies"}, bench_set("deduplicate_mesh_settings.selected_only", False)),
+    ("object.convert_duplicates_to_instances", {"duplicates"},
+     bench_set("instance_conversion_settings.selected_only", False)),
+    ("object.realize_instances", {"duplicates"}, bench_realize_setup),
+    ("object.move_to_chosen_collection", {"duplicates"}, bench_move_setup),
+    ("object.add_custom_property", {"duplicates"}, bench_property_settings),
+    ("object.remove_custom_property", {"duplicates"}, bench_tag_objects),
+    ("object.select_by_custom_property", {"duplicates"}, bench_tag_objects),
+    ("object.export_custom_properties", {"duplicates"}, bench_export_properties_setup),
+    ("object.import_custom_properties", {"duplicates"}, bench_import_properties_setup),
+    ("object.profile_scene", {"duplicates", "curves"}, lambda context, built: {"full": True}),
+    ("object.export_scene_profile", {"duplicates", "curves"}, bench_export_profile_setup),
+    ("object.rename_uv", {"uv_meshes"}, bench_set("rename_uv_settings.uv_name", "Renamed")),
+    ("object.remove_inactive_uv", {"uv_meshes"}, None),
+    ("object.audit_uv_maps", {"uv_meshes"}, None),
+    ("object.remove_unused_materials", {"uv_meshes"}, None),
+    ("object.change_curve_fill_mode", {"curves"}, lambda context, built: {"fill_mode": 'FRONT'}),
+    ("object.extrude_curves", {"curves"}, bench_set("extrude_settings.extrude_value", 0.1)),
+    ("object.set_curve_resolution", {"curves"}, bench_set("set_curve_resolution_settings.resolution_u", 4)),
+    ("object.set_adaptive_curve_resolution", {"curves"}, None),
+    ("object.bake_particle_simulation", {"particles"}, bench_particle_setup),
+    ("object.apply_particle_cache", {"particles"}, bench_particle_cache_setup),
+]
+
+# Time a full evaluation of a collection by hiding and showing it, and the viewport
+# frame rate when there is a window that can be redrawn. Without one, fps is None and
+# fps_skipped says why.
+def measure_collection_evaluation(context, collection, redraws=10):
+    view_layer = context.view_layer
+    collection.hide_viewport = True
+    view_layer.update()
+    start = time.perf_counter()
+    collection.hide_viewport = False
+    view_layer.update()
+    result = {"seconds": time.perf_counter() - start, "fps": None}
+    if bpy.app.background:
+        result["fps_skipped"] = "background run, no window to redraw"
+    elif context.window is None or not bpy.ops.wm.redraw_timer.poll():
+        result["fps_skipped"] = "no window that can be redrawn"
+    else:
+        start = time.perf_counter()
+        bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=redraws)
+        result["fps"] = redraws / (time.perf_counter() - start)
+    return result
+
+# Evaluation time and frame rate of the linked duplicates before and after converting
+# them to instancers
+def compare_instancing(context, built, sizes):
+    objects = built["instancing"]
+    collection = objects[0].users_collection[0]
+    before = measure_collection_evaluation(context, collection)
+    start = time.perf_counter()
+    convert_duplicates_to_instancers(context.scene, objects)
+    convert_seconds = time.perf_counter() - start
+    after = measure_collection_evaluation(context, collection)
+    return {"variants": {"linked_duplicates": before, "instancers": after},
+            "objects": len(objects), "convert_seconds": convert_seconds}
+
+# Largest difference between the keyframes of two bakes of the same particle system
+def compare_baked_objects(obj_list_a, obj_list_b):
+    max_diff = 0.0
+    for obj_a, obj_b in zip(obj_list_a, obj_list_b):
+        curves_b = {(fc.data_path, fc.array_index): fc for fc in object_action_fcurves(obj_b)[0]}
+        for fc_a in object_action_fcurves(obj_a)[0]:
+            fc_b = curves_b[(fc_a.data_path, fc_a.array_index)]
+            co_a = np.empty(len(fc_a.keyframe_points) * 2, dtype=np.float32)
+            co_b = np.empty(len(fc_b.keyframe_points) * 2, dtype=np.float32)
+            if len(co_a) != len(co_b):
+                return float("inf")
+            fc_a.keyframe_points.foreach_get("co", co_a)
+            fc_b.keyframe_points.foreach_get("co", co_b)
+            max_diff = max(max_diff, float(np.abs(co_a - co_b).max(initial=0.0)))
+    return max_diff
+
+# Per-key and bulk bakes of the emitter's particles into keyframed objects, and the
+# largest difference between their keys
+def compare_particle_bake(context, built, sizes):
+    emitter, instance = built["particles"]
+    scene = context.scene
+    # Unborn particles read differently on the first pass over a new simulation, so run
+    # it once untimed and both bakes read the same values
+    for frame in range(scene.frame_start, scene.frame_end + 1):
+        scene.frame_set(frame)
+    variants, baked = {}, {}
+    for method in ('LEGACY', 'BULK'):
+        scene.frame_set(scene.frame_start)
+        ps = context.evaluated_depsgraph_get().objects[emitter.name].particle_systems[0]
+        start = time.perf_counter()
+        baked[method] = bake_particle_system(ps, instance, scene.frame_start, scene.frame_end, method)
+        variants[method] = {"seconds": time.perf_counter() - start}
+    return {"variants": variants, "particles": len(baked['BULK']),
+            "speedup": variants['LEGACY']["seconds"] / max(variants['BULK']["seconds"], 1e-9),
+            "max_difference": compare_baked_objects(baked['LEGACY'], baked['BULK'])}
+
+# Serial disk cache bake of the emitter against parallel bakes with 2, 4, ... up to
+# bake_workers processes. The workers open the saved file and start from the baked point
+# cache, so the point cache is baked and the scene saved to a temporary .blend first.
+def compare_parallel_bake(context, built, sizes):
+    if not bpy.app.binary_path:
+        raise RuntimeError("Parallel bakes need a Blender executable to start the workers")
+    emitter, _ = built["particles"]
+    scene = context.scene
+    root = tempfile.mkdtemp(prefix="gilly_benchmark_")
+    try:
+        bpy.ops.ptcache.bake_all(bake=True)
+        bpy.ops.wm.save_as_mainfile(filepath=os.path.join(root, "parallel_bake.blend"))
+        ps = context.evaluated_depsgraph_get().objects[emitter.name].particle_systems[0]
+        frame_count = scene.frame_end - scene.frame_start + 1
+        # Chunks enough for every worker of the largest run
+        chunk_frames = max(1, frame_count // sizes["bake_workers"])
+
+        start = time.perf_counter()
+        stream_particle_cache(ps, os.path.join(root, "serial"), scene.frame_start, scene.frame_end, chunk_frames)
+        serial = time.perf_counter() - start
+        variants = {"serial": {"seconds": serial}}
+        worker_count = 2
+        while worker_count <= sizes["bake_workers"]:
+            start = time.perf_counter()
+            bake_particle_cache_parallel(emitter, ps, os.path.join(root, "workers_{}".format(worker_count)),
+                                         scene.frame_start, scene.frame_end, chunk_frames, worker_count)
+            seconds = time.perf_counter() - start
+            variants["workers_{}".format(worker_count)] = {"seconds": seconds, "speedup": serial / max(seconds, 1e-9)}
+            worker_count *= 2
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return {"variants": variants, "particles": len(ps.particles), "frames": frame_count, "chunk_frames": chunk_frames}
+
+# Stand-in for the UILayout a panel section draws into. Blender only hands out layouts
+# while it redraws a region, which background runs never do. Like the real layout it
+# reads every property it is asked to show, the items themselves are only counted.
+class BenchmarkLayout:
+    def __init__(self):
+        self.items = 0
+
+    def _item(self):
+        self.items += 1
+        return self
+
+    def row(self, **kwargs):
+        return self._item()
+
+    column = box = row
+
+    def prop(self, data, property, **kwargs):
+        getattr(data, property)
+        self._item()
+
+    def operator(self, operator, **kwargs):
+        self._item()
+        return types.SimpleNamespace()  # takes the operator properties the section sets
+
+    def label(self, **kwargs):
+        self._item()
+
+    separator = label
+
+    def template_list(self, listtype_name, list_id, dataptr, propname, active_dataptr, active_propname, **kwargs):
+        len(getattr(dataptr, propname))
+        getattr(active_dataptr, active_propname)
+        self._item()
+
+# Draw time of every tool section on a heavy scene with all of its foldouts open and its
+# lists full: the duplicate groups, the profiler rows and the operator log. Sections draw
+# into BenchmarkLayout, so this times their own Python and the properties they read,
+# not Blender's layout and drawing.
+def compare_panel_draw(context, built, sizes):
+    scene = context.scene
+    scene.instrumentation_settings.enabled = True
+    call_operator("object.profile_scene", {"full": True})
+    while len(instrument_log.records) < scene.instrumentation_settings.shown_records:
+        call_operator("object.index_linked_duplicates", {})
+    duplicate_settings = scene.linked_duplicate_settings
+    duplicate_settings.show_groups = True
+    duplicate_settings.max_groups = sizes["groups"]
+    scene.select_custom_property_settings.match_value = True
+    scene.set_curve_resolution_settings.use_adaptive = True
+    particle_settings = scene.particle_bake_settings
+    particle_settings.use_decimation = True
+    particle_settings.use_parallel = True
+
+    redraws = sizes["redraws"]
+    variants = {}
+    for panel_class in GILLY_TOOLS_SUBPANELS:
+        panel = types.SimpleNamespace()
+        start = time.perf_counter()
+        for _ in range(redraws):
+            panel.layout = BenchmarkLayout()
+            panel_class.draw_section(panel, context)
+        seconds = time.perf_counter() - start
+        variants[panel_class.bl_label] = {"seconds": seconds, "ms_per_redraw": 1000 * seconds / redraws,
+                                          "items": panel.layout.items}
+    return {"variants": variants, "redraws": redraws, "objects": len(scene.objects)}
+
+# (name, scene parts, run). run(context, built, sizes) times the variants of one job on
+# the same scene and returns {"variants": {variant: {"seconds": ..., ...}}, ...}.
+BENCHMARK_COMPARISONS = [
+    ("instancing", {"instancing"}, compare_instancing),
+    ("particle_bake", {"particles"}, compare_particle_bake),
+    ("parallel_bake", {"particles"}, compare_parallel_bake),
+    ("panel_draw", {"duplicates", "curves", "uv_meshes"}, compare_panel_draw),
+]
+
+# Peak resident memory of this process so far, or None where it cannot be read
+def process_peak_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports kilobytes
+
+def call_operator(idname, kwargs):
+    category, name = idname.split(".")
+    return getattr(getattr(bpy.ops, category), name)('EXEC_DEFAULT', **kwargs)
+
+# Time one operator over repeats fresh scenes, plus one traced run for the peak Python
+# memory, which tracemalloc would otherwise slow down
+def run_benchmark_case(idname, parts, setup, sizes, repeats, seed):
+    runs = []
+    python_peak = 0
+    for run in range(repeats + 1):
+        built = build_benchmark_scene(parts, sizes, seed)
+        kwargs = (setup(bpy.context, built) if setup else None) or {}
+        traced = run == repeats
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = call_operator(idname, kwargs)
+        seconds = time.perf_counter() - start
+        if traced:
+            python_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            runs.append(seconds)
+    return {
+        "status": "ok",
+        "result": sorted(result),
+        "seconds": float(np.median(runs)),
+        "runs": runs,
+        "python_peak_bytes": python_peak,
+        "process_peak_bytes": process_peak_bytes(),
+    }
+
+# Run one comparison once on a fresh scene. Comparisons are slow and about the ratio
+# between their variants, so they are not repeated.
+def run_benchmark_comparison(parts, run, sizes, seed):
+    built = build_benchmark_scene(parts, sizes, seed)
+    comparison = run(bpy.context, built, sizes)
+    comparison["status"] = "ok"
+    return comparison
+
+# One variant of a comparison for the console, e.g. "instancers 0.1234s 58.1 fps"
+def format_comparison_variant(variant, measures):
+    text = "{} {:.4f}s".format(variant, measures["seconds"])
+    if "ms_per_redraw" in measures:
+        text += " ({:.3f} ms per redraw)".format(measures["ms_per_redraw"])
+    if measures.get("fps") is not None:
+        text += " {:.1f} fps".format(measures["fps"])
+    elif "fps_skipped" in measures:
+        text += " (fps skipped, {})".format(measures["fps_skipped"])
+    return text
+
+# Operators of this add-on that are registered
+def registered_operators():
+    return sorted(cls.bl_idname for cls in classes if issubclass(cls, bpy.types.Operator) and cls.is_registered)
+
+def run_benchmarks(sizes, repeats=3, seed=0, only=""):
+    results = {
+        "blender": bpy.app.version_string,
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sizes": sizes,
+        "repeats": repeats,
+        "cases": {},
+        "comparisons": {},
+    }
+    covered = set()
+    for idname, parts, setup in BENCHMARK_CASES:
+        covered.add(idname)
+        if only and only not in idname:
+            continue
+        try:
+            case = run_benchmark_case(idname, parts, setup, sizes, repeats, seed)
+        except Exception as error:
+            traceback.print_exc()
+            case = {"status": "error", "error": "{}: {}".format(type(error).__name__, error)}
+        results["cases"][idname] = case
+        print("{:45s} {}".format(idname, "{:.4f}s".format(case["seconds"]) if case["status"] == "ok" else case["error"]))
+    for idname in registered_operators():
+        if idname not in covered and (not only or only in idname):
+            results["cases"][idname] = {"status": "skipped", "error": "no benchmark case"}
+            print("{:45s} skipped, no benchmark case".format(idname))
+    for name, parts, run in BENCHMARK_COMPARISONS:
+        if only and only not in name:
+            continue
+        try:
+            comparison = run_benchmark_comparison(parts, run, sizes, seed)
+        except Exception as error:
+            traceback.print_exc()
+            comparison = {"status": "error", "error": "{}: {}".format(type(error).__name__, error)}
+        results["comparisons"][name] = comparison
+        print("{:45s} {}".format(name, ", ".join(
+            format_comparison_variant(variant, measures) for variant, measures in comparison["variants"].items())
+            if comparison["status"] == "ok" else comparison["error"]))
+    return results
+
+# Cases that got slower or used more memory than in the baseline by more than tolerance
+def compare_benchmarks(results, baseline, tolerance=0.25):
+    regressions = []
+    for idname, case in results["cases"].items():
+        base = baseline.get("cases", {}).get(idname)
+        if case["status"] != "ok" or not base or base.get("status") != "ok":
+            continue
+        for key, floor in (("seconds", BENCHMARK_MIN_SECONDS), ("python_peak_bytes", 1024 * 1024)):
+            if case[key] > base[key] * (1 + tolerance) and case[key] - base[key] > floor:
+                regressions.append({"operator": idname, "measure": key, "baseline": base[key], "current": case[key],
+                                    "ratio": case[key] / max(base[key], 1e-9)})
+    for name, comparison in results.get("comparisons", {}).items():
+        base = baseline.get("comparisons", {}).get(name)
+        if comparison["status"] != "ok" or not base or base.get("status") != "ok":
+            continue
+        for variant, measures in comparison["variants"].items():
+            base_seconds = base["variants"].get(variant, {}).get("seconds")
+            if base_seconds is None:
+                continue
+            seconds = measures["seconds"]
+            if seconds > base_seconds * (1 + tolerance) and seconds - base_seconds > BENCHMARK_MIN_SECONDS:
+                regressions.append({"operator": "{} {}".format(name, variant), "measure": "seconds",
+                                    "baseline": base_seconds, "current": seconds,
+                                    "ratio": seconds / max(base_seconds, 1e-9)})
+    return regressions
+
+# Entry point of the benchmark suite
+def run_benchmark_command(args):
+    sizes = {key: max(1, int(round(value * args.scale))) if key in BENCHMARK_SCALED else value
+             for key, value in BENCHMARK_SIZES.items()}
+    for override in args.size:
+        key, _, value = override.partition("=")
+        if key not in sizes:
+            raise SystemExit("Unknown size '{}', expected one of {}".format(key, ", ".join(sizes)))
+        sizes[key] = int(value)
+    if not hasattr(bpy.types.Scene, "batch_scope_settings"):
+        register()
+
+    results = run_benchmarks(sizes, args.repeats, args.seed, args.only)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare_benchmarks(results, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION {operator} {measure}: {baseline:.4g} -> {current:.4g} ({ratio:.2f}x)".format(**regression))
+        if regressions:
+            sys.exit(1)
+        print("No regressions against {}".format(args.baseline))
+
+#-------------------
+# STARTUP BENCHMARK
+#-------------------
+# What the add-on costs every Blender launch and every scene update:
+#   blender -b --factory-startup --python gilly_toolbox/worker.py -- startup --output startup.json
+# Importing is timed in a fresh Blender process, since this one has the package loaded
+# already. register() and unregister() are timed in pairs, and the idle handlers on a
+# scene where one object moved, which is nothing any toolbox cache tracks.
+LAZY_MODULES = ("geometry", "query", "bake", "batch", "benchmark")
+
+STARTUP_PROBE = """
+import json, sys, time
+sys.path.insert(0, {parent!r})
+start = time.perf_counter()
+import {name} as package
+imported = time.perf_counter() - start
+start = time.perf_counter()
+package.register()
+registered = time.perf_counter() - start
+loaded = [module for module in {lazy!r} if {name!r} + "." + module in sys.modules]
+print("STARTUP " + json.dumps({{"import_seconds": imported, "first_register_seconds": registered,
+                               "lazy_modules_loaded": loaded, "numpy_loaded": "numpy" in sys.modules}}))
+"""
+
+# Import and first register() of the add-on in a new background Blender
+def measure_cold_start():
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    probe = STARTUP_PROBE.format(parent=os.path.dirname(package_dir), name=__name__.rpartition(".")[0],
+                                 lazy=LAZY_MODULES)
+    completed = subprocess.run([bpy.app.binary_path, "-b", "--factory-startup", "--python-exit-code", "1",
+                                "--python-expr", probe], capture_output=True, text=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError("Startup probe failed:\n" + completed.stdout + completed.stderr)
+
+# Median time of repeats calls of function
+def median_seconds(function, repeats):
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return float(np.median(runs))
+
+def run_startup_benchmark(repeats=20, object_count=10000):
+    results = {
+        "blender": bpy.app.version_string,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "objects": object_count,
+        "cold_start": measure_cold_start(),
+    }
+
+    was_registered = hasattr(bpy.types.Scene, "batch_scope_settings")
+    if was_registered:
+        unregister()
+    register_runs, unregister_runs = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        register()
+        register_runs.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        unregister()
+        unregister_runs.append(time.perf_counter() - start)
+    results["register_seconds"] = float(np.median(register_runs))
+    results["unregister_seconds"] = float(np.median(unregister_runs))
+
+    # A scene with the object indexes built, as they are after the first tool used them
+    bpy.ops.wm.read_homefile(use_empty=True)
+    scene = bpy.context.scene
+    collection = bpy.data.collections.new("Startup Benchmark")
+    scene.collection.children.link(collection)
+    objects = generate_linked_duplicates(collection, object_count, max(1, object_count // 100),
+                                         np.random.default_rng(0))
+    view_layer = bpy.context.view_layer
+
+    def move_one_object():
+        objects[0].location.x += 0.001
+        view_layer.update()
+
+    results["update_seconds_unregistered"] = median_seconds(move_one_object, repeats)
+    register()
+    linked_duplicate_index.ensure(scene)
+    custom_property_index.ensure(scene)
+    results["update_seconds_registered"] = median_seconds(move_one_object, repeats)
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    results["idle_handler_seconds"] = median_seconds(
+        lambda: (update_scene_object_indexes(scene, depsgraph), update_collection_cache(scene, depsgraph)),
+        repeats)
+    if not was_registered:
+        unregister()
+    return results
+
+# Entry point of the startup benchmark
+def run_startup_command(args):
+    results = run_startup_benchmark(args.repeats, args.objects)
+    cold = results["cold_start"]
+    print("import {:.1f} ms, first register {:.1f} ms, lazy modules loaded at startup: {}".format(
+        cold["import_seconds"] * 1000, cold["first_register_seconds"] * 1000,
+        ", ".join(cold["lazy_modules_loaded"]) or "none"))
+    print("register {:.2f} ms, unregister {:.2f} ms".format(
+        results["register_seconds"] * 1000, results["unregister_seconds"] * 1000))
+    print("idle handlers {:.3f} ms, scene update {:.3f} ms registered against {:.3f} ms without".format(
+        results["idle_handler_seconds"] * 1000, results["update_seconds_registered"] * 1000,
+        results["update_seconds_unregistered"] * 1000))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=1)
+
@@ -0,0 +1,59 @@
+import argparse
+import os
+
+# Script background Blender processes run, see worker.py
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+
+# Command line entry point for background runs, e.g.
+#   blender -b file.blend --python gilly_toolbox/worker.py -- bake-worker --emitter ...
+#   blender -b --python gilly_toolbox/worker.py -- batch jobs.json --workers 8
+#   blender -b --factory-startup --python gilly_toolbox/worker.py -- benchmark --output bench.json
+#   blender -b --factory-startup --python gilly_toolbox/worker.py -- startup --output startup.json
+def main(argv):
+    from .bake import run_bake_worker
+    from .batch import run_batch_driver, run_batch_file
+    from .benchmark import BENCHMARK_SIZES, run_benchmark_command, run_startup_command
+
+    parser = argparse.ArgumentParser(prog="gilly_toolbox")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    bake_worker = commands.add_parser("bake-worker", help="Write particle cache chunks for a parallel bake")
+    bake_worker.add_argument("--emitter", required=True)
+    bake_worker.add_argument("--particle-system", required=True)
+    bake_worker.add_argument("--cache-dir", required=True)
+    bake_worker.add_argument("--first", type=int, required=True)
+    bake_worker.add_argument("--last", type=int, required=True)
+    bake_worker.set_defaults(run=run_bake_worker)
+
+    batch = commands.add_parser("batch", help="Run a pipeline of toolbox operations over the files of a job manifest")
+    batch.add_argument("manifest", help="Job manifest (JSON)")
+    batch.add_argument("--workers", type=int, default=0, help="Background Blender processes (default: manifest or CPU count)")
+    batch.add_argument("--report", default="batch_report.json", help="Report file, .json or .csv")
+    batch.set_defaults(run=run_batch_driver)
+
+    batch_file = commands.add_parser("batch-file", help="Run a pipeline on the open file (used by batch)")
+    batch_file.add_argument("--pipeline", required=True)
+    batch_file.add_argument("--result", required=True)
+    batch_file.add_argument("--output", required=True)
+    batch_file.set_defaults(run=run_batch_file)
+
+    benchmark = commands.add_parser("benchmark", help="Time every operator on synthetic scenes")
+    benchmark.add_argument("--scale", type=float, default=1.0, help="Multiplier for the scene sizes")
+    benchmark.add_argument("--size", action="append", default=[], metavar="NAME=COUNT",
+                           help="Override one scene size: " + ", ".join(BENCHMARK_SIZES))
+    benchmark.add_argument("--repeats", type=int, default=3)
+    benchmark.add_argument("--seed", type=int, default=0)
+    benchmark.add_argument("--only", default="", help="Only run operators and comparisons whose name contains this")
+    benchmark.add_argument("--output", help="Write the results to this JSON file")
+    benchmark.add_argument("--baseline", help="Compare against these results and fail on regressions")
+    benchmark.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown, 0.25 is 25%%")
+    benchmark.set_defaults(run=run_benchmark_command)
+
+    startup = commands.add_parser("startup", help="Time importing, registering and the idle handlers of the add-on")
+    startup.add_argument("--repeats", type=int, default=20)
+    startup.add_argument("--objects", type=int, default=10000, help="Objects in the scene the handlers see")
+    startup.add_argument("--output", help="Write the results to this JSON file")
+    startup.set_defaults(run=run_startup_command)
+
+    args = parser.parse_args(argv)
+    args.run(args)
@@ -0,0 +1,619 @@
+import functools
+import json
+import time
+import traceback
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import bpy
+from bpy_extras.io_utils import ExportHelper
+
+#---------------
+# TARGET SCOPES
+#---------------
+# Sets of objects a bulk tool can work on
+SCOPE_ITEMS = [
+    ('SELECTED', "Selected", "Selected objects"),
+    ('COLLECTION', "Collection", "Objects in a collection and its child collections"),
+    ('VIEW_LAYER', "View Layer", "Every object in the current view layer"),
+    ('FILE', "Whole File", "Every object in the file, including other scenes"),
+]
+
+# Objects in a collection and its child collections, each listed once. This walks the
+# collection tree itself: the first read of Collection.all_objects after a change
+# rebuilds Blender's object cache in quadratic time, seconds for 50k objects.
+def collection_objects(collection):
+    objects = {}
+    stack = [collection]
+    while stack:
+        collection = stack.pop()
+        for obj in collection.objects:
+            objects.setdefault(obj.as_pointer(), obj)
+        stack.extend(collection.children)
+    return list(objects.values())
+
+def scope_objects(context, scope, collection=None):
+    if scope == 'SELECTED':
+        return context.selected_objects
+    if scope == 'COLLECTION':
+        return collection_objects(collection) if collection is not None else []
+    if scope == 'VIEW_LAYER':
+        return context.view_layer.objects
+    return bpy.data.objects
+
+# Property group for the objects the bulk tools work on
+class BatchScopeSettings(bpy.types.PropertyGroup):
+    scope: bpy.props.EnumProperty(
+        name="Scope",
+        description="Objects the tools below work on",
+        items=SCOPE_ITEMS,
+        default='SELECTED',
+    )
+    collection: bpy.props.PointerProperty(
+        name="Collection",
+        description="Collection to work on when the scope is Collection",
+        type=bpy.types.Collection,
+    )
+
+# Objects in the scope chosen in the panel
+def batch_objects(context):
+    settings = context.scene.batch_scope_settings
+    return scope_objects(context, settings.scope, settings.collection)
+
+#----------------
+# BATCH EXECUTOR
+#----------------
+# Data blocks of the given object types (any type for None) used by the objects, each
+# listed once however many linked duplicates share it. Linked library data cannot be
+# edited and is skipped.
+def unique_data_blocks(objects, object_types):
+    blocks = {}
+    for obj in objects:
+        if (object_types is None or obj.type in object_types) and obj.data is not None and obj.data.library is None:
+            blocks.setdefault(obj.data.as_pointer(), obj.data)
+    return list(blocks.values())
+
+# Set an attribute only when it differs, so unchanged data is not tagged for an update
+def set_if_changed(data, attr, value):
+    old = getattr(data, attr)
+    if old == value:
+        return False
+    if hasattr(old, "__len__") and not isinstance(old, str):
+        old = tuple(old)  # arrays are views of the data that is about to change
+    setattr(data, attr, value)
+    record_change(lambda: setattr(data, attr, old))
+    instrument_log.count("rna_writes")
+    return True
+
+# Drive a step generator to the end and return its result
+def run_steps(steps):
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+# Re-yield the progress of a nested step generator as part of a larger job of total
+# steps, starting at offset. Returns the nested generator's result.
+def offset_steps(steps, offset, total):
+    while True:
+        try:
+            done, _ = next(steps)
+        except StopIteration as stop:
+            return stop.value
+        yield offset + done, total
+
+# Call edit(data) once for every unique data block of the objects, yielding
+# (done, total) after each one. The edits are timed as the label's phase of the running
+# operators. edit returns True when it changed the data block. Returns (changed, visited).
+def run_batch_steps(label, objects, object_types, edit):
+    blocks = unique_data_blocks(objects, object_types)
+    changed = 0
+    for i, data in enumerate(blocks):
+        with instrument_log.phase(label):
+            if edit(data):
+                changed += 1
+        instrument_log.count("data_blocks")
+        yield i + 1, len(blocks)
+    return changed, len(blocks)
+
+def run_batch(label, objects, object_types, edit):
+    return run_steps(run_batch_steps(label, objects, object_types, edit))
+
+#--------------------
+# TIME-SLICED RUNNER
+#--------------------
+# Long operators do their work in a step generator that yields (done, total) after each
+# small piece. Run from a script, the steps all run at once. Run from the UI, a timer
+# runs steps until the slice budget is used up and then hands control back to Blender,
+# so the interface stays responsive and shows progress. Esc cancels: changes recorded
+# in the change journal are undone, or the finished part is kept as one undo step.
+SLICE_SECONDS = 0.03
+
+# Events that still reach Blender while a job runs: viewport navigation and other
+# timers. Everything else, undo, deleting, other operators, is held back, since the
+# job's steps keep references to the data they work on.
+NAVIGATION_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+    'WHEELINMOUSE', 'WHEELOUTMOUSE', 'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE',
+    'WINDOW_DEACTIVATE',
+}
+
+def is_navigation_event(event):
+    if event.type in NAVIGATION_EVENTS or event.type.startswith(("NDOF_", "TIMER")):
+        return True
+    # Numpad views, but not Ctrl+Numpad 0, which makes the active object the camera
+    return event.type.startswith("NUMPAD_") and not (event.ctrl or event.alt)
+
+CANCEL_ITEMS = [
+    ('ROLLBACK', "Roll Back", "Undo everything done before cancelling"),
+    ('KEEP', "Keep", "Keep the work done before cancelling"),
+]
+
+# Undo actions for the changes made while an operator runs, newest last
+class ChangeJournal:
+    def __init__(self):
+        self.undo = []
+
+    def rollback(self):
+        for undo in reversed(self.undo):
+            try:
+                undo()
+            except ReferenceError:  # the data was removed in the meantime
+                pass
+        self.undo = []
+
+# Journals of the operators running now. Edits record into the innermost one.
+_change_journals = []
+
+# Record how to undo a change, if a time-sliced operator is running
+def record_change(undo):
+    if _change_journals:
+        _change_journals[-1].undo.append(undo)
+
+# Kinds of data blocks a rollback removes when they were created while journaling
+JOURNALED_ID_TYPES = ("objects", "collections", "meshes", "actions", "node_groups")
+
+# Record every data block created inside the block, so a rollback removes them all.
+# They are found again by pointer, so ones already removed are skipped safely.
+@contextmanager
+def record_created_ids():
+    if not _change_journals:
+        yield
+        return
+    before = {name: {data.as_pointer() for data in getattr(bpy.data, name)} for name in JOURNALED_ID_TYPES}
+    try:
+        yield
+    finally:
+        created = {name: {data.as_pointer() for data in getattr(bpy.data, name)} - before[name]
+                   for name in JOURNALED_ID_TYPES}
+        record_change(lambda: bpy.data.batch_remove([data for name, pointers in created.items()
+                                                     for data in getattr(bpy.data, name)
+                                                     if data.as_pointer() in pointers]))
+
+# Mixin for operators whose work is a step generator. Subclasses define
+# steps(context), which may return {'CANCELLED'} to fail before changing anything,
+# and optionally finish(context), called once the work ends, cancelled or not, as long
+# as steps() was started. Esc before the first timer event ends the job without it.
+# Operators whose changes cannot be journaled set can_roll_back to False.
+class TimeSlicedOperator:
+    can_roll_back = True
+
+    on_cancel: bpy.props.EnumProperty(
+        name="On Cancel",
+        description="What happens to the finished work when Esc cancels the operator",
+        items=CANCEL_ITEMS,
+        default='ROLLBACK',
+    )
+
+    def finish(self, context):
+        pass
+
+    def execute(self, context):
+        result = run_steps(self.steps(context))
+        self.finish(context)
+        return result or {'FINISHED'}
+
+    def invoke(self, context, event):
+        self._steps = self.steps(context)
+        self._journal = ChangeJournal()
+        self._progress = (0, 0)
+        self._started = False
+        self._record = instrument_log.begin(self, context)
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(0.001, window=context.window)
+        window_manager.modal_handler_add(self)
+        window_manager.progress_begin(0, 100)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            # Closing runs the steps' cleanup, which may still record into the journal
+            _change_journals.append(self._journal)
+            try:
+                self._steps.close()
+            finally:
+                _change_journals.pop()
+            return self._end(context, cancelled=True)
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'} if is_navigation_event(event) else {'RUNNING_MODAL'}
+
+        deadline = time.perf_counter() + SLICE_SECONDS
+        _change_journals.append(self._journal)
+        if self._record is not None:
+            instrument_log.resume(self._record)
+        self._started = True
+        try:
+            while time.perf_counter() < deadline:
+                self._progress = next(self._steps)
+        except StopIteration as stop:
+            return self._end(context, result=stop.value)
+        except Exception as error:
+            traceback.print_exc()
+            self.report({'ERROR'}, "{} failed: {}".format(self.bl_label, error))
+            self._error = error
+            return self._end(context, cancelled=True)
+        finally:
+            _change_journals.pop()
+            if self._record is not None and self._record in instrument_log.active:
+                instrument_log.pause(self._record)
+
+        done, total = self._progress
+        percent = 100 * done // total if total else 0
+        context.window_manager.progress_update(percent)
+        context.workspace.status_text_set("{}: {}% ({} of {}), Esc to cancel".format(self.bl_label, percent, done, total))
+        return {'RUNNING_MODAL'}
+
+    def _end(self, context, cancelled=False, result=None):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self._timer)
+        window_manager.progress_end()
+        context.workspace.status_text_set(None)
+        if cancelled and not self._started:
+            result = {'CANCELLED'}
+            self.report({'WARNING'}, "{} cancelled before it started".format(self.bl_label))
+        elif cancelled:
+            if self.can_roll_back and self.on_cancel == 'ROLLBACK':
+                self._journal.rollback()
+                result = {'CANCELLED'}
+                self.report({'WARNING'}, "{} cancelled, changes rolled back".format(self.bl_label))
+            else:
+                # Finishing keeps the work done so far as one undo step
+                done, total = self._progress
+                self.report({'WARNING'}, "{} cancelled after {} of {}".format(self.bl_label, done, total))
+        if self._started:
+            self.finish(context)
+        result = result or {'FINISHED'}
+        if self._record is not None:
+            if self._record in instrument_log.active:
+                instrument_log.pause(self._record)
+            instrument_log.end(self._record, result, getattr(self, "_error", None))
+        return result
+
+#-----------------
+# INSTRUMENTATION
+#-----------------
+# Opt-in record of every toolbox operator run: wall time, objects and data blocks
+# visited, RNA writes made through the write helpers, keyframes written by the bakes,
+# peak Python memory when tracing is on, and time spent in named phases. The newest records are kept in a ring buffer
+# the panel shows and that can be exported as JSON lines.
+INSTRUMENT_COUNTERS = ("objects", "data_blocks", "rna_writes", "keyframes")
+DRAW_SAMPLES = 50   # redraws each panel's draw time is averaged over
+
+class OperatorRecord:
+    def __init__(self, operator):
+        self.operator = operator.bl_idname
+        self.label = operator.bl_label
+        self.started = time.time()
+        self.seconds = 0.0          # wall time from start to end
+        self.busy_seconds = 0.0     # time spent running, less than wall time for modal runs
+        self.counts = dict.fromkeys(INSTRUMENT_COUNTERS, 0)
+        self.phases = {}
+        self.python_peak_bytes = None
+        self.result = None
+        self.error = None
+        self.traced = False
+        self._start = time.perf_counter()
+        self._resumed = None
+
+    def as_dict(self):
+        row = {"operator": self.operator, "started": self.started, "seconds": self.seconds,
+               "busy_seconds": self.busy_seconds, "python_peak_bytes": self.python_peak_bytes,
+               "phases": self.phases, "result": self.result, "error": self.error}
+        row.update(self.counts)
+        return row
+
+class InstrumentLog:
+    def __init__(self, size=200):
+        self.records = deque(maxlen=size)
+        self.active = []    # records of the operators running now, innermost last
+        self.draw_times = {}    # panel label -> seconds of its last redraws
+
+    def resize(self, size):
+        self.records = deque(self.records, maxlen=size)
+
+    # Start a record for an operator, or return None when instrumentation is off
+    def begin(self, operator, context):
+        settings = getattr(context.scene, "instrumentation_settings", None)
+        if settings is None or not settings.enabled:
+            return None
+        record = OperatorRecord(operator)
+        if settings.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            record.traced = True
+        return record
+
+    # Attribute counts and phases to a record while its operator runs
+    def resume(self, record):
+        record._resumed = time.perf_counter()
+        self.active.append(record)
+
+    def pause(self, record):
+        self.active.remove(record)
+        record.busy_seconds += time.perf_counter() - record._resumed
+
+    def end(self, record, result=None, error=None):
+        record.seconds = time.perf_counter() - record._start
+        if record.traced:
+            record.python_peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        record.result = sorted(result) if result else None
+        record.error = "{}: {}".format(type(error).__name__, error) if error else None
+        self.records.append(record)
+
+    def record_draw(self, panel, seconds):
+        samples = self.draw_times.get(panel)
+        if samples is None:
+            samples = self.draw_times[panel] = deque(maxlen=DRAW_SAMPLES)
+        samples.append(seconds)
+
+    def count(self, key, amount=1):
+        for record in self.active:
+            record.counts[key] += amount
+
+    # Time a block of work as a named phase of the running operators
+    @contextmanager
+    def phase(self, name):
+        if not self.active:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            for record in self.active:
+                record.phases[name] = record.phases.get(name, 0.0) + elapsed
+
+instrument_log = InstrumentLog()
+
+# Wrap an operator's execute() so each run is recorded when instrumentation is on
+def instrumented_execute(execute):
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        record = instrument_log.begin(self, context)
+        if record is None:
+            return execute(self, context)
+        instrument_log.resume(record)
+        try:
+            result = execute(self, context)
+        except Exception as error:
+            instrument_log.pause(record)
+            instrument_log.end(record, error=error)
+            raise
+        instrument_log.pause(record)
+        instrument_log.end(record, result)
+        return result
+    wrapper.instrumented = True
+    return wrapper
+
+# Instrument every operator class of the toolbox, once
+def instrument_operators(classes):
+    for cls in classes:
+        if issubclass(cls, bpy.types.Operator) and hasattr(cls, "execute") \
+                and not getattr(cls.execute, "instrumented", False):
+            cls.execute = instrumented_execute(cls.execute)
+
+# Property group for instrumentation settings
+class InstrumentationSettings(bpy.types.PropertyGroup):
+    enabled: bpy.props.BoolProperty(
+        name="Record Operator Runs",
+        description="Time every toolbox operator and keep the newest runs in a log",
+        default=False,
+    )
+    trace_memory: bpy.props.BoolProperty(
+        name="Trace Memory",
+        description="Record peak Python memory with tracemalloc. Makes operators slower",
+        default=False,
+    )
+    shown_records: bpy.props.IntProperty(
+        name="Shown",
+        description="Number of the newest runs to show",
+        default=10,
+        min=1,
+        max=100,
+    )
+    max_records: bpy.props.IntProperty(
+        name="Keep",
+        description="Number of runs the log keeps",
+        default=200,
+        min=1,
+        max=100000,
+        update=lambda self, context: instrument_log.resize(self.max_records),
+    )
+
+# Define the operator for exporting the instrumentation log
+class OBJECT_OT_ExportInstrumentationLogOperator(bpy.types.Operator, ExportHelper):
+    bl_idname = "object.export_instrumentation_log"
+    bl_label = "Export Operator Log"
+    bl_description = "Writes the recorded operator runs to a JSON lines file"
+
+    filename_ext = ".jsonl"
+    filter_glob: bpy.props.StringProperty(default="*.jsonl", options={'HIDDEN'})
+
+    def execute(self, context):
+        with open(self.filepath, "w", encoding="utf-8") as handle:
+            for record in instrument_log.records:
+                handle.write(json.dumps(record.as_dict()) + "\n")
+        self.report({'INFO'}, "Exported {} operator runs".format(len(instrument_log.records)))
+        return {'FINISHED'}
+
+# Define the operator for clearing the instrumentation log
+class OBJECT_OT_ClearInstrumentationLogOperator(bpy.types.Operator):
+    bl_idname = "object.clear_instrumentation_log"
+    bl_label = "Clear Operator Log"
+    bl_description = "Forgets the recorded operator runs"
+
+    def execute(self, context):
+        instrument_log.records.clear()
+        instrument_log.draw_times.clear()
+        return {'FINISHED'}
+
+#---------------------
+# SCENE OBJECT INDEXES
+#---------------------
+# Base for indexes that group the scene's objects by keys computed per object. An index
+# is built in one pass over scene.objects the first time it is needed and then kept up
+# to date from depsgraph updates, so queries only touch the objects they return.
+# Everything is keyed by as_pointer(), which is why undo and file loads drop the indexes.
+# Subclasses define keys_for(obj), the keys an object is filed under.
+class SceneObjectIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.scene_key = None
+        self.groups = {}        # key -> {object pointer: object}
+        self.object_keys = {}   # object pointer -> keys of the object
+        self.data_object_count = 0
+        self.membership_changed = False     # collections changed since the last check
+        self._changed()
+
+    # Called whenever the groups change, for subclasses that cache derived data
+    def _changed(self):
+        pass
+
+    # Make sure the index describes the given scene. Objects unlinked from the scene stay
+    # in the file, so after a collection change the index is checked to still hold
+    # exactly as many objects as the scene. That count walks every object, which is why
+    # it waits for the next use instead of running on every depsgraph update.
+    def ensure(self, scene):
+        if self.scene_key == scene.as_pointer() and self.membership_changed:
+            self.membership_changed = False
+            if len(self.object_keys) != len(scene.objects):
+                self.scene_key = None
+        if self.scene_key != scene.as_pointer():
+            self.rebuild(scene)
+        return self
+
+    # Whether the index describes the scene without ensure() having to check or rebuild
+    # it. Drawing code tests this, so a redraw never walks the scene's objects.
+    def is_current(self, scene):
+        return self.scene_key == scene.as_pointer() and not self.membership_changed
+
+    def rebuild(self, scene):
+        self.clear()
+        self.scene_key = scene.as_pointer()
+        for obj in scene.objects:
+            self._add(obj, self.keys_for(obj))
+        self.data_object_count = len(bpy.data.objects)
+
+    def _add(self, obj, keys):
+        obj_key = obj.as_pointer()
+        self.object_keys[obj_key] = keys
+        for key in keys:
+            self.groups.setdefault(key, {})[obj_key] = obj
+        self._changed()
+
+    def _remove(self, obj_key):
+        for key in self.object_keys.pop(obj_key, ()):
+            group = self.groups[key]
+            del group[obj_key]
+            if not group:
+                del self.groups[key]
+        self._changed()
+
+    # Re-file objects after changing them, without waiting for a depsgraph update.
+    # Objects the index does not hold belong to other scenes and are left out.
+    def refresh(self, objects):
+        if self.scene_key is None:
+            return
+        for obj in objects:
+            keys = self.keys_for(obj)
+            current = self.object_keys.get(obj.as_pointer())
+            if current is not None and current != keys:
+                self._remove(obj.as_pointer())
+                self._add(obj, keys)
+
+    # Apply a depsgraph update: file new objects and re-file objects whose keys changed.
+    # Deleted and unlinked objects are not reported by the depsgraph, so a change in the
+    # file's object count that the new objects do not explain, as after a delete and an
+    # add in one update, marks it for a rebuild on next use instead. Unlinking tags the
+    # collections, which marks the index for the count check in ensure().
+    def update(self, scene, depsgraph):
+        if self.scene_key != scene.as_pointer():
+            return
+        added = 0
+        if depsgraph.id_type_updated('OBJECT'):
+            for update in depsgraph.updates:
+                obj = update.id.original
+                if not isinstance(obj, bpy.types.Object):
+                    continue
+                obj_key = obj.as_pointer()
+                keys = self.keys_for(obj)
+                if obj_key not in self.object_keys:
+                    added += 1
+                elif self.object_keys[obj_key] == keys:
+                    continue
+                self._remove(obj_key)
+                self._add(obj, keys)
+
+        if depsgraph.id_type_updated('COLLECTION') or depsgraph.id_type_updated('SCENE'):
+            self.membership_changed = True
+        object_count = len(bpy.data.objects)
+        if object_count != self.data_object_count + added:
+            self.scene_key = None
+        self.data_object_count = object_count
+
+    # Objects filed under a key
+    def objects_with(self, key):
+        return list(self.groups.get(key, {}).values())
+
+# Every index the handlers below keep up to date. Each index adds itself when its module
+# is imported, so an index nothing has asked for yet costs the handlers nothing.
+scene_object_indexes = []
+
+# Handler that keeps the scene object indexes in step with the scene
+@bpy.app.handlers.persistent
+def update_scene_object_indexes(scene, depsgraph):
+    for index in scene_object_indexes:
+        index.update(scene, depsgraph)
+
+# Handler that drops the scene object indexes after undo, redo or loading a file
+@bpy.app.handlers.persistent
+def clear_scene_object_indexes(*args):
+    for index in scene_object_indexes:
+        index.clear()
+
+# Select or deselect objects, skipping any that are no longer in the view layer
+def set_objects_selected(objects, state):
+    objects = list(objects)
+    instrument_log.count("objects", len(objects))
+    for obj in objects:
+        try:
+            obj.select_set(state)
+        except (RuntimeError, ReferenceError):
+            pass
+
+# Deselect only what is selected instead of visiting every object in the scene
+def deselect_selected_objects(context):
+    for obj in context.selected_objects:
+        obj.select_set(False)
+
+classes = (
+    BatchScopeSettings,
+    InstrumentationSettings,
+    OBJECT_OT_ExportInstrumentationLogOperator,
+    OBJECT_OT_ClearInstrumentationLogOperator,
+)
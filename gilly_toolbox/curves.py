@@ -0,0 +1,167 @@
+import math
+
+import bpy
+
+from .core import TimeSlicedOperator, batch_objects, run_batch_steps, set_if_changed
+from .profiler import profile_object
+
+#--------
+# CURVES
+#--------
+# Set a curve's fill mode where the curve supports it
+def set_curve_fill_mode(curve, fill_mode):
+    try:
+        return set_if_changed(curve, "fill_mode", fill_mode)
+    except TypeError:
+        # 'BOTH' only exists for 2D curves and 'FULL' only for 3D ones
+        return False
+
+# Define the operator for changing curve fill modes
+class OBJECT_OT_ChangeCurveFillModeOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.change_curve_fill_mode"
+    bl_label = "Change Curve Fill Mode"
+    bl_description = "Change fill mode of the curves in the chosen scope"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    fill_mode: bpy.props.StringProperty(default="BOTH")  # Property to store fill mode
+
+    def steps(self, context):
+        fill_mode = self.fill_mode
+        changed, visited = yield from run_batch_steps(self.bl_label, batch_objects(context), {'CURVE'},
+                                                      lambda curve: set_curve_fill_mode(curve, fill_mode))
+        self.report({'INFO'}, "Changed the fill mode of {} of {} curves".format(changed, visited))
+    
+# Define the operator for extruding curves by a given value
+class OBJECT_OT_ExtrudeCurvesOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.extrude_curves"
+    bl_label = "Extrude Curves"
+    bl_description = "Extrude the curves in the chosen scope by the given value"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def steps(self, context):
+        extrude_value = context.scene.extrude_settings.extrude_value
+        changed, visited = yield from run_batch_steps(self.bl_label, batch_objects(context), {'CURVE'},
+                                                      lambda curve: set_if_changed(curve, "extrude", extrude_value))
+        self.report({'INFO'}, "Changed the extrusion of {} of {} curves".format(changed, visited))
+
+# Property group for extrude value
+class ExtrudeSettings(bpy.types.PropertyGroup):
+    extrude_value: bpy.props.FloatProperty(
+        name="Value",
+        description="Set the amount you would like to extrude the curves by",
+        default=0.0,
+        unit='LENGTH'  # Set the unit of measurement
+    )
+
+# Adaptive curve resolution. Every segment between two control points is split into
+# resolution_u pieces, so the resolution a curve needs follows from its longest and most
+# bent segments. Lengths and bends are estimated from the control polygon: its length
+# averaged with the chord for length, and the sum of angles between its edges, which
+# bounds how far the curve turns, for bend.
+CURVE_ADAPTIVE_ITEMS = [
+    ('LENGTH', "Segment Length", "Split segments into pieces no longer than the target length"),
+    ('ANGLE', "Angle", "Split segments so no piece turns more than the target angle"),
+    ('BOTH', "Both", "Meet both the segment length and the angle target"),
+]
+
+#Property group for curve resolution value
+class SetCurveResolutionSettings(bpy.types.PropertyGroup):
+    resolution_u: bpy.props.IntProperty(
+        name="Resolution U",
+        description="Set the resolution value for selected curves",
+        default=12,  # Adjust the default value as needed
+        min=1,       # Minimum resolution value
+        step=1        # Increment value (whole numbers)
+    )
+    use_adaptive: bpy.props.BoolProperty(
+        name="Adaptive",
+        description="Choose each curve's resolution from its length and bends instead of one value",
+        default=False,
+    )
+    adaptive_mode: bpy.props.EnumProperty(
+        name="Target",
+        description="What the adaptive resolution has to meet",
+        items=CURVE_ADAPTIVE_ITEMS,
+        default='BOTH',
+    )
+    segment_length: bpy.props.FloatProperty(
+        name="Segment Length",
+        description="Longest evaluated piece of a curve, in the curve's own units",
+        default=0.1,
+        min=1e-4,
+        subtype='DISTANCE',
+    )
+    max_angle: bpy.props.FloatProperty(
+        name="Max Angle",
+        description="Largest turn of one evaluated piece of a curve",
+        default=math.radians(10.0),
+        min=math.radians(0.1),
+        max=math.pi,
+        subtype='ANGLE',
+    )
+    min_resolution: bpy.props.IntProperty(
+        name="Min",
+        description="Lowest resolution the adaptive mode sets",
+        default=1,
+        min=1,
+        max=1024,
+    )
+    max_resolution: bpy.props.IntProperty(
+        name="Max",
+        description="Highest resolution the adaptive mode sets",
+        default=32,
+        min=1,
+        max=1024,
+    )
+
+# Define the operator for setting curve resolution U
+class OBJECT_OT_SetCurveResolutionOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.set_curve_resolution"
+    bl_label = "Set Curve Resolution"
+    bl_description = "Sets Resolution Preview U for the curves in the chosen scope"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def steps(self, context):
+        settings = context.scene.set_curve_resolution_settings
+        resolution_u = settings.resolution_u
+        changed, visited = yield from run_batch_steps(self.bl_label, batch_objects(context), {'CURVE'},
+                                                      lambda curve: set_if_changed(curve, "resolution_u", resolution_u))
+        self.report({'INFO'}, "Changed the resolution of {} of {} curves".format(changed, visited))
+
+# Total evaluated vertices of the objects, bevels and extrusions included
+def evaluated_vertex_count(context, objects):
+    depsgraph = context.evaluated_depsgraph_get()
+    return sum(profile_object(obj, depsgraph)["vertices"] for obj in objects)
+
+# Define the operator for setting curve resolution from each curve's length and bends
+class OBJECT_OT_SetAdaptiveCurveResolutionOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.set_adaptive_curve_resolution"
+    bl_label = "Set Adaptive Resolution"
+    bl_description = "Sets each curve's Resolution Preview U from its segment lengths and bends, within the caps"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def steps(self, context):
+        from .geometry import adaptive_curve_resolution
+        settings = context.scene.set_curve_resolution_settings
+        objects = [obj for obj in batch_objects(context) if obj.type == 'CURVE']
+        before = evaluated_vertex_count(context, objects)
+
+        def edit(curve):
+            resolution = adaptive_curve_resolution(
+                curve, settings.adaptive_mode, settings.segment_length, settings.max_angle,
+                settings.min_resolution, max(settings.min_resolution, settings.max_resolution))
+            return set_if_changed(curve, "resolution_u", resolution)
+
+        changed, visited = yield from run_batch_steps(self.bl_label, objects, {'CURVE'}, edit)
+        after = evaluated_vertex_count(context, objects)
+        self.report({'INFO'}, "Changed {} of {} curves, evaluated vertices {:,} -> {:,}".format(
+            changed, visited, before, after))
+
+classes = (
+    ExtrudeSettings,
+    SetCurveResolutionSettings,
+    OBJECT_OT_ChangeCurveFillModeOperator,
+    OBJECT_OT_ExtrudeCurvesOperator,
+    OBJECT_OT_SetCurveResolutionOperator,
+    OBJECT_OT_SetAdaptiveCurveResolutionOperator,
+)
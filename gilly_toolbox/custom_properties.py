@@ -0,0 +1,493 @@
+import csv
+import json
+import time
+
+import bpy
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from .core import (
+    SceneObjectIndex, TimeSlicedOperator, batch_objects, deselect_selected_objects,
+    instrument_log, record_change, scene_object_indexes, set_objects_selected,
+    unique_data_blocks
+)
+
+#-------------------
+# CUSTOM PROPERTIES
+#-------------------
+# Where a custom property lives: on the object itself or on its data block
+PROPERTY_TARGET_ITEMS = [
+    ('OBJECT', "Object", "Custom properties of the objects"),
+    ('DATA', "Data", "Custom properties of the objects' data blocks, shared by linked duplicates"),
+]
+PROPERTY_TARGETS = {item[0] for item in PROPERTY_TARGET_ITEMS}
+
+# Value types the custom property tools can write, and the setting holding each value
+PROPERTY_TYPE_ITEMS = [
+    ('STRING', "String", "Text value"),
+    ('INT', "Integer", "Whole number"),
+    ('FLOAT', "Float", "Decimal number"),
+    ('BOOL', "Boolean", "True or false"),
+    ('VECTOR', "Vector", "Three floats"),
+]
+PROPERTY_VALUE_SETTINGS = {
+    'STRING': "property_value",
+    'INT': "int_value",
+    'FLOAT': "float_value",
+    'BOOL': "bool_value",
+    'VECTOR': "vector_value",
+}
+
+# Type of a value as one of PROPERTY_TYPE_ITEMS, the types the Add tool writes, or None
+# for values that cannot be stored as they are, like null or mixed lists. Vectors are
+# lists of numbers of any length.
+def property_value_type(value):
+    if isinstance(value, bool):
+        return 'BOOL'
+    if isinstance(value, int):
+        return 'INT'
+    if isinstance(value, float):
+        return 'FLOAT'
+    if isinstance(value, str):
+        return 'STRING'
+    if (isinstance(value, list) and value
+            and all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value)):
+        return 'VECTOR'
+    return None
+
+# Whether a value read from a file can be stored as a custom property: a value of one of
+# the Add tool's types, or a group of them, as exported from property groups
+def is_storable_value(value):
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and is_storable_value(item) for key, item in value.items())
+    return property_value_type(value) is not None
+
+# Columns of the CSV files custom properties are imported from and exported to
+PROPERTY_CSV_COLUMNS = ["object", "target", "property", "value"]
+
+# Names of the custom properties of an ID, leaving out properties that add-ons register
+# through RNA and hidden ones starting with an underscore
+def custom_property_names(id_block):
+    rna_properties = id_block.bl_rna.properties
+    return [name for name in id_block.keys() if not name.startswith("_") and name not in rna_properties]
+
+# The ID holding an object's custom properties for a target, or None
+def property_owner(obj, target):
+    return obj if target == 'OBJECT' else obj.data
+
+# IDs whose custom properties the tools edit for the objects, each listed once. Linked
+# library data cannot be edited and is skipped.
+def property_owners(objects, target):
+    if target == 'DATA':
+        return unique_data_blocks(objects, None)
+    return [obj for obj in objects if obj.library is None]
+
+# A custom property value as plain Python data
+def plain_value(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "to_list"):
+        return value.to_list()
+    if isinstance(value, bpy.types.ID):
+        return None  # data-block pointers cannot be written to a file
+    return value
+
+# Set a custom property unless it already holds the same value of the same type
+def set_custom_property(owner, name, value):
+    current = plain_value(owner.get(name))
+    if type(current) is type(value) and current == value:
+        return False
+    record_custom_property(owner, name)
+    owner[name] = value
+    instrument_log.count("rna_writes")
+    return True
+
+# Record how to restore a custom property before changing or deleting it
+def record_custom_property(owner, name):
+    if name not in owner:
+        record_change(lambda: owner.pop(name, None))
+        return
+    old = owner[name]
+    if not isinstance(old, bpy.types.ID):
+        old = plain_value(old)
+    record_change(lambda: owner.__setitem__(name, old))
+
+# Whether a stored custom property value equals the wanted one, with a tolerance for floats
+def values_match(stored, wanted, tolerance=1e-6):
+    stored = plain_value(stored)
+    if isinstance(wanted, bool) or isinstance(stored, bool):
+        return isinstance(stored, (bool, int)) and bool(stored) == wanted and stored in (0, 1)
+    if isinstance(wanted, (int, float)) and not isinstance(wanted, bool):
+        return isinstance(stored, (int, float)) and abs(stored - wanted) <= tolerance
+    if isinstance(wanted, list):
+        return (isinstance(stored, list) and len(stored) == len(wanted)
+                and all(values_match(a, b, tolerance) for a, b in zip(stored, wanted)))
+    return stored == wanted
+
+# Call edit(owner) for the ID holding the custom properties of every object, yielding
+# progress and timing the edits as the label's phase, like run_batch_steps. Returns
+# (changed, visited).
+def run_property_batch_steps(label, objects, target, edit):
+    owners = property_owners(objects, target)
+    changed = 0
+    counter = "data_blocks" if target == 'DATA' else "objects"
+    for i, owner in enumerate(owners):
+        with instrument_log.phase(label):
+            if edit(owner):
+                changed += 1
+        instrument_log.count(counter)
+        yield i + 1, len(owners)
+    return changed, len(owners)
+
+# Index of which scene objects have which custom properties. Objects are filed under
+# (target, property name) and under ('USES', data pointer), so an update of a data block
+# can re-file the objects using it. The property names of every data block are kept too,
+# so the users are only re-filed when those names changed, not on every edit of a mesh
+# shared by thousands of linked duplicates.
+class CustomPropertyIndex(SceneObjectIndex):
+    def clear(self):
+        super().clear()
+        self.data_names = {}    # data pointer -> custom property names of the data block
+
+    def keys_for(self, obj):
+        keys = tuple(('OBJECT', name) for name in custom_property_names(obj))
+        if obj.data is not None:
+            names = tuple(custom_property_names(obj.data))
+            self.data_names[obj.data.as_pointer()] = names
+            keys += (('USES', obj.data.as_pointer()),)
+            keys += tuple(('DATA', name) for name in names)
+        return keys
+
+    # Editing a data block's custom properties only reports the data block as updated
+    def update(self, scene, depsgraph):
+        super().update(scene, depsgraph)
+        if self.scene_key is None:
+            return
+        for update in depsgraph.updates:
+            data = update.id.original
+            if isinstance(data, bpy.types.Object):
+                continue
+            data_key = data.as_pointer()
+            names = tuple(custom_property_names(data))
+            if self.data_names.get(data_key, names) != names:
+                self.data_names[data_key] = names
+                self.refresh(self.objects_with(('USES', data_key)))
+
+custom_property_index = CustomPropertyIndex()
+scene_object_indexes.append(custom_property_index)
+
+# Value settings shared by the custom property tools that need a typed value
+class TypedValueSettings:
+    property_type: bpy.props.EnumProperty(
+        name="Type",
+        description="Type of the custom property value",
+        items=PROPERTY_TYPE_ITEMS,
+        default='STRING',
+    )
+    property_value: bpy.props.StringProperty(
+        name="Value",
+        default="",
+        description="Value of the custom property",
+    )
+    int_value: bpy.props.IntProperty(name="Value", description="Value of the custom property")
+    float_value: bpy.props.FloatProperty(name="Value", description="Value of the custom property")
+    bool_value: bpy.props.BoolProperty(name="Value", description="Value of the custom property")
+    vector_value: bpy.props.FloatVectorProperty(name="Value", description="Value of the custom property", size=3)
+
+    # The chosen value as the Python type stored in the custom property
+    def typed_value(self):
+        value = getattr(self, PROPERTY_VALUE_SETTINGS[self.property_type])
+        return list(value) if self.property_type == 'VECTOR' else value
+
+    def draw_value(self, layout):
+        layout.prop(self, "property_type")
+        layout.prop(self, PROPERTY_VALUE_SETTINGS[self.property_type], text="Value")
+
+# Define the operator for removing custom properties
+class OBJECT_OT_RemoveCustomPropertyOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.remove_custom_property"
+    bl_label = "Remove Custom Property"
+    bl_description = "Removes custom properties from the objects or data the tools work on"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def steps(self, context):
+        self._objects = batch_objects(context)
+        settings = context.scene.remove_custom_property_settings
+        property_name = settings.property_name
+
+        def edit(owner):
+            if not property_name:
+                # Remove all custom properties if property name is blank
+                names = custom_property_names(owner)
+            else:
+                names = [property_name] if property_name in owner else []
+            for name in names:
+                record_custom_property(owner, name)
+                del owner[name]
+            instrument_log.count("rna_writes", len(names))
+            return bool(names)
+
+        changed, visited = yield from run_property_batch_steps(self.bl_label, self._objects, settings.target, edit)
+        self.report({'INFO'}, "Removed properties from {} of {}".format(changed, visited))
+
+    def finish(self, context):
+        custom_property_index.refresh(self._objects)
+
+# Define the operator for adding custom properties
+class OBJECT_OT_AddCustomPropertyOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.add_custom_property"
+    bl_label = "Add Custom Property"
+    bl_description = "Adds a typed custom property to the objects or data the tools work on"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def steps(self, context):
+        self._objects = batch_objects(context)
+        settings = context.scene.add_custom_property_settings
+        property_name = settings.property_name
+        if not property_name:
+            self.report({'WARNING'}, "Enter a property name")
+            return {'CANCELLED'}
+        value = settings.typed_value()
+
+        changed, visited = yield from run_property_batch_steps(
+            self.bl_label, self._objects, settings.target,
+            lambda owner: set_custom_property(owner, property_name, value))
+        self.report({'INFO'}, "Set '{}' on {} of {}".format(property_name, changed, visited))
+
+    def finish(self, context):
+        custom_property_index.refresh(self._objects)
+
+# Define the operator for selecting the objects that have a custom property
+class OBJECT_OT_SelectByCustomPropertyOperator(bpy.types.Operator):
+    bl_idname = "object.select_by_custom_property"
+    bl_label = "Select by Custom Property"
+    bl_description = "Selects the objects that have the custom property, optionally with the given value"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    extend: bpy.props.BoolProperty(name="Extend", description="Add to the current selection", default=False)
+
+    def execute(self, context):
+        settings = context.scene.select_custom_property_settings
+        index = custom_property_index.ensure(context.scene)
+        objects = index.objects_with((settings.target, settings.property_name))
+        if settings.match_value:
+            value = settings.typed_value()
+            name = settings.property_name
+            objects = [obj for obj in objects
+                       if values_match(property_owner(obj, settings.target).get(name), value)]
+
+        if not self.extend:
+            deselect_selected_objects(context)
+        set_objects_selected(objects, True)
+        if objects:
+            context.view_layer.objects.active = objects[0]
+        self.report({'INFO'}, "Selected {} objects".format(len(objects)))
+        return {'FINISHED'}
+
+# Custom properties of the objects as {object name: {target: {name: value}}}, leaving
+# out properties without a value a file can hold
+def collect_custom_properties(objects, property_name=""):
+    result = {}
+    for obj in objects:
+        entry = {}
+        for target, _, _ in PROPERTY_TARGET_ITEMS:
+            owner = property_owner(obj, target)
+            if owner is None:
+                continue
+            names = [property_name] if property_name else custom_property_names(owner)
+            values = {}
+            for name in names:
+                value = plain_value(owner.get(name))
+                if value is not None:
+                    values[name] = value
+            if values:
+                entry[target] = values
+        if entry:
+            result[obj.name] = entry
+    return result
+
+def write_custom_properties(filepath, properties):
+    if filepath.lower().endswith(".csv"):
+        with open(filepath, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(PROPERTY_CSV_COLUMNS)
+            for obj_name, entry in properties.items():
+                for target, values in entry.items():
+                    for name, value in values.items():
+                        writer.writerow([obj_name, target, name, json.dumps(value)])
+    else:
+        with open(filepath, "w", encoding="utf-8") as handle:
+            json.dump({"objects": properties}, handle)
+
+# Check that properties read from a file are laid out like collect_custom_properties
+# returns them, {object name: {target: {name: value}}}. Raises ValueError if not.
+def validate_custom_properties(properties):
+    if not isinstance(properties, dict):
+        raise ValueError("'objects' holds a {}, not a mapping of object names".format(type(properties).__name__))
+    for obj_name, entry in properties.items():
+        if not isinstance(entry, dict) or not all(isinstance(values, dict) for values in entry.values()):
+            raise ValueError("Object '{}' does not map targets to properties".format(obj_name))
+    return properties
+
+# Read custom properties from a JSON or CSV file. Raises ValueError for files that do
+# not hold them.
+def read_custom_properties(filepath):
+    if not filepath.lower().endswith(".csv"):
+        with open(filepath, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if not isinstance(data, dict) or "objects" not in data:
+            raise ValueError("No 'objects' entry at the top of the file")
+        return validate_custom_properties(data["objects"])
+    properties = {}
+    with open(filepath, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        missing = [column for column in PROPERTY_CSV_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError("Missing columns {}".format(", ".join(missing)))
+        for row in reader:
+            target = properties.setdefault(row["object"], {}).setdefault(row["target"], {})
+            target[row["property"]] = json.loads(row["value"])
+    return properties
+
+# Set the custom properties read from a file on the objects of the same name. Data
+# blocks shared by several listed objects are written once per object. Values of a type
+# that cannot be stored are skipped, so one bad entry does not stop the import
+# halfway. Returns (values changed, objects touched, names not found, skipped values as
+# "object.property").
+def apply_custom_properties(properties):
+    objects_by_name = {obj.name: obj for obj in bpy.data.objects if obj.library is None}
+    changed = 0
+    touched = []
+    missing = []
+    skipped = []
+    for obj_name, entry in properties.items():
+        obj = objects_by_name.get(obj_name)
+        if obj is None:
+            missing.append(obj_name)
+            continue
+        for target, values in entry.items():
+            owner = property_owner(obj, target) if target in PROPERTY_TARGETS else None
+            if owner is None or owner.library is not None:
+                continue
+            for name, value in values.items():
+                if not is_storable_value(value):
+                    skipped.append("{}.{}".format(obj_name, name))
+                    continue
+                changed += set_custom_property(owner, name, value)
+        touched.append(obj)
+    return changed, touched, missing, skipped
+
+# Define the operator for exporting custom properties to a JSON or CSV file
+class OBJECT_OT_ExportCustomPropertiesOperator(bpy.types.Operator, ExportHelper):
+    bl_idname = "object.export_custom_properties"
+    bl_label = "Export Custom Properties"
+    bl_description = "Writes the custom properties of the objects the tools work on to a JSON or CSV file"
+
+    filename_ext = ".json"
+    check_extension = None  # both .json and .csv are accepted
+    filter_glob: bpy.props.StringProperty(default="*.json;*.csv", options={'HIDDEN'})
+    property_name: bpy.props.StringProperty(
+        name="Property Name",
+        description="Only export this property (leave blank to export all custom properties)",
+    )
+
+    def execute(self, context):
+        start = time.perf_counter()
+        with instrument_log.phase("collect"):
+            properties = collect_custom_properties(batch_objects(context), self.property_name)
+        with instrument_log.phase("write"):
+            write_custom_properties(self.filepath, properties)
+        self.report({'INFO'}, "Exported properties of {} objects in {:.2f}s".format(
+            len(properties), time.perf_counter() - start))
+        return {'FINISHED'}
+
+# Skipped values an import names in its report, the rest are only counted
+IMPORT_REPORT_NAMES = 5
+
+# Define the operator for importing custom properties from a JSON or CSV file
+class OBJECT_OT_ImportCustomPropertiesOperator(bpy.types.Operator, ImportHelper):
+    bl_idname = "object.import_custom_properties"
+    bl_label = "Import Custom Properties"
+    bl_description = "Sets custom properties read from a JSON or CSV file on the objects with matching names"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filter_glob: bpy.props.StringProperty(default="*.json;*.csv", options={'HIDDEN'})
+
+    def execute(self, context):
+        start = time.perf_counter()
+        try:
+            with instrument_log.phase("read"):
+                properties = read_custom_properties(self.filepath)
+        except (OSError, ValueError, KeyError) as error:
+            self.report({'ERROR'}, "Could not read {}: {}".format(self.filepath, error))
+            return {'CANCELLED'}
+        with instrument_log.phase("apply"):
+            changed, touched, missing, skipped = apply_custom_properties(properties)
+            custom_property_index.refresh(touched)
+        if skipped:
+            self.report({'WARNING'}, "Skipped values that cannot be stored: {}{}".format(
+                ", ".join(skipped[:IMPORT_REPORT_NAMES]), ", ..." if len(skipped) > IMPORT_REPORT_NAMES else ""))
+        if missing or skipped:
+            self.report({'WARNING'}, "Changed {} values, {} objects not found, {} invalid values skipped".format(
+                changed, len(missing), len(skipped)))
+        else:
+            self.report({'INFO'}, "Changed {} values on {} objects in {:.2f}s".format(
+                changed, len(touched), time.perf_counter() - start))
+        return {'FINISHED'}
+
+# Property group to store the property name and value for Remove Custom Property
+class RemoveCustomPropertySettings(bpy.types.PropertyGroup):
+    property_name: bpy.props.StringProperty(
+        name="Property Name",
+        default="",
+        description="Name of the custom property to remove (leave blank to remove all custom properties)",
+    )
+    target: bpy.props.EnumProperty(
+        name="Target",
+        description="Remove the property from the objects or from their data",
+        items=PROPERTY_TARGET_ITEMS,
+        default='OBJECT',
+    )
+
+# Property group to store the property name and value for Add Custom Property
+class AddCustomPropertySettings(TypedValueSettings, bpy.types.PropertyGroup):
+    property_name: bpy.props.StringProperty(
+        name="Property Name",
+        default="",
+        description="Name of the custom property to add",
+    )
+    target: bpy.props.EnumProperty(
+        name="Target",
+        description="Add the property to the objects or to their data",
+        items=PROPERTY_TARGET_ITEMS,
+        default='OBJECT',
+    )
+
+# Property group for selecting objects by custom property
+class SelectCustomPropertySettings(TypedValueSettings, bpy.types.PropertyGroup):
+    property_name: bpy.props.StringProperty(
+        name="Property Name",
+        default="",
+        description="Name of the custom property to look for",
+    )
+    target: bpy.props.EnumProperty(
+        name="Target",
+        description="Look for the property on the objects or on their data",
+        items=PROPERTY_TARGET_ITEMS,
+        default='OBJECT',
+    )
+    match_value: bpy.props.BoolProperty(
+        name="Match Value",
+        description="Only select objects whose property has the given value",
+        default=False,
+    )
+
+classes = (
+    RemoveCustomPropertySettings,
+    AddCustomPropertySettings,
+    SelectCustomPropertySettings,
+    OBJECT_OT_RemoveCustomPropertyOperator,
+    OBJECT_OT_AddCustomPropertyOperator,
+    OBJECT_OT_SelectByCustomPropertyOperator,
+    OBJECT_OT_ExportCustomPropertiesOperator,
+    OBJECT_OT_ImportCustomPropertiesOperator,
+)
@@ -0,0 +1,553 @@
+import hashlib
+
+import bpy
+import numpy as np
+from mathutils import Matrix
+
+from .core import run_batch_steps, run_steps
+from .profiler import estimate_mesh_bytes
+
+#---------------------
+# MESH DEDUPLICATION
+#---------------------
+# Read a mesh collection property into a flat NumPy array of the given type
+def read_array(collection, prop_name, components, dtype):
+    array = np.empty(len(collection) * components, dtype=dtype)
+    collection.foreach_get(prop_name, array)
+    return array
+
+# Snap floats to a grid of the given size so nearly equal values hash the same
+def quantize(array, tolerance):
+    if tolerance > 0.0:
+        return np.round(array / tolerance).astype(np.int64)
+    return array + np.float32(0.0)  # turns -0.0 into 0.0
+
+# foreach_get property, components and array type of each generic attribute type
+ATTRIBUTE_ARRAYS = {
+    'FLOAT': ("value", 1, np.float32),
+    'INT': ("value", 1, np.int32),
+    'INT8': ("value", 1, np.int32),
+    'BOOLEAN': ("value", 1, np.bool_),
+    'FLOAT2': ("vector", 2, np.float32),
+    'INT32_2D': ("value", 2, np.int32),
+    'FLOAT_VECTOR': ("vector", 3, np.float32),
+    'FLOAT_COLOR': ("color", 4, np.float32),
+    'BYTE_COLOR': ("color", 4, np.float32),
+    'QUATERNION': ("value", 4, np.float32),
+    'FLOAT4X4': ("value", 16, np.float32),
+}
+
+# Attributes that only hold editor state, like selection, and do not change the look
+def is_state_attribute(name):
+    return name.startswith(".select") or name.startswith(".hide")
+
+# Hash of everything that makes two meshes look the same: vertex positions, topology,
+# material indices and slots, UV maps, smooth shading, seams, sharp edges, auto smooth
+# and every generic attribute, such as colors and creases
+def mesh_fingerprint(mesh, tolerance=0.0):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array([len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons)],
+                           dtype=np.int64).tobytes())
+    digest.update(quantize(read_array(mesh.vertices, "co", 3, np.float32), tolerance).tobytes())
+    digest.update(read_array(mesh.edges, "vertices", 2, np.int32).tobytes())
+    digest.update(read_array(mesh.loops, "vertex_index", 1, np.int32).tobytes())
+    digest.update(read_array(mesh.polygons, "loop_total", 1, np.int32).tobytes())
+    digest.update(read_array(mesh.polygons, "material_index", 1, np.int32).tobytes())
+    digest.update("\0".join(mat.name if mat else "" for mat in mesh.materials).encode())
+    for uv_layer in mesh.uv_layers:
+        digest.update(uv_layer.name.encode())
+        digest.update(quantize(read_array(uv_layer.data, "uv", 2, np.float32), tolerance).tobytes())
+    digest.update(read_array(mesh.polygons, "use_smooth", 1, np.bool_).tobytes())
+    digest.update(read_array(mesh.edges, "use_seam", 1, np.bool_).tobytes())
+    digest.update(read_array(mesh.edges, "use_edge_sharp", 1, np.bool_).tobytes())
+    # Before Blender 4.0 creases and bevel weights are edge and vertex properties, later
+    # they are the generic attributes hashed below
+    for elements, element_type, prop_name in ((mesh.edges, bpy.types.MeshEdge, "crease"),
+                                              (mesh.edges, bpy.types.MeshEdge, "bevel_weight"),
+                                              (mesh.vertices, bpy.types.MeshVertex, "bevel_weight")):
+        if prop_name in element_type.bl_rna.properties:
+            digest.update(quantize(read_array(elements, prop_name, 1, np.float32), tolerance).tobytes())
+    # Auto smooth is a mesh setting before Blender 4.1
+    if hasattr(mesh, "use_auto_smooth"):
+        digest.update(repr((mesh.use_auto_smooth, round(mesh.auto_smooth_angle, 6))).encode())
+    for attribute in sorted(mesh.attributes, key=lambda attribute: attribute.name):
+        if is_state_attribute(attribute.name):
+            continue
+        prop_name, components, dtype = ATTRIBUTE_ARRAYS[attribute.data_type]
+        digest.update("{}\0{}\0{}".format(attribute.name, attribute.domain, attribute.data_type).encode())
+        array = read_array(attribute.data, prop_name, components, dtype)
+        digest.update((quantize(array, tolerance) if dtype is np.float32 else array).tobytes())
+    return digest.hexdigest()
+
+# Meshes that can safely share data with identical ones. Shape keys, vertex groups,
+# custom split normals and string attributes store per-mesh data the fingerprint does
+# not cover, so those meshes are left alone.
+def can_deduplicate(mesh, users):
+    if mesh.shape_keys is not None or mesh.library is not None or mesh.has_custom_normals:
+        return False
+    if any(attribute.data_type not in ATTRIBUTE_ARRAYS for attribute in mesh.attributes
+           if not is_state_attribute(attribute.name)):
+        return False
+    return not any(obj.vertex_groups for obj in users)
+
+# Point every user of a duplicate mesh at one shared mesh and delete the orphans.
+# Returns (meshes removed, bytes freed, polygons freed).
+def deduplicate_meshes(objects, tolerance=0.0):
+    meshes = {}
+    for obj in objects:
+        if obj.type == 'MESH':
+            meshes[obj.data.as_pointer()] = obj.data
+
+    # One pass over the file finds every user, so no mesh is left half relinked
+    users = {key: [] for key in meshes}
+    for obj in bpy.data.objects:
+        if obj.type == 'MESH':
+            key = obj.data.as_pointer()
+            if key in users:
+                users[key].append(obj)
+
+    # Only meshes with the same element counts can match, so only those get hashed
+    buckets = {}
+    for key, mesh in meshes.items():
+        if can_deduplicate(mesh, users[key]):
+            counts = (len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons))
+            buckets.setdefault(counts, []).append(key)
+
+    removed = []
+    for keys in buckets.values():
+        if len(keys) < 2:
+            continue
+        groups = {}
+        for key in keys:
+            groups.setdefault(mesh_fingerprint(meshes[key], tolerance), []).append(key)
+        for group in groups.values():
+            # Keep the mesh with the most users so the fewest objects change
+            group.sort(key=lambda key: len(users[key]), reverse=True)
+            shared = meshes[group[0]]
+            for key in group[1:]:
+                for obj in users[key]:
+                    obj.data = shared
+                removed.append(meshes[key])
+
+    # Meshes still used elsewhere, like by a fake user, stay, so only orphans count
+    orphans = [mesh for mesh in removed if mesh.users == 0]
+    bytes_freed = sum(estimate_mesh_bytes(mesh) for mesh in orphans)
+    polygons_freed = sum(len(mesh.polygons) for mesh in orphans)
+    if orphans:
+        bpy.data.batch_remove(orphans)
+    return len(orphans), bytes_freed, polygons_freed
+
+#------------------------------
+# LINKED DUPLICATES TO INSTANCES
+#------------------------------
+# A group of linked duplicates becomes one mesh object with a point per duplicate. The
+# points carry the transforms as "rotation" and "scale" attributes and a Geometry Nodes
+# modifier instances a hidden prototype object on them. Realizing turns the points back
+# into objects.
+INSTANCE_SOURCES_NAME = "Instance Sources"
+
+# Hidden collection that holds the prototype objects instancers point at
+def instance_sources_collection(scene):
+    collection = bpy.data.collections.get(INSTANCE_SOURCES_NAME)
+    if collection is None:
+        collection = bpy.data.collections.new(INSTANCE_SOURCES_NAME)
+        collection.hide_viewport = True
+        collection.hide_render = True
+    if collection.name not in scene.collection.children:
+        scene.collection.children.link(collection)
+    return collection
+
+# Build a Geometry Nodes group that instances obj on every point, using the point's
+# rotation and scale attributes
+def build_instancer_node_group(name, obj):
+    tree = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+    new_group_socket(tree, "Geometry", 'INPUT', 'NodeSocketGeometry')
+    attribute_sockets = {
+        "rotation": new_group_socket(tree, "Rotation", 'INPUT', 'NodeSocketVector'),
+        "scale": new_group_socket(tree, "Scale", 'INPUT', 'NodeSocketVector'),
+    }
+    new_group_socket(tree, "Geometry", 'OUTPUT', 'NodeSocketGeometry')
+
+    nodes, links = tree.nodes, tree.links
+    group_in = nodes.new("NodeGroupInput")
+    group_in.location = (-400, 0)
+    group_out = nodes.new("NodeGroupOutput")
+    group_out.location = (300, 0)
+    object_info = nodes.new("GeometryNodeObjectInfo")
+    object_info.location = (-400, -250)
+    object_info.inputs["Object"].default_value = obj
+
+    instance = nodes.new("GeometryNodeInstanceOnPoints")
+    links.new(group_in.outputs["Geometry"], instance.inputs["Points"])
+    links.new(object_info.outputs["Geometry"], instance.inputs["Instance"])
+    links.new(group_in.outputs["Rotation"], instance.inputs["Rotation"])
+    links.new(group_in.outputs["Scale"], instance.inputs["Scale"])
+    links.new(instance.outputs["Instances"], group_out.inputs[0])
+    return tree, attribute_sockets
+
+# Location, XYZ Euler rotation and scale of every object's world matrix as arrays
+def decompose_world_matrices(objects):
+    count = len(objects)
+    locations = np.empty((count, 3), dtype=np.float32)
+    rotations = np.empty((count, 4), dtype=np.float32)
+    scales = np.empty((count, 3), dtype=np.float32)
+    for i, obj in enumerate(objects):
+        locations[i], rotations[i], scales[i] = obj.matrix_world.decompose()
+    return locations, quaternions_to_euler(rotations), scales
+
+# Objects of a group that can be replaced by instances: not animated or driven, without
+# constraints, whose result the instances would freeze, not parents, since their
+# children would lose their parent, and without a parent, which the instances would
+# not follow
+def instanceable_objects(objects, parents):
+    return [obj for obj in objects
+            if obj.animation_data is None and not obj.constraints and obj.parent is None
+            and obj.as_pointer() not in parents]
+
+# Settings of a modifier as comparable values. ID pointers compare by identity, and
+# inputs of Geometry Nodes modifiers, which are ID properties, by value.
+def modifier_signature(modifier):
+    values = [modifier.type]
+    for prop in modifier.bl_rna.properties:
+        if prop.identifier in {"rna_type", "name"} or prop.type == 'COLLECTION':
+            continue
+        value = getattr(modifier, prop.identifier)
+        if prop.type == 'POINTER':
+            value = value.as_pointer() if value is not None else 0
+        elif getattr(prop, "is_array", False):
+            value = tuple(value)
+        values.append(value)
+    values.extend((key, repr(modifier[key])) for key in modifier.keys())
+    return tuple(values)
+
+# Everything besides the data that makes an object look different from its linked
+# duplicates: its modifier stack and the materials linked to the object itself
+def object_look_signature(obj):
+    modifiers = tuple(modifier_signature(modifier) for modifier in obj.modifiers)
+    materials = tuple(slot.material.as_pointer() if slot.link == 'OBJECT' and slot.material else 0
+                      for slot in obj.material_slots)
+    return modifiers, materials
+
+# Collections holding each of the objects, as {object pointer: {collection pointer:
+# collection}}, from one pass over the file's collections and the scenes' own ones.
+# Object.users_collection makes that pass again for every object it is asked about.
+def objects_users_collections(objects):
+    wanted = {obj.as_pointer() for obj in objects}
+    users = {}
+    for collection in list(bpy.data.collections) + [scene.collection for scene in bpy.data.scenes]:
+        for obj in collection.objects:
+            if obj.as_pointer() in wanted:
+                users.setdefault(obj.as_pointer(), {})[collection.as_pointer()] = collection
+    return users
+
+# Add a single instancer object standing in for a group of objects sharing one data
+# block and look. users is what objects_users_collections returns for them. The
+# objects are left for the caller to remove.
+def convert_group_to_instancer(scene, objects, users):
+    source = objects[0]
+    prototype = source.copy()
+    prototype.name = source.data.name + ".prototype"
+    prototype.parent = None
+    prototype.matrix_world = Matrix.Identity(4)
+    instance_sources_collection(scene).objects.link(prototype)
+
+    locations, rotations, scales = decompose_world_matrices(objects)
+    mesh = bpy.data.meshes.new(source.data.name + ".instances")
+    mesh.vertices.add(len(objects))
+    mesh.vertices.foreach_set("co", locations.reshape(-1))
+    mesh.attributes.new("rotation", 'FLOAT_VECTOR', 'POINT').data.foreach_set("vector", rotations.reshape(-1))
+    mesh.attributes.new("scale", 'FLOAT_VECTOR', 'POINT').data.foreach_set("vector", scales.reshape(-1))
+    mesh.update()
+
+    instancer = bpy.data.objects.new(source.data.name + ".instances", mesh)
+    instancer["instance_source"] = prototype
+    instancer["instance_names"] = [obj.name for obj in objects]
+    # Every collection a member was in, so none of them loses its objects
+    collections = {}
+    for obj in objects:
+        collections.update(users.get(obj.as_pointer(), {}))
+    for collection in collections.values():
+        collection.objects.link(instancer)
+
+    tree, attribute_sockets = build_instancer_node_group(instancer.name, prototype)
+    add_nodes_modifier(instancer, "Instances", tree, attribute_sockets)
+    return instancer
+
+# Turn every linked duplicate group of at least min_count objects into an instancer.
+# Duplicates are grouped by data, modifiers and object materials, since every instance
+# is a copy of the group's first object.
+def convert_duplicates_to_instancers(scene, objects, min_count=2):
+    parents = {obj.parent.as_pointer() for obj in scene.objects if obj.parent is not None}
+    groups = {}
+    for obj in instanceable_objects(objects, parents):
+        if obj.data is not None and obj.type in {'MESH', 'CURVE', 'SURFACE', 'META', 'FONT'}:
+            groups.setdefault((obj.data.as_pointer(), object_look_signature(obj)), []).append(obj)
+
+    groups = [group for group in groups.values() if len(group) >= min_count]
+    users = objects_users_collections([obj for group in groups for obj in group])
+    instancers = [convert_group_to_instancer(scene, group, users) for group in groups]
+    # One removal for all groups, every batch_remove call walks the whole file
+    bpy.data.batch_remove([obj for group in groups for obj in group])
+    return instancers
+
+# Recreate the objects an instancer replaced and remove the instancer. Returns None,
+# changing nothing, when the prototype object was deleted.
+def realize_instancer(instancer):
+    prototype = instancer.get("instance_source")
+    if prototype is None:
+        return None
+    mesh = instancer.data
+    count = len(mesh.vertices)
+    locations = read_array(mesh.vertices, "co", 3, np.float32).reshape(count, 3)
+    rotations = read_array(mesh.attributes["rotation"].data, "vector", 3, np.float32).reshape(count, 3)
+    scales = read_array(mesh.attributes["scale"].data, "vector", 3, np.float32).reshape(count, 3)
+    names = list(instancer.get("instance_names", []))
+
+    collections = instancer.users_collection
+    objects = []
+    for i in range(count):
+        obj = prototype.copy()
+        obj.name = names[i] if i < len(names) else prototype.name
+        obj.rotation_mode = 'XYZ'
+        obj.location = locations[i]
+        obj.rotation_euler = rotations[i]
+        obj.scale = scales[i]
+        for collection in collections:
+            collection.objects.link(obj)
+        objects.append(obj)
+
+    node_groups = [modifier.node_group for modifier in instancer.modifiers
+                   if modifier.type == 'NODES' and modifier.node_group is not None]
+    bpy.data.batch_remove([instancer, mesh] + node_groups)
+    if prototype.users <= 1:  # only the instance sources collection is left
+        bpy.data.objects.remove(prototype)
+    return objects
+
+# Convert (..., 4) w, x, y, z quaternions to XYZ Euler angles
+def quaternions_to_euler(quats):
+    w, x, y, z = (quats[..., i] for i in range(4))
+    euler = np.empty(quats.shape[:-1] + (3,), dtype=np.float32)
+    euler[..., 0] = np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    euler[..., 1] = np.arcsin(np.clip(2 * (w * y - z * x), -1, 1))
+    euler[..., 2] = np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return euler
+
+# Add a socket to a node group interface (Blender 4.0 replaced tree.inputs/tree.outputs)
+def new_group_socket(tree, name, in_out, socket_type):
+    if hasattr(tree, "interface"):
+        return tree.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    sockets = tree.inputs if in_out == 'INPUT' else tree.outputs
+    return sockets.new(socket_type, name)
+
+# Add a math node to a node tree, linking sockets and setting plain values as defaults
+def add_math_node(tree, operation, *values, location=(0, 0)):
+    node = tree.nodes.new("ShaderNodeMath")
+    node.operation = operation
+    node.location = location
+    for socket, value in zip(node.inputs, values):
+        if isinstance(value, bpy.types.NodeSocket):
+            tree.links.new(value, socket)
+        else:
+            socket.default_value = value
+    return node.outputs[0]
+
+# Add a node reading a field of geometry at the given point indices, Sample Index or
+# Transfer Attribute before Blender 3.4, and return its output. Both nodes have a socket
+# per data type, only the one of the chosen type is enabled.
+def add_sample_index_node(tree, data_type, geometry, value, index, location=(0, 0)):
+    if bpy.app.version >= (3, 4, 0):
+        node = tree.nodes.new("GeometryNodeSampleIndex")
+        geometry_name, value_name = "Geometry", "Value"
+    else:
+        node = tree.nodes.new("GeometryNodeAttributeTransfer")
+        node.mapping = 'INDEX'
+        geometry_name, value_name = "Source", "Attribute"
+    node.data_type = data_type
+    node.domain = 'POINT'
+    node.location = location
+
+    def enabled(sockets, name):
+        return next(socket for socket in sockets if socket.name == name and socket.enabled)
+
+    tree.links.new(geometry, enabled(node.inputs, geometry_name))
+    tree.links.new(value, enabled(node.inputs, value_name))
+    tree.links.new(index, enabled(node.inputs, "Index"))
+    return enabled(node.outputs, value_name)
+
+# Add a Geometry Nodes modifier running tree, feeding the given group inputs from the
+# named attributes of the object's geometry
+def add_nodes_modifier(obj, name, tree, attribute_sockets):
+    modifier = obj.modifiers.new(name, 'NODES')
+    modifier.node_group = tree
+    for attribute_name, socket in attribute_sockets.items():
+        modifier[socket.identifier + "_use_attribute"] = True
+        modifier[socket.identifier + "_attribute_name"] = attribute_name
+    return modifier
+
+# Names of the UV maps a node tree reads by name, following node groups. An empty name
+# means the node reads the render UV map.
+def node_tree_uv_references(tree, seen=None):
+    references = set()
+    if seen is None:
+        seen = set()
+    if tree is None or tree.as_pointer() in seen:
+        return references
+    seen.add(tree.as_pointer())
+    for node in tree.nodes:
+        if node.bl_idname in {'ShaderNodeUVMap', 'ShaderNodeNormalMap'}:
+            references.add(node.uv_map)
+        elif node.bl_idname == 'ShaderNodeTangent' and node.direction_type == 'UV_MAP':
+            references.add(node.uv_map)
+        elif node.bl_idname == 'ShaderNodeAttribute':
+            references.add(node.attribute_name)
+        elif node.bl_idname == 'ShaderNodeGroup':
+            references |= node_tree_uv_references(node.node_tree, seen)
+    return references
+
+# Decide which UV maps of a mesh to drop: byte-identical copies of another map, maps
+# where every UV sits on the same point, and optionally maps no material node reads.
+# The render UV map and maps read by name are always kept. Returns {name: reason}.
+def audit_uv_layers(mesh, references, duplicates=True, degenerate=True, unreferenced=False):
+    layers = list(mesh.uv_layers)
+    arrays = [read_array(layer.data, "uv", 2, np.float32) for layer in layers]
+    protected = [layer.active_render or layer.name in references for layer in layers]
+    drop = {}
+
+    if duplicates:
+        # Visit kept maps first, so it is always the unprotected copy that goes
+        first_seen = {}
+        for i in sorted(range(len(layers)), key=lambda i: not protected[i]):
+            digest = hashlib.blake2b(arrays[i].tobytes(), digest_size=16).digest()
+            original = first_seen.setdefault(digest, i)
+            if original != i and not protected[i] and np.array_equal(arrays[original], arrays[i]):
+                drop[layers[i].name] = "copy of " + layers[original].name
+
+    for i, layer in enumerate(layers):
+        if protected[i] or layer.name in drop:
+            continue
+        uvs = arrays[i].reshape(-1, 2)
+        if degenerate and (len(uvs) == 0 or (uvs == uvs[0]).all()):
+            drop[layer.name] = "collapsed to one point"
+        elif unreferenced:
+            drop[layer.name] = "not read by any material"
+    return drop
+
+# Bytes a UV map takes: two floats per face corner, plus a one-byte layer for each of
+# the select and pin flags that Blender 3.5+ stores beside it. Older versions keep the
+# flags in an int next to the coordinates.
+def uv_layer_bytes(mesh, name):
+    if bpy.app.version < (3, 5, 0):
+        return len(mesh.loops) * 12
+    flags = sum(1 for prefix in (".vs.", ".es.", ".pn.") if mesh.attributes.get(prefix + name) is not None)
+    return len(mesh.loops) * (8 + flags)
+
+# Remove the material slots of a mesh that no face uses and merge the empty ones faces
+# still use, which all draw the default material, into the first of them. When no used
+# slot holds a material, no slot is needed at all. Only the dropped slots are popped,
+# and every face's material index is remapped in one write. Returns the number of
+# slots removed.
+def remove_unused_material_slots(mesh):
+    slot_count = len(mesh.materials)
+    if slot_count == 0:
+        return 0
+    # Faces past the last slot draw with the last one, so count them there
+    indices = np.clip(read_array(mesh.polygons, "material_index", 1, np.int32), 0, slot_count - 1)
+    used = np.bincount(indices, minlength=slot_count) > 0
+    empty = np.array([material is None for material in mesh.materials])
+
+    # Slot each slot's faces end up in
+    target = np.arange(slot_count)
+    used_empty = np.flatnonzero(used & empty)
+    if len(used_empty) and (used & ~empty).any():
+        target[empty] = used_empty[0]
+    elif len(used_empty):
+        used = np.zeros(slot_count, dtype=bool)
+    keep = np.zeros(slot_count, dtype=bool)
+    keep[target[used]] = True
+    if keep.all():
+        return 0
+
+    for i in np.flatnonzero(~keep)[::-1]:
+        mesh.materials.pop(index=int(i))
+    remap = np.maximum(np.cumsum(keep) - 1, 0)[target].astype(np.int32)
+    mesh.polygons.foreach_set("material_index", remap[indices])
+    mesh.update()
+    return slot_count - int(keep.sum())
+
+# Pointers of the meshes that have a user linking materials to the object. Rebuilding
+# the slot list of those meshes would shuffle the object's materials.
+def object_linked_material_meshes():
+    return {obj.data.as_pointer() for obj in bpy.data.objects
+            if obj.type == 'MESH' and any(slot.link == 'OBJECT' for slot in obj.material_slots)}
+
+# Remove unused material slots from every mesh used by the given objects, visiting
+# shared meshes once and skipping meshes with object-linked materials, yielding
+# progress after each mesh. Returns (slots removed, meshes changed).
+def remove_unused_materials_steps(objects):
+    object_linked = object_linked_material_meshes()
+    totals = {"slots": 0}
+
+    def remove(mesh):
+        if mesh.as_pointer() in object_linked:
+            return False
+        count = remove_unused_material_slots(mesh)
+        totals["slots"] += count
+        return count > 0
+
+    changed, _ = yield from run_batch_steps("Remove Unused Materials", objects, {'MESH'}, remove)
+    return totals["slots"], changed
+
+def remove_unused_materials(objects):
+    return run_steps(remove_unused_materials_steps(objects))
+
+# Angles between matching rows of two arrays of vectors, 0 where either has no length
+def vector_angles(a, b):
+    lengths = np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1)
+    valid = lengths > 1e-12
+    cosines = np.where(valid, (a * b).sum(axis=-1) / np.where(valid, lengths, 1.0), 1.0)
+    return np.arccos(np.clip(cosines, -1.0, 1.0))
+
+# Estimated length and turning angle of every segment of a spline, or None for poly
+# splines, which have no resolution, and for splines of a single point, which have no
+# segments (new NURBS splines start with one point)
+def spline_segments(spline):
+    if len(spline.bezier_points if spline.type == 'BEZIER' else spline.points) < 2:
+        return None
+    cyclic = spline.use_cyclic_u
+    if spline.type == 'BEZIER':
+        points = spline.bezier_points
+        co, left, right = (read_array(points, name, 3, np.float32).reshape(-1, 3).astype(np.float64)
+                           for name in ("co", "handle_left", "handle_right"))
+        if cyclic:
+            co_next, left_next = np.roll(co, -1, axis=0), np.roll(left, -1, axis=0)
+        else:
+            co, right, co_next, left_next = co[:-1], right[:-1], co[1:], left[1:]
+        edges = np.stack([right - co, left_next - right, co_next - left_next], axis=1)
+        chords = np.linalg.norm(co_next - co, axis=1)
+        turning = vector_angles(edges[:, 0], edges[:, 1]) + vector_angles(edges[:, 1], edges[:, 2])
+        lengths = (np.linalg.norm(edges, axis=2).sum(axis=1) + chords) / 2
+        return lengths, turning
+    if spline.type == 'NURBS':
+        co = read_array(spline.points, "co", 4, np.float32).reshape(-1, 4)[:, :3].astype(np.float64)
+        edges = (np.roll(co, -1, axis=0) - co) if cyclic else np.diff(co, axis=0)
+        # The bend at each control point is shared by the two segments around it
+        bends = vector_angles(np.roll(edges, 1, axis=0), edges)
+        if not cyclic:
+            bends[0] = 0.0
+        turning = (bends + np.roll(bends, -1)) / 2 if cyclic else (bends + np.append(bends[1:], 0.0)) / 2
+        return np.linalg.norm(edges, axis=1), turning
+    return None
+
+# Resolution that meets the targets on every segment of a curve, within the caps
+def adaptive_curve_resolution(curve, mode, segment_length, max_angle, min_resolution, max_resolution):
+    needed = min_resolution
+    for spline in curve.splines:
+        segments = spline_segments(spline)
+        if segments is None or len(segments[0]) == 0:
+            continue
+        lengths, turning = segments
+        if mode in {'LENGTH', 'BOTH'}:
+            needed = max(needed, int(np.ceil(lengths.max() / segment_length)))
+        if mode in {'ANGLE', 'BOTH'}:
+            needed = max(needed, int(np.ceil(turning.max() / max_angle)))
+    return min(needed, max_resolution)
@@ -0,0 +1,172 @@
+import bpy
+
+from .core import TimeSlicedOperator, batch_objects, run_batch_steps, set_if_changed
+
+#----------
+# UV MAPS
+#----------
+# Property group for UV renaming settings
+class RenameUVSettings(bpy.types.PropertyGroup):
+    uv_name: bpy.props.StringProperty(
+        name="New UV Name",
+        default="",
+        description="Set the name for the new UV",
+    )
+
+# Rename the active UV map of a mesh, leaving meshes alone that already use the name on
+# another layer
+def rename_active_uv_map(mesh, uv_name):
+    active = mesh.uv_layers.active
+    if active is None or active.name == uv_name or uv_name in mesh.uv_layers:
+        return False
+    return set_if_changed(active, "name", uv_name)
+
+# Define the operator for renaming UVs
+class OBJECT_OT_RenameUVOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.rename_uv"
+    bl_label = "Rename UV"
+    bl_description = "Renames active UV of the meshes in the chosen scope"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    uv_name: bpy.props.StringProperty(
+        name="New UV Name",
+        default="",
+        description="Set the name for the new UV",
+    )
+    
+    def steps(self, context):
+        uv_name = context.scene.rename_uv_settings.uv_name
+        if not uv_name:
+            return {'FINISHED'}
+
+        changed, _ = yield from run_batch_steps(self.bl_label, batch_objects(context), {'MESH'},
+                                                lambda mesh: rename_active_uv_map(mesh, uv_name))
+        self.report({'INFO'}, "Renamed the active UV map of {} meshes".format(changed))
+
+# Remove every UV map of a mesh that is not active for rendering, as long as one is
+def remove_inactive_uv_maps(mesh):
+    has_render_map = False
+    names_to_remove = []
+    for uv_map in mesh.uv_layers:
+        if uv_map.active_render:
+            has_render_map = True
+        else:
+            names_to_remove.append(uv_map.name)
+    if not has_render_map or not names_to_remove:
+        return False
+    for name in names_to_remove:
+        mesh.uv_layers.remove(mesh.uv_layers[name])
+    return True
+
+# Define the operator for removing inactive UV maps
+class OBJECT_OT_RemoveInactiveUVOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.remove_inactive_uv"
+    bl_label = "Remove Inactive Maps"
+    bl_description = "Removes UV maps that are inactive for rendering from the meshes in the chosen scope"
+    bl_options = {'REGISTER', 'UNDO'}
+    can_roll_back = False  # removed UV maps cannot be restored from Python
+
+    def steps(self, context):
+        changed, _ = yield from run_batch_steps(self.bl_label, batch_objects(context), {'MESH'}, remove_inactive_uv_maps)
+        self.report({'INFO'}, "Removed inactive UV maps from {} meshes".format(changed))
+    
+# Property group for UV audit settings
+class UVAuditSettings(bpy.types.PropertyGroup):
+    remove_duplicates: bpy.props.BoolProperty(
+        name="Duplicates",
+        description="Remove UV maps identical to another UV map of the same mesh",
+        default=True,
+    )
+    remove_degenerate: bpy.props.BoolProperty(
+        name="Degenerate",
+        description="Remove UV maps where every UV is on the same point",
+        default=True,
+    )
+    remove_unreferenced: bpy.props.BoolProperty(
+        name="Unused by Materials",
+        description="Remove UV maps that no material node reads (keeps the render UV map)",
+        default=False,
+    )
+    report_only: bpy.props.BoolProperty(
+        name="Report Only",
+        description="Report what would be removed without changing anything",
+        default=False,
+    )
+
+# Define the operator for finding and removing redundant UV maps
+class OBJECT_OT_AuditUVMapsOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.audit_uv_maps"
+    bl_label = "Audit UV Maps"
+    bl_description = "Removes duplicate, degenerate or unused UV maps from the meshes in the chosen scope"
+    bl_options = {'REGISTER', 'UNDO'}
+    can_roll_back = False  # removed UV maps cannot be restored from Python
+
+    def steps(self, context):
+        from .geometry import audit_uv_layers, node_tree_uv_references, uv_layer_bytes
+        settings = context.scene.uv_audit_settings
+        material_references = {}
+        totals = {"maps": 0, "bytes": 0}
+
+        # Materials linked to objects instead of their mesh, gathered for every user of
+        # each mesh in the file, since any of them can read the mesh's UV maps
+        object_materials = {}
+        for obj in bpy.data.objects:
+            if obj.type == 'MESH':
+                materials = [slot.material for slot in obj.material_slots if slot.link == 'OBJECT']
+                if materials:
+                    object_materials.setdefault(obj.data.as_pointer(), []).extend(materials)
+
+        def audit(mesh):
+            references = set()
+            for material in list(mesh.materials) + object_materials.get(mesh.as_pointer(), []):
+                if material is None:
+                    continue
+                key = material.as_pointer()
+                if key not in material_references:
+                    material_references[key] = node_tree_uv_references(material.node_tree)
+                references |= material_references[key]
+
+            drop = audit_uv_layers(mesh, references, settings.remove_duplicates,
+                                   settings.remove_degenerate, settings.remove_unreferenced)
+            if not drop:
+                return False
+            freed = sum(uv_layer_bytes(mesh, name) for name in drop)
+            totals["maps"] += len(drop)
+            totals["bytes"] += freed
+            if settings.report_only:
+                self.report({'INFO'}, "{}: {} ({:.1f} KB)".format(mesh.name, ", ".join(
+                    "{} {}".format(name, reason) for name, reason in drop.items()), freed / 1024))
+                return False
+            for name in drop:
+                mesh.uv_layers.remove(mesh.uv_layers[name])
+            return True
+
+        yield from run_batch_steps(self.bl_label, batch_objects(context), {'MESH'}, audit)
+        verb = "Found" if settings.report_only else "Removed"
+        self.report({'INFO'}, "{} {} redundant UV maps, {:.1f} MB".format(
+            verb, totals["maps"], totals["bytes"] / (1024 * 1024)))
+    
+#-----------
+# MATERIALS
+#-----------
+# Define the operator for removing unused material slots from meshes
+class OBJECT_OT_RemoveUnusedMaterialsOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.remove_unused_materials"
+    bl_label = "Remove Unused Materials"
+    bl_description = "Removes material slots that no face uses and merges empty ones in the meshes in the chosen scope"
+    bl_options = {'REGISTER', 'UNDO'}
+    can_roll_back = False  # removed slots are not recorded in the change journal
+
+    def steps(self, context):
+        from .geometry import remove_unused_materials_steps
+        removed, changed = yield from remove_unused_materials_steps(batch_objects(context))
+        self.report({'INFO'}, "Removed {} material slots from {} meshes".format(removed, changed))
+
+classes = (
+    RenameUVSettings,
+    OBJECT_OT_RenameUVOperator,
+    OBJECT_OT_RemoveInactiveUVOperator,
+    UVAuditSettings,
+    OBJECT_OT_AuditUVMapsOperator,
+    OBJECT_OT_RemoveUnusedMaterialsOperator,
+)
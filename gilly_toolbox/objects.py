@@ -0,0 +1,524 @@
+import time
+
+import bpy
+
+from .core import (
+    SceneObjectIndex,
+    batch_objects,
+    deselect_selected_objects,
+    instrument_log,
+    scene_object_indexes,
+    set_objects_selected,
+)
+
+#-------------------
+# LINKED DUPLICATES
+#-------------------
+# Index of which scene objects use which data block, for every object type with data
+class LinkedDuplicateIndex(SceneObjectIndex):
+    def keys_for(self, obj):
+        return (obj.data.as_pointer(),) if obj.data is not None else ()
+
+    def _changed(self):
+        self._sorted_groups = None
+
+    # Data block a group of objects shares
+    def data_block(self, data_key):
+        return next(iter(self.groups[data_key].values())).data
+
+    # Objects using the given object's data, including the object itself
+    def users_of(self, obj):
+        keys = self.object_keys.get(obj.as_pointer())
+        return self.objects_with(keys[0]) if keys else []
+
+    # Keys of the data blocks used by more than one object, largest group first
+    def duplicate_groups(self):
+        if self._sorted_groups is None:
+            keys = [key for key, group in self.groups.items() if len(group) > 1]
+            keys.sort(key=lambda key: len(self.groups[key]), reverse=True)
+            self._sorted_groups = keys
+        return self._sorted_groups
+
+linked_duplicate_index = LinkedDuplicateIndex()
+scene_object_indexes.append(linked_duplicate_index)
+
+# Define the operator for selecting linked duplicates
+class OBJECT_OT_SelectedLinkedDuplicatesOperator(bpy.types.Operator):
+    bl_idname = "object.selected_linked_duplicates"
+    bl_label = "Selected Linked Duplicates"
+    bl_description = "Selects every object in the scene that shares its data with another object"
+    
+    def execute(self, context):
+        index = linked_duplicate_index.ensure(context.scene)
+        deselect_selected_objects(context)
+
+        groups = index.duplicate_groups()
+        for data_key in groups:
+            set_objects_selected(index.groups[data_key].values(), True)
+
+        # Make an object of the largest group active
+        if groups:
+            context.view_layer.objects.active = next(iter(index.groups[groups[0]].values()))
+        
+        return {'FINISHED'}
+
+# Define the operator for selecting every object that uses the active object's data
+class OBJECT_OT_SelectDataUsersOperator(bpy.types.Operator):
+    bl_idname = "object.select_data_users"
+    bl_label = "Select Data Users"
+    bl_description = "Selects every object that shares the active object's data"
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.data is not None
+
+    def execute(self, context):
+        users = linked_duplicate_index.ensure(context.scene).users_of(context.object)
+        deselect_selected_objects(context)
+        set_objects_selected(users, True)
+        return {'FINISHED'}
+
+# Define the operator for selecting or deselecting one group of linked duplicates
+class OBJECT_OT_SelectDuplicateGroupOperator(bpy.types.Operator):
+    bl_idname = "object.select_duplicate_group"
+    bl_label = "Select Duplicate Group"
+    bl_description = "Selects or deselects every object that uses this data block"
+
+    group: bpy.props.StringProperty()  # as_pointer() of the shared data block
+    deselect: bpy.props.BoolProperty(default=False)
+
+    def execute(self, context):
+        index = linked_duplicate_index.ensure(context.scene)
+        group = index.groups.get(int(self.group)) if self.group.isdigit() else None
+        if group is None:
+            self.report({'WARNING'}, "This duplicate group no longer exists")
+            return {'CANCELLED'}
+        set_objects_selected(group.values(), not self.deselect)
+        return {'FINISHED'}
+
+# Define the operator for building the linked duplicate index the group list is drawn
+# from, which the panel does not do itself so a redraw stays cheap
+class OBJECT_OT_IndexLinkedDuplicatesOperator(bpy.types.Operator):
+    bl_idname = "object.index_linked_duplicates"
+    bl_label = "Update Duplicate Groups"
+    bl_description = "Finds the objects sharing data again after the scene's collections changed"
+
+    def execute(self, context):
+        index = linked_duplicate_index.ensure(context.scene)
+        self.report({'INFO'}, "Found {} duplicate groups".format(len(index.duplicate_groups())))
+        return {'FINISHED'}
+
+# Build the index when the group list is opened, rather than in the panel's draw()
+def update_show_groups(self, context):
+    if self.show_groups:
+        linked_duplicate_index.ensure(context.scene)
+
+# Property group for the linked duplicate group list
+class LinkedDuplicateSettings(bpy.types.PropertyGroup):
+    show_groups: bpy.props.BoolProperty(
+        name="Duplicate Groups",
+        description="List the data blocks shared by the most objects",
+        default=False,
+        update=update_show_groups,
+    )
+    max_groups: bpy.props.IntProperty(
+        name="Groups Shown",
+        description="Number of duplicate groups listed",
+        default=10,
+        min=1,
+    )
+
+#---------------------
+# MESH DEDUPLICATION
+#---------------------
+# Property group for mesh deduplication settings
+class DeduplicateMeshSettings(bpy.types.PropertyGroup):
+    tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Snap vertex positions, UVs and other float data to a grid of this size before "
+                    "comparing. Values in the same grid cell count as equal, close values on either "
+                    "side of a cell edge do not (0 compares exactly)",
+        default=0.0,
+        min=0.0,
+        precision=6,
+        step=0.0001,
+    )
+    selected_only: bpy.props.BoolProperty(
+        name="Selected Only",
+        description="Only deduplicate the meshes of selected objects instead of the whole scene",
+        default=False,
+    )
+
+# Define the operator for turning identical meshes into linked duplicates
+class OBJECT_OT_DeduplicateMeshesOperator(bpy.types.Operator):
+    bl_idname = "object.deduplicate_meshes"
+    bl_label = "Deduplicate Meshes"
+    bl_description = "Makes objects with identical geometry share one mesh and removes the unused copies"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        from .geometry import deduplicate_meshes
+        settings = context.scene.deduplicate_mesh_settings
+        objects = context.selected_objects if settings.selected_only else context.scene.objects
+        removed, bytes_freed, polygons_freed = deduplicate_meshes(objects, settings.tolerance)
+        self.report({'INFO'}, "Removed {} duplicate meshes, saving about {:.1f} MB and {} polygons".format(
+            removed, bytes_freed / (1024 * 1024), polygons_freed))
+        return {'FINISHED'}
+
+#------------------------------
+# LINKED DUPLICATES TO INSTANCES
+#------------------------------
+# Property group for converting linked duplicates to instances
+class InstanceConversionSettings(bpy.types.PropertyGroup):
+    min_count: bpy.props.IntProperty(
+        name="Minimum Group Size",
+        description="Only convert groups with at least this many objects",
+        default=2,
+        min=2,
+    )
+    selected_only: bpy.props.BoolProperty(
+        name="Selected Only",
+        description="Only convert selected objects instead of the whole scene",
+        default=False,
+    )
+
+# Define the operator for converting linked duplicate groups into instancers
+class OBJECT_OT_ConvertDuplicatesToInstancesOperator(bpy.types.Operator):
+    bl_idname = "object.convert_duplicates_to_instances"
+    bl_label = "Convert to Instances"
+    bl_description = "Replaces each group of linked duplicates with one object that instances the data on points"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        from .geometry import convert_duplicates_to_instancers
+        settings = context.scene.instance_conversion_settings
+        objects = context.selected_objects if settings.selected_only else list(context.scene.objects)
+        instancers = convert_duplicates_to_instancers(context.scene, objects, settings.min_count)
+        self.report({'INFO'}, "Created {} instancers".format(len(instancers)))
+        return {'FINISHED'}
+
+# Define the operator for turning instancers back into objects
+class OBJECT_OT_RealizeInstancesOperator(bpy.types.Operator):
+    bl_idname = "object.realize_instances"
+    bl_label = "Realize Instances"
+    bl_description = "Turns selected instancers back into one object per instance"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        from .geometry import realize_instancer
+        instancers = [obj for obj in context.selected_objects if "instance_source" in obj]
+        realized = [realize_instancer(instancer) for instancer in instancers]
+        count = sum(len(objects) for objects in realized if objects is not None)
+        missing = sum(1 for objects in realized if objects is None)
+        if missing:
+            self.report({'WARNING'}, "Realized {} objects, skipped {} instancers whose prototype was deleted".format(
+                count, missing))
+        else:
+            self.report({'INFO'}, "Realized {} objects".format(count))
+        return {'FINISHED'}
+
+#--------------------
+# MOVE TO COLLECTION
+#--------------------
+# Dropdown identifier of the scene's own top level collection, which is not in bpy.data
+SCENE_COLLECTION = "<Scene Collection>"
+
+RELINK_MODE_ITEMS = [
+    ('MOVE', "Move", "Unlink the objects from every other collection of the scene"),
+    ('LINK', "Link", "Link the objects to the collection as well, keeping their other collections"),
+    ('COPY_HIERARCHY', "Copy Hierarchy", "Move the objects into copies of their collections made inside the chosen one"),
+]
+
+# Property group for moving objects between collections
+class CollectionRelinkSettings(bpy.types.PropertyGroup):
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        description="How the objects end up in the chosen collection",
+        items=RELINK_MODE_ITEMS,
+        default='MOVE',
+    )
+
+# Collection a dropdown identifier stands for, None if it no longer exists
+def resolve_collection(scene, name):
+    if name == SCENE_COLLECTION:
+        return scene.collection
+    return bpy.data.collections.get(name)
+
+# Parent of every collection in the scene, keyed by pointer. A collection linked in
+# several places gets the first parent found.
+def collection_parents(scene):
+    parents = {}
+    stack = [scene.collection]
+    while stack:
+        parent = stack.pop()
+        for child in parent.children:
+            if child.as_pointer() not in parents:
+                parents[child.as_pointer()] = parent
+                stack.append(child)
+    return parents
+
+# Local collections of the scene holding each object, as {object pointer: {collection
+# pointer: collection}}, from one pass over the collection tree. Object.users_collection
+# scans every collection of the file on each call, so a lookup per object is quadratic.
+def object_collections(scene):
+    members = {}
+    seen = set()
+    stack = [scene.collection]
+    while stack:
+        collection = stack.pop()
+        if collection.as_pointer() in seen:
+            continue
+        seen.add(collection.as_pointer())
+        if collection.library is None:
+            for obj in collection.objects:
+                members.setdefault(obj.as_pointer(), {})[collection.as_pointer()] = collection
+        stack.extend(collection.children)
+    return members
+
+# Collections from the top of the scene down to the given one, without the scene collection
+def collection_path(collection, parents):
+    path = []
+    while collection.as_pointer() in parents:
+        path.append(collection)
+        collection = parents[collection.as_pointer()]
+    path.reverse()
+    return path
+
+# Name without the .001 style suffix Blender adds to keep names unique
+def base_name(name):
+    stem, dot, suffix = name.rpartition(".")
+    return stem if dot and suffix.isdigit() else name
+
+# Collection inside target mirroring the path, reusing children with matching names so
+# running the tool again changes nothing. Nothing is created here: missing collections
+# are appended to creates as (parent, name, color tag) and stand for themselves as
+# ('NEW', index into creates), which is also how a parent still to be created is given.
+# pending maps (parent, name) to those references, so each is planned once. Returns the
+# mirror, a collection or a ('NEW', index) reference.
+def mirror_collection_path(target, path, creates, pending):
+    # Objects already below the target keep the part of their path under it
+    for position, collection in enumerate(path):
+        if collection == target:
+            path = path[position + 1:]
+            break
+    parent = target
+    for collection in path:
+        name = base_name(collection.name)
+        parent_key = parent if isinstance(parent, tuple) else parent.as_pointer()
+        mirror = pending.get((parent_key, name))
+        if mirror is None and not isinstance(parent, tuple):
+            mirror = next((child for child in parent.children if base_name(child.name) == name), None)
+        if mirror is None:
+            creates.append((parent, name, collection.color_tag))
+            mirror = pending[(parent_key, name)] = ('NEW', len(creates) - 1)
+        parent = mirror
+    return parent
+
+# Link and unlink changes that put the objects in the target collection, grouped by
+# collection as {key: (collection, [objects])}, and the collections to create, see
+# mirror_collection_path. Links to a collection still to be created are keyed by its
+# ('NEW', index) reference with None for the collection. The plan is only data, the
+# file does not change until apply_relink. Collections of other scenes and collections
+# linked from libraries are left alone, and links that already exist are not made
+# again. Membership of the scene's collections comes from object_collections, only a
+# target outside the scene needs the slower name lookup.
+def plan_relink(scene, objects, target, mode):
+    parents = collection_parents(scene)
+    in_scene = set(parents) | {scene.collection.as_pointer()}
+    members = object_collections(scene)
+    links, unlinks = {}, {}
+    creates, pending = [], {}
+    mirrors = {}
+    for obj in objects:
+        current = members.get(obj.as_pointer(), {})
+        if mode == 'COPY_HIERARCHY':
+            wanted = {}
+            for key, collection in current.items():
+                if key not in mirrors:
+                    mirrors[key] = mirror_collection_path(target, collection_path(collection, parents),
+                                                          creates, pending)
+                mirror = mirrors[key]
+                if isinstance(mirror, tuple):
+                    wanted[mirror] = None
+                else:
+                    wanted[mirror.as_pointer()] = mirror
+            if not wanted:
+                wanted[target.as_pointer()] = target
+        else:
+            wanted = {target.as_pointer(): target}
+        for key, collection in wanted.items():
+            if key in current:
+                continue
+            if collection is None or key in in_scene or obj.name not in collection.objects:
+                links.setdefault(key, (collection, []))[1].append(obj)
+        if mode != 'LINK':
+            for key, collection in current.items():
+                if key not in wanted:
+                    unlinks.setdefault(key, (collection, []))[1].append(obj)
+    return links, unlinks, creates
+
+# Apply a plan from plan_relink: create the planned collections, then make all links
+# before any unlink so no object is left without a collection halfway through
+def apply_relink(links, unlinks, creates):
+    created = []
+    for parent, name, color_tag in creates:
+        collection = bpy.data.collections.new(name)
+        collection.color_tag = color_tag
+        (created[parent[1]] if isinstance(parent, tuple) else parent).children.link(collection)
+        created.append(collection)
+    for key, (collection, objects) in links.items():
+        if collection is None:
+            collection = created[key[1]]
+        link = collection.objects.link
+        for obj in objects:
+            link(obj)
+        instrument_log.count("rna_writes", len(objects))
+    for collection, objects in unlinks.values():
+        unlink = collection.objects.unlink
+        for obj in objects:
+            unlink(obj)
+        instrument_log.count("rna_writes", len(objects))
+
+# Put the objects in the target collection, returns the number of links made and removed
+# and of collections created
+def relink_objects(scene, objects, target, mode='MOVE'):
+    with instrument_log.phase("plan"):
+        links, unlinks, creates = plan_relink(scene, objects, target, mode)
+    with instrument_log.phase("relink"):
+        apply_relink(links, unlinks, creates)
+    return (sum(len(objects) for _, objects in links.values()),
+            sum(len(objects) for _, objects in unlinks.values()), len(creates))
+
+# Operator to trigger moving the objects in scope to the chosen collection
+class OBJECT_OT_MoveToChosenCollection(bpy.types.Operator):
+    bl_idname = "object.move_to_chosen_collection"
+    bl_label = "Move to Chosen Collection"
+    bl_description = "Move the objects in scope to the chosen collection in the Outliner"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    collection_name: bpy.props.StringProperty()
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=RELINK_MODE_ITEMS,
+        default='MOVE',
+    )
+
+    def execute(self, context):
+        target = resolve_collection(context.scene, self.collection_name)
+        if target is None:
+            self.report({'ERROR'}, "Collection '{}' not found".format(self.collection_name))
+            return {'CANCELLED'}
+        if target.library is not None:
+            self.report({'ERROR'}, "Collection '{}' is linked from a library".format(target.name))
+            return {'CANCELLED'}
+        linked, unlinked, created = relink_objects(context.scene, list(batch_objects(context)), target, self.mode)
+        self.report({'INFO'}, "Made {} links and removed {}, created {} collections".format(linked, unlinked, created))
+        return {'FINISHED'}
+
+#--------------
+# SCENE QUERIES
+#--------------
+# Property group for scene query settings
+class SceneQuerySettings(bpy.types.PropertyGroup):
+    query: bpy.props.StringProperty(
+        name="Query",
+        description="Terms joined by 'and', for example: type = MESH and faces > 100k and collection = Props and uv_maps = 0",
+        default="",
+    )
+    extend: bpy.props.BoolProperty(
+        name="Extend",
+        description="Add the matching objects to the current selection",
+        default=False,
+    )
+
+# Define the operator for selecting the objects matching a query
+class OBJECT_OT_SelectByQueryOperator(bpy.types.Operator):
+    bl_idname = "object.select_by_query"
+    bl_label = "Select by Query"
+    bl_description = "Selects the objects matching the query"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        settings = context.scene.scene_query_settings
+        from .query import query_objects
+        start = time.perf_counter()
+        try:
+            objects = query_objects(context.scene, settings.query)
+        except ValueError as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        elapsed = time.perf_counter() - start
+
+        if not settings.extend:
+            deselect_selected_objects(context)
+        set_objects_selected(objects, True)
+        if objects:
+            context.view_layer.objects.active = objects[0]
+        self.report({'INFO'}, "Selected {} objects ({:.1f} ms query)".format(len(objects), elapsed * 1000))
+        return {'FINISHED'}
+
+#---------------------
+# COLLECTION DROPDOWN
+#---------------------
+# Dropdown items for every scene, keyed by scene pointer as (signature, items). Entries
+# are dropped when the scene's collection hierarchy changes and rebuilt on next use.
+_collection_cache = {}
+
+# Every collection below the given one, parents before children, with its nesting depth
+def walk_collections(collection, depth=0, seen=None):
+    if seen is None:
+        seen = set()
+    for child in collection.children:
+        if child.name in seen:
+            continue
+        seen.add(child.name)
+        yield child, depth
+        yield from walk_collections(child, depth + 1, seen)
+
+# Names and nesting of a scene's collections, which changes whenever the dropdown would
+def collection_signature(scene):
+    return tuple((coll.name, depth) for coll, depth in walk_collections(scene.collection))
+
+def get_collection_items(self, context):
+    # self is the scene that owns the property
+    key = self.as_pointer()
+    cached = _collection_cache.get(key)
+    if cached is None:
+        signature = collection_signature(self)
+        items = [(SCENE_COLLECTION, "Scene Collection", "")]
+        items += [(name, "    " * (depth + 1) + name, "") for name, depth in signature]
+        cached = _collection_cache[key] = (signature, items)
+    return cached[1]
+
+# Handler that drops a scene's cached items when its collections were added, removed,
+# renamed or re-parented. Updates that touch no collection, like transforms, return early.
+@bpy.app.handlers.persistent
+def update_collection_cache(scene, depsgraph):
+    if not (depsgraph.id_type_updated('COLLECTION') or depsgraph.id_type_updated('SCENE')):
+        return
+    key = scene.as_pointer()
+    cached = _collection_cache.get(key)
+    if cached is not None and cached[0] != collection_signature(scene):
+        del _collection_cache[key]
+
+# Handler that forgets every cached scene when a file is loaded
+@bpy.app.handlers.persistent
+def clear_collection_cache(*args):
+    _collection_cache.clear()
+
+classes = (
+    LinkedDuplicateSettings,
+    OBJECT_OT_SelectedLinkedDuplicatesOperator,
+    OBJECT_OT_SelectDataUsersOperator,
+    OBJECT_OT_SelectDuplicateGroupOperator,
+    OBJECT_OT_IndexLinkedDuplicatesOperator,
+    DeduplicateMeshSettings,
+    OBJECT_OT_DeduplicateMeshesOperator,
+    InstanceConversionSettings,
+    OBJECT_OT_ConvertDuplicatesToInstancesOperator,
+    OBJECT_OT_RealizeInstancesOperator,
+    CollectionRelinkSettings,
+    OBJECT_OT_MoveToChosenCollection,
+    SceneQuerySettings,
+    OBJECT_OT_SelectByQueryOperator,
+)
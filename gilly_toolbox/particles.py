@@ -0,0 +1,193 @@
+import os
+import time
+
+import bpy
+
+from .core import TimeSlicedOperator, record_created_ids
+
+#--------------------------
+# PARTICLE SIMULATION BAKE
+#--------------------------
+# Settings and operators of the bake. The bake engine itself is in bake, imported when
+# an operator first runs.
+# Property group for particle bake settings
+class ParticleBakeSettings(bpy.types.PropertyGroup):
+    bake_method: bpy.props.EnumProperty(
+        name="Method",
+        description="How keyframes are written for the baked particles",
+        items=[
+            ('BULK', "Bulk", "Read all particles per frame into arrays and write each F-curve in one pass"),
+            ('LEGACY', "Per Key", "Insert keyframes one property at a time (slow on large simulations)"),
+        ],
+        default='BULK',
+    )
+    bake_target: bpy.props.EnumProperty(
+        name="Target",
+        description="Where the baked particle transforms are stored",
+        items=[
+            ('OBJECTS', "Objects", "Create one keyframed object per particle"),
+            ('POINTS', "Single Object", "Store every frame as point attributes on one object, instanced with Geometry Nodes"),
+        ],
+        default='OBJECTS',
+    )
+    use_decimation: bpy.props.BoolProperty(
+        name="Decimate Keys",
+        description="Only write the keys needed to reproduce every frame, and none while a particle is unborn or dead",
+        default=False,
+    )
+    decimate_tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Largest difference from the sampled value allowed on any frame",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        step=0.001,
+    )
+    use_disk_cache: bpy.props.BoolProperty(
+        name="Stream to Disk",
+        description="Write each block of frames to an on-disk cache while baking, so an interrupted bake can resume",
+        default=False,
+    )
+    cache_directory: bpy.props.StringProperty(
+        name="Cache Directory",
+        description="Folder the particle cache is written to",
+        default="//particle_cache",
+        subtype='DIR_PATH',
+    )
+    cache_chunk_frames: bpy.props.IntProperty(
+        name="Frames per Chunk",
+        description="Number of frames stored in each cache file",
+        default=50,
+        min=1,
+    )
+    use_parallel: bpy.props.BoolProperty(
+        name="Parallel Workers",
+        description="Cache frame ranges in background Blender processes (needs a saved file and a baked point cache, writes the disk cache)",
+        default=False,
+    )
+    worker_count: bpy.props.IntProperty(
+        name="Workers",
+        description="Number of background Blender processes used for a parallel bake",
+        default=max(1, (os.cpu_count() or 1) // 2),
+        min=1,
+    )
+
+#Define the operator for baking particle simulations
+class OBJECT_OT_BakeParticleSimulationOperator(bpy.types.Operator, TimeSlicedOperator):
+    bl_idname = "object.bake_particle_simulation"
+    bl_label = "Bake Particle Simulation"
+    bl_description = "Run the particle simulation baking code"
+    bl_options = {'UNDO'}  # no redo panel, redoing would run the whole bake again
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and len(context.object.particle_systems) > 0
+
+    # Sampling, caching and keyframing yield after every frame or object, so Esc stays
+    # responsive. Creating the particle objects and the point cache object are single
+    # steps.
+    def steps(self, context):
+        from .bake import (apply_particle_samples_steps, bake_particle_cache_parallel_steps,
+                           bake_particle_system_steps, load_particle_cache, particle_cache_directory,
+                           sample_particle_frame_steps, stream_particle_cache_steps)
+        settings = context.scene.particle_bake_settings
+        if settings.use_parallel and (not bpy.data.filepath or bpy.data.is_dirty):
+            self.report({'ERROR'}, "Save the file before a parallel bake, the workers load it from disk")
+            return {'CANCELLED'}
+
+        #in 2.8 you need to evaluate the Dependency graph in order to get data from animation, modifiers, etc
+        depsgraph = context.evaluated_depsgraph_get()
+
+        # Assume only 2 objects are selected.
+        # The active object should be the one with the particle system.
+        ps_obj = context.object
+        ps_obj_evaluated = depsgraph.objects[ ps_obj.name ]
+        others = [obj for obj in context.selected_objects if obj != ps_obj]
+        if not others:
+            self.report({'ERROR'}, "Select the object to instance on the particles, then the emitter")
+            return {'CANCELLED'}
+        obj = others[0]
+        if settings.use_parallel:
+            unbaked = [ps.name for ps in ps_obj_evaluated.particle_systems if not ps.point_cache.is_baked]
+            if unbaked:
+                self.report({'ERROR'}, "Bake the point cache of {} first, the parallel workers start from it".format(
+                    ", ".join(unbaked)))
+                return {'CANCELLED'}
+
+        start_frame = context.scene.frame_start
+        end_frame = context.scene.frame_end
+        tolerance = settings.decimate_tolerance if settings.use_decimation else None
+        for ps in ps_obj_evaluated.particle_systems:
+            # Assume only 1 particle system is present.
+            start = time.perf_counter()
+            if settings.use_disk_cache or settings.use_parallel:
+                directory = particle_cache_directory(settings.cache_directory, ps_obj, ps)
+                if settings.use_parallel:
+                    try:
+                        _, written, cleared = yield from bake_particle_cache_parallel_steps(
+                            ps_obj, ps, directory, start_frame, end_frame,
+                            settings.cache_chunk_frames, settings.worker_count, obj.name)
+                    except RuntimeError as e:
+                        self.report({'ERROR'}, str(e))
+                        return {'CANCELLED'}
+                else:
+                    _, written, cleared = yield from stream_particle_cache_steps(
+                        ps, directory, start_frame, end_frame, settings.cache_chunk_frames, obj.name)
+                if cleared:
+                    self.report({'WARNING'}, "Cleared the cache in {}, it was left by a different bake".format(directory))
+                elif not written:
+                    self.report({'INFO'}, "Reused the complete cache in {}".format(directory))
+                _, samples = load_particle_cache(directory)
+                with record_created_ids():
+                    yield from apply_particle_samples_steps(samples, obj, settings.bake_target, tolerance)
+            elif settings.bake_target == 'POINTS' or settings.bake_method == 'BULK' or tolerance is not None:
+                samples = yield from sample_particle_frame_steps(ps, start_frame, end_frame)
+                with record_created_ids():
+                    yield from apply_particle_samples_steps(samples, obj, settings.bake_target, tolerance)
+            else:
+                with record_created_ids():
+                    yield from bake_particle_system_steps(ps, obj, start_frame, end_frame,
+                                                          settings.bake_method, tolerance)
+            self.report({'INFO'}, "Baked {} particles over {} frames in {:.2f}s".format(
+                len(ps.particles), end_frame - start_frame + 1, time.perf_counter() - start))
+
+# Define the operator for turning an on-disk particle cache into keyframes or instances
+class OBJECT_OT_ApplyParticleCacheOperator(bpy.types.Operator):
+    bl_idname = "object.apply_particle_cache"
+    bl_label = "Apply Particle Cache"
+    bl_description = "Build the bake of the active object's particle systems from the disk cache without re-simulating"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and len(context.object.particle_systems) > 0
+
+    def execute(self, context):
+        from .bake import apply_particle_samples, load_particle_cache, particle_cache_directory
+        settings = context.scene.particle_bake_settings
+        ps_obj = context.object
+        selected = [obj for obj in context.selected_objects if obj != ps_obj]
+        tolerance = settings.decimate_tolerance if settings.use_decimation else None
+
+        for ps in ps_obj.particle_systems:
+            directory = particle_cache_directory(settings.cache_directory, ps_obj, ps)
+            try:
+                manifest, samples = load_particle_cache(directory)
+            except FileNotFoundError as e:
+                self.report({'ERROR'}, str(e))
+                return {'CANCELLED'}
+
+            # Instance the selected object, or the one the cache was baked with
+            obj = selected[0] if selected else bpy.data.objects.get(manifest["instance_object"])
+            if obj is None:
+                self.report({'ERROR'}, "Select the object to instance on the particles")
+                return {'CANCELLED'}
+            apply_particle_samples(samples, obj, settings.bake_target, tolerance)
+
+        return {'FINISHED'}
+
+classes = (
+    ParticleBakeSettings,
+    OBJECT_OT_BakeParticleSimulationOperator,
+    OBJECT_OT_ApplyParticleCacheOperator,
+)
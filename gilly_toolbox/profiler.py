@@ -0,0 +1,292 @@
+import csv
+import json
+import time
+
+import bpy
+from bpy_extras.io_utils import ExportHelper
+
+from .core import deselect_selected_objects, scene_object_indexes
+from .objects import linked_duplicate_index
+
+#----------------
+# SCENE PROFILER
+#----------------
+# Evaluated geometry and memory of every scene object, to find the few objects that
+# make a scene slow. The first refresh profiles every object. After that the depsgraph
+# handler only notes which objects changed, and a refresh profiles just those.
+PROFILE_SORT_ITEMS = [
+    ('FACES', "Faces", "Sort by evaluated face count"),
+    ('VERTICES', "Vertices", "Sort by evaluated vertex count"),
+    ('MEMORY', "Memory", "Sort by estimated evaluated mesh memory"),
+    ('TIME', "Evaluation Time", "Sort by measured evaluation time"),
+]
+PROFILE_SORT_KEYS = {'FACES': "faces", 'VERTICES': "vertices", 'MEMORY': "memory", 'TIME': "eval_ms"}
+PROFILE_COLUMNS = ["name", "type", "vertices", "faces", "instances", "memory", "eval_ms"]
+
+# Object types that evaluate to a mesh through to_mesh()
+MESH_LIKE_TYPES = {'CURVE', 'SURFACE', 'FONT', 'META'}
+
+# Time re-evaluating one object, including whatever depends on it. Objects the depsgraph
+# does not hold, such as hidden ones, cannot be measured and give None.
+def measure_object_evaluation(obj, depsgraph):
+    if obj.evaluated_get(depsgraph) is obj:
+        return None
+    obj.update_tag(refresh={'OBJECT', 'DATA'})
+    start = time.perf_counter()
+    depsgraph.update()
+    return time.perf_counter() - start
+
+# Rough size of a mesh's main arrays in bytes
+def estimate_mesh_bytes(mesh):
+    loops = len(mesh.loops)
+    return (len(mesh.vertices) * 12          # positions
+            + len(mesh.edges) * 8            # edge vertices
+            + loops * 8                      # loop vertex and edge indices
+            + len(mesh.polygons) * 12        # loop start, total and material index
+            + loops * 8 * len(mesh.uv_layers))
+
+# Evaluated vertex and face counts and estimated mesh memory of an object, modifiers
+# included, and its evaluation time in milliseconds when measured
+def profile_object(obj, depsgraph, measure_time=False):
+    seconds = measure_object_evaluation(obj, depsgraph) if measure_time else None
+    row = {"name": obj.name, "type": obj.type, "vertices": 0, "faces": 0, "instances": 0, "memory": 0,
+           "eval_ms": seconds * 1000 if seconds is not None else None}
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = None
+    if obj.type == 'MESH':
+        mesh = evaluated.data
+    elif obj.type in MESH_LIKE_TYPES:
+        mesh = evaluated.to_mesh()
+    if mesh is not None:
+        row["vertices"] = len(mesh.vertices)
+        row["faces"] = len(mesh.polygons)
+        row["memory"] = estimate_mesh_bytes(mesh)
+    if obj.type in MESH_LIKE_TYPES:
+        evaluated.to_mesh_clear()
+    return row
+
+# Whether an object can create instances: through Geometry Nodes, particles rendered
+# as objects or collections, or instancing of its vertices, faces or a collection
+def creates_instances(obj):
+    return (obj.instance_type != 'NONE'
+            or any(modifier.type == 'NODES' for modifier in obj.modifiers)
+            or any(ps.settings.render_type in {'OBJECT', 'COLLECTION'} for ps in obj.particle_systems))
+
+# Instances each of the given objects creates, from Geometry Nodes, particles or
+# instanced collections, as {object pointer: (instances, vertices, faces)}. Their
+# geometry counts towards the instancing object, their memory does not, since every
+# instance shares its data.
+def instance_totals(depsgraph, object_keys):
+    totals = {}
+    data_counts = {}
+    for instance in depsgraph.object_instances:
+        if not instance.is_instance:
+            continue
+        key = instance.parent.original.as_pointer()
+        if key not in object_keys:
+            continue
+        data = instance.object.data
+        counts = (0, 0)
+        if isinstance(data, bpy.types.Mesh):
+            data_key = data.as_pointer()
+            if data_key not in data_counts:
+                data_counts[data_key] = (len(data.vertices), len(data.polygons))
+            counts = data_counts[data_key]
+        instances, vertices, faces = totals.get(key, (0, 0, 0))
+        totals[key] = (instances + 1, vertices + counts[0], faces + counts[1])
+    return totals
+
+class SceneProfiler:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.scene_key = None
+        self.rows = {}      # object pointer -> profile row
+        self.dirty = {}     # object pointer -> object changed since the last refresh
+        self.dirty_data = set()     # pointers of data blocks changed since the last refresh
+        self.data_object_count = 0
+        self.measuring = False
+
+    # Note the objects and data blocks a depsgraph update changed. The other users of
+    # changed data are looked up on the next refresh, so the handler never has to
+    # rebuild the linked duplicate index.
+    def update(self, scene, depsgraph):
+        if self.scene_key != scene.as_pointer() or self.measuring:
+            return
+        for update in depsgraph.updates:
+            id_block = update.id.original
+            if isinstance(id_block, bpy.types.Object):
+                self.dirty[id_block.as_pointer()] = id_block
+            elif id_block.id_type in {'MESH', 'CURVE', 'META'}:
+                self.dirty_data.add(id_block.as_pointer())
+        object_count = len(bpy.data.objects)
+        if object_count < self.data_object_count:
+            self.scene_key = None  # objects were deleted
+        self.data_object_count = object_count
+
+    # Profile every object on the first call and the changed ones after that. Returns
+    # the number of objects profiled.
+    def refresh(self, scene, depsgraph, measure_time=False, full=False):
+        if full or self.scene_key != scene.as_pointer():
+            self.clear()
+            self.scene_key = scene.as_pointer()
+            objects = list(scene.objects)
+        else:
+            index = linked_duplicate_index.ensure(scene)
+            for data_key in self.dirty_data:
+                for obj in index.objects_with(data_key):
+                    self.dirty[obj.as_pointer()] = obj
+            objects = list(self.dirty.values())
+        self.dirty = {}
+        self.dirty_data = set()
+        self.data_object_count = len(bpy.data.objects)
+
+        self.measuring = measure_time
+        try:
+            instancers = set()
+            for obj in objects:
+                try:
+                    self.rows[obj.as_pointer()] = profile_object(obj, depsgraph, measure_time)
+                    if creates_instances(obj):
+                        instancers.add(obj.as_pointer())
+                except ReferenceError:  # removed since it was noted
+                    pass
+        finally:
+            self.measuring = False
+        # Walking the depsgraph instances visits every instance in the scene, so it is
+        # only done when a profiled object can have some
+        if instancers:
+            for key, (instances, vertices, faces) in instance_totals(depsgraph, instancers).items():
+                row = self.rows[key]
+                row["instances"] = instances
+                row["vertices"] += vertices
+                row["faces"] += faces
+        return len(objects)
+
+    # Profile rows, heaviest first
+    def sorted_rows(self, sort_by):
+        key = PROFILE_SORT_KEYS[sort_by]
+        return sorted(self.rows.values(), key=lambda row: row[key] or 0, reverse=True)
+
+scene_profiler = SceneProfiler()
+scene_object_indexes.append(scene_profiler)
+
+# Copy the heaviest profile rows into the list the panel shows
+def sync_profile_entries(settings):
+    settings.entries.clear()
+    for row in scene_profiler.sorted_rows(settings.sort_by)[:settings.max_entries]:
+        entry = settings.entries.add()
+        entry.name = row["name"]
+        entry.object_type = row["type"]
+        entry.vertices = row["vertices"]
+        entry.faces = row["faces"]
+        entry.memory_mb = row["memory"] / (1024 * 1024)
+        entry.eval_ms = row["eval_ms"] if row["eval_ms"] is not None else -1.0
+
+def update_profile_sort(self, context):
+    sync_profile_entries(self)
+
+# Select the object of the clicked profile entry
+def select_profile_entry(self, context):
+    if not 0 <= self.active_index < len(self.entries):
+        return
+    obj = context.scene.objects.get(self.entries[self.active_index].name)
+    if obj is not None and obj.name in context.view_layer.objects:
+        deselect_selected_objects(context)
+        obj.select_set(True)
+        context.view_layer.objects.active = obj
+
+# One row of the profiler list
+class SceneProfileEntry(bpy.types.PropertyGroup):
+    object_type: bpy.props.StringProperty(name="Type")
+    vertices: bpy.props.IntProperty(name="Vertices")
+    faces: bpy.props.IntProperty(name="Faces")
+    memory_mb: bpy.props.FloatProperty(name="Memory (MB)")
+    eval_ms: bpy.props.FloatProperty(name="Evaluation Time (ms)", description="-1 when not measured")
+
+# Property group for the scene profiler
+class SceneProfileSettings(bpy.types.PropertyGroup):
+    entries: bpy.props.CollectionProperty(type=SceneProfileEntry)
+    active_index: bpy.props.IntProperty(name="Active Entry", update=select_profile_entry)
+    sort_by: bpy.props.EnumProperty(
+        name="Sort By",
+        description="Value the heaviest objects are ranked by",
+        items=PROFILE_SORT_ITEMS,
+        default='FACES',
+        update=update_profile_sort,
+    )
+    max_entries: bpy.props.IntProperty(
+        name="Entries",
+        description="Number of the heaviest objects to list",
+        default=50,
+        min=1,
+        max=10000,
+        update=update_profile_sort,
+    )
+    measure_time: bpy.props.BoolProperty(
+        name="Measure Evaluation Time",
+        description="Re-evaluate each profiled object on its own to time it. Slow on large scenes",
+        default=False,
+    )
+
+# List of the heaviest objects
+class OBJECT_UL_SceneProfile(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.label(text=item.name, icon='OBJECT_DATA')
+        row.label(text="{:,} faces".format(item.faces))
+        row.label(text="{:.1f} MB".format(item.memory_mb))
+        row.label(text="{:.1f} ms".format(item.eval_ms) if item.eval_ms >= 0 else "-")
+
+# Define the operator for profiling the scene
+class OBJECT_OT_ProfileSceneOperator(bpy.types.Operator):
+    bl_idname = "object.profile_scene"
+    bl_label = "Profile Scene"
+    bl_description = "Profiles the objects changed since the last run, or every object the first time"
+
+    full: bpy.props.BoolProperty(name="Full", description="Profile every object again", default=False)
+
+    def execute(self, context):
+        settings = context.scene.scene_profile_settings
+        start = time.perf_counter()
+        count = scene_profiler.refresh(context.scene, context.evaluated_depsgraph_get(),
+                                       settings.measure_time, self.full)
+        sync_profile_entries(settings)
+        self.report({'INFO'}, "Profiled {} objects in {:.2f}s".format(count, time.perf_counter() - start))
+        return {'FINISHED'}
+
+# Define the operator for exporting the scene profile to a JSON or CSV file
+class OBJECT_OT_ExportSceneProfileOperator(bpy.types.Operator, ExportHelper):
+    bl_idname = "object.export_scene_profile"
+    bl_label = "Export Scene Profile"
+    bl_description = "Writes every profiled object, heaviest first, to a JSON or CSV file"
+
+    filename_ext = ".json"
+    check_extension = None  # both .json and .csv are accepted
+    filter_glob: bpy.props.StringProperty(default="*.json;*.csv", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return bool(scene_profiler.rows)
+
+    def execute(self, context):
+        rows = scene_profiler.sorted_rows(context.scene.scene_profile_settings.sort_by)
+        if self.filepath.lower().endswith(".csv"):
+            with open(self.filepath, "w", newline="", encoding="utf-8") as handle:
+                writer = csv.DictWriter(handle, PROFILE_COLUMNS)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(self.filepath, "w", encoding="utf-8") as handle:
+                json.dump({"objects": rows}, handle, indent=1)
+        self.report({'INFO'}, "Exported {} objects".format(len(rows)))
+        return {'FINISHED'}
+
+classes = (
+    SceneProfileEntry,
+    SceneProfileSettings,
+    OBJECT_UL_SceneProfile,
+    OBJECT_OT_ProfileSceneOperator,
+    OBJECT_OT_ExportSceneProfileOperator,
+)
@@ -0,0 +1,323 @@
+import fnmatch
+import json
+import re
+
+import bpy
+import numpy as np
+
+from .core import collection_objects, scene_object_indexes
+from .custom_properties import custom_property_index, values_match
+
+#--------------
+# SCENE QUERIES
+#--------------
+# Queries are terms joined by "and", each comparing a field of the objects to a value:
+#     type = MESH and faces > 100k and collection = Props and uv_maps = 0
+# A term can start with "not", and "prop.NAME" on its own tests whether an object or
+# its data has the custom property. Names and data names accept * and ? wildcards.
+QUERY_TERM = re.compile(r"^(not\s+)?([\w.]+)\s*(?:(==|=|!=|>=|<=|>|<)\s*(.+))?$", re.IGNORECASE)
+QUERY_COMPARISONS = {
+    "=": np.equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+QUERY_NUMBER_SUFFIXES = {"k": 1e3, "m": 1e6}
+QUERY_BOUNDS_FIELDS = ["min_x", "min_y", "min_z", "max_x", "max_y", "max_z"]
+QUERY_MESH_FIELDS = ["vertices", "faces", "uv_maps"]
+QUERY_NUMERIC_FIELDS = QUERY_MESH_FIELDS + ["size"] + QUERY_BOUNDS_FIELDS
+
+OBJECT_TYPE_NAMES = [item.identifier for item in bpy.types.Object.bl_rna.properties["type"].enum_items]
+
+# Vertex, face and UV map counts of an object's mesh, or -1 for objects without one,
+# which comparisons of the counts leave out
+def mesh_statistics(obj):
+    if obj.type != 'MESH' or obj.data is None:
+        return -1, -1, -1
+    mesh = obj.data
+    return len(mesh.vertices), len(mesh.polygons), len(mesh.uv_layers)
+
+# World-space bounding box of an object as (minimum, maximum) corners
+def world_bounds(obj):
+    corners = np.array(obj.bound_box, dtype=np.float64)
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    corners = corners @ matrix[:3, :3].T + matrix[:3, 3]
+    return corners.min(axis=0), corners.max(axis=0)
+
+# Columnar cache of the attributes queries test, one row per scene object. It is built
+# in one pass and kept current from depsgraph updates like the scene object indexes, so
+# a query only does array comparisons. Collection membership and materials are kept as
+# row sets built on first use.
+class SceneQueryCache:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.scene_key = None
+        self.objects = []
+        self.row_of = {}        # object pointer -> row
+        self.names = []
+        self.data_names = []
+        self.materials = []     # row -> material names
+        self.material_names = {}    # material pointer -> name when its rows were read
+        self.type_codes = np.zeros(0, dtype=np.int16)
+        self.data_keys = np.zeros(0, dtype=np.uint64)
+        self.counts = np.zeros((0, 3), dtype=np.int64)      # vertices, faces, uv maps
+        self.bounds = np.zeros((0, 6), dtype=np.float64)    # minimum and maximum corners
+        self.data_object_count = 0
+        self.membership_changed = False     # collections changed since the last check
+        self._invalidate_sets()
+
+    def _invalidate_sets(self):
+        self._collection_rows = {}
+        self._material_rows = None
+
+    # Check the row count against the scene lazily after collection changes, like
+    # SceneObjectIndex.ensure()
+    def ensure(self, scene):
+        if self.scene_key == scene.as_pointer() and self.membership_changed:
+            self.membership_changed = False
+            if len(self.objects) != len(scene.objects):
+                self.scene_key = None
+        if self.scene_key != scene.as_pointer():
+            self.rebuild(scene)
+        return self
+
+    def rebuild(self, scene):
+        self.clear()
+        self.scene_key = scene.as_pointer()
+        self._append(list(scene.objects))
+        self.data_object_count = len(bpy.data.objects)
+
+    def _append(self, objects):
+        start = len(self.objects)
+        count = len(objects)
+        self.type_codes = np.concatenate([self.type_codes, np.zeros(count, dtype=np.int16)])
+        self.data_keys = np.concatenate([self.data_keys, np.zeros(count, dtype=np.uint64)])
+        self.counts = np.concatenate([self.counts, np.zeros((count, 3), dtype=np.int64)])
+        self.bounds = np.concatenate([self.bounds, np.zeros((count, 6), dtype=np.float64)])
+        self.objects.extend(objects)
+        self.names.extend([""] * count)
+        self.data_names.extend([""] * count)
+        self.materials.extend([()] * count)
+        statistics = {}  # linked duplicates share their mesh statistics
+        for row, obj in enumerate(objects, start):
+            self.row_of[obj.as_pointer()] = row
+            self._read_row(row, obj, statistics)
+        self._invalidate_sets()
+
+    def _read_row(self, row, obj, statistics=None):
+        data = obj.data
+        data_key = data.as_pointer() if data is not None else 0
+        if statistics is not None and data_key and data_key in statistics:
+            counts = statistics[data_key]
+        else:
+            counts = mesh_statistics(obj)
+            if statistics is not None:
+                statistics[data_key] = counts
+        self.names[row] = obj.name
+        self.data_names[row] = data.name if data is not None else ""
+        self._read_materials(row, obj)
+        self.type_codes[row] = OBJECT_TYPE_NAMES.index(obj.type)
+        self.data_keys[row] = data_key
+        self.counts[row] = counts
+        self.bounds[row, :3], self.bounds[row, 3:] = world_bounds(obj)
+
+    def _read_materials(self, row, obj):
+        materials = [slot.material for slot in obj.material_slots if slot.material]
+        for material in materials:
+            self.material_names[material.as_pointer()] = material.name
+        self.materials[row] = tuple(material.name for material in materials)
+        self._material_rows = None
+
+    # A data block changed: its users share the mesh statistics and data name, so those
+    # are written to every user row at once instead of re-reading each row in full
+    def _update_data(self, data):
+        rows = np.flatnonzero(self.data_keys == data.as_pointer())
+        if len(rows) == 0:
+            return
+        self.counts[rows] = mesh_statistics(self.objects[rows[0]])
+        if self.data_names[rows[0]] != data.name:
+            for row in rows:
+                self.data_names[row] = data.name
+        # Material slots of the data changed when they did for the first user
+        first = self.objects[rows[0]]
+        if tuple(slot.material.name for slot in first.material_slots if slot.material) != self.materials[rows[0]]:
+            for row in rows:
+                self._read_materials(row, self.objects[row])
+
+    # A renamed material leaves the names of its rows stale, so those rows are re-read.
+    # Other material edits, like node changes, do not touch the cache.
+    def _update_material(self, material):
+        old_name = self.material_names.get(material.as_pointer())
+        if old_name is None or old_name == material.name:
+            return
+        for row in self.material_rows(old_name):
+            self._read_materials(row, self.objects[row])
+        self.material_names[material.as_pointer()] = material.name
+
+    # Apply a depsgraph update: append new objects, re-read changed ones and update the
+    # rows using a changed data block or renamed material. Deleted or unlinked objects
+    # make the cache rebuild on next use, as with the scene object indexes.
+    def update(self, scene, depsgraph):
+        if self.scene_key != scene.as_pointer():
+            return
+        added = []
+        for update in depsgraph.updates:
+            id_block = update.id.original
+            if isinstance(id_block, bpy.types.Object):
+                row = self.row_of.get(id_block.as_pointer())
+                if row is None:
+                    added.append(id_block)
+                else:
+                    self._read_row(row, id_block)
+            elif isinstance(id_block, (bpy.types.Collection, bpy.types.Scene)):
+                self._collection_rows = {}
+                self.membership_changed = True
+            elif isinstance(id_block, bpy.types.Material):
+                self._update_material(id_block)
+            else:
+                self._update_data(id_block)
+        if added:
+            self._append(added)
+
+        object_count = len(bpy.data.objects)
+        if object_count != self.data_object_count + len(added):
+            self.scene_key = None
+        self.data_object_count = object_count
+
+    def mask_of_rows(self, rows):
+        mask = np.zeros(len(self.objects), dtype=bool)
+        mask[list(rows)] = True
+        return mask
+
+    def mask_of_objects(self, objects):
+        return self.mask_of_rows(self.row_of[obj.as_pointer()] for obj in objects
+                                 if obj.as_pointer() in self.row_of)
+
+    # Rows of the objects in a collection or any collection inside it
+    def collection_rows(self, scene, name):
+        if name not in self._collection_rows:
+            collection = scene.collection if name == scene.collection.name else bpy.data.collections.get(name)
+            if collection is None:
+                raise ValueError("Unknown collection '{}'".format(name))
+            rows = self.row_of
+            self._collection_rows[name] = [rows[obj.as_pointer()] for obj in collection_objects(collection)
+                                           if obj.as_pointer() in rows]
+        return self._collection_rows[name]
+
+    # Rows of the objects with a material in one of their slots
+    def material_rows(self, name):
+        if self._material_rows is None:
+            self._material_rows = {}
+            for row, names in enumerate(self.materials):
+                for material_name in names:
+                    self._material_rows.setdefault(material_name, []).append(row)
+        return self._material_rows.get(name, [])
+
+    # Rows of objects with a mesh, the only ones with mesh statistics
+    def mesh_mask(self):
+        return self.counts[:, 0] >= 0
+
+    def numeric_column(self, field):
+        if field == "size":
+            return (self.bounds[:, 3:] - self.bounds[:, :3]).max(axis=1)
+        if field in QUERY_BOUNDS_FIELDS:
+            return self.bounds[:, QUERY_BOUNDS_FIELDS.index(field)]
+        return self.counts[:, QUERY_NUMERIC_FIELDS.index(field)]
+
+scene_query_cache = SceneQueryCache()
+scene_object_indexes.append(scene_query_cache)
+
+# A value compared with a custom property: JSON when it reads as JSON, else a string
+def parse_query_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def parse_query_number(text):
+    number = text.strip().lower()
+    scale = QUERY_NUMBER_SUFFIXES.get(number[-1:], 1)
+    try:
+        return float(number[:-1] if scale != 1 else number) * scale
+    except ValueError:
+        raise ValueError("'{}' is not a number".format(text)) from None
+
+# Words of a query, with quoted values kept whole so "and" inside them does not split
+# the query. An unclosed quote runs to the end.
+QUERY_TOKEN = re.compile(r"\"[^\"]*(?:\"|$)|'[^']*(?:'|$)|[^\s\"']+")
+
+# Split a query at every "and" outside quotes
+def split_query_terms(text):
+    parts = []
+    start = 0
+    for token in QUERY_TOKEN.finditer(text):
+        if token.group().lower() == "and":
+            parts.append(text[start:token.start()])
+            start = token.end()
+    parts.append(text[start:])
+    return parts
+
+# Split a query into (negated, field, comparison, value) terms. Raises ValueError for
+# terms that cannot be read.
+def parse_query(text):
+    terms = []
+    for part in split_query_terms(text.strip()):
+        match = QUERY_TERM.match(part.strip())
+        if match is None:
+            raise ValueError("Cannot read query term '{}'".format(part))
+        negated, field, comparison, value = match.groups()
+        field = field.lower() if not field.lower().startswith("prop.") else "prop." + field[5:]
+        if value is not None:
+            value = value.strip().strip("\"'")
+        terms.append((bool(negated), field, comparison, value))
+    return terms
+
+# Mask of the cache rows matching one query term
+def query_term_mask(cache, scene, field, comparison, value):
+    if field.startswith("prop."):
+        name = field[5:]
+        index = custom_property_index.ensure(scene)
+        objects = index.objects_with(('OBJECT', name)) + index.objects_with(('DATA', name))
+        if comparison is not None:
+            wanted = parse_query_value(value)
+            matches = [obj for obj in objects
+                       if values_match((obj if name in obj else obj.data).get(name), wanted)]
+            if comparison == "!=":
+                return cache.mask_of_objects(objects) & ~cache.mask_of_objects(matches)
+            objects = matches
+        return cache.mask_of_objects(objects)
+    if comparison is None:
+        raise ValueError("'{}' needs a comparison".format(field))
+    if comparison not in ("=", "==", "!=") and field not in QUERY_NUMERIC_FIELDS:
+        raise ValueError("'{}' only supports = and !=".format(field))
+    if field in QUERY_NUMERIC_FIELDS:
+        mask = QUERY_COMPARISONS[comparison](cache.numeric_column(field), parse_query_number(value))
+        return mask & cache.mesh_mask() if field in QUERY_MESH_FIELDS else mask
+    if field == "type":
+        if value.upper() not in OBJECT_TYPE_NAMES:
+            raise ValueError("Unknown object type '{}'".format(value))
+        mask = cache.type_codes == OBJECT_TYPE_NAMES.index(value.upper())
+    elif field in ("name", "data"):
+        names = cache.names if field == "name" else cache.data_names
+        mask = np.fromiter((fnmatch.fnmatchcase(name, value) for name in names), dtype=bool, count=len(names))
+    elif field == "collection":
+        mask = cache.mask_of_rows(cache.collection_rows(scene, value))
+    elif field == "material":
+        mask = cache.mask_of_rows(cache.material_rows(value))
+    else:
+        raise ValueError("Unknown query field '{}'".format(field))
+    return ~mask if comparison == "!=" else mask
+
+# Objects of the scene matching a query
+def query_objects(scene, text):
+    cache = scene_query_cache.ensure(scene)
+    mask = np.ones(len(cache.objects), dtype=bool)
+    for negated, field, comparison, value in parse_query(text):
+        term = query_term_mask(cache, scene, field, comparison, value)
+        mask &= ~term if negated else term
+    return [cache.objects[row] for row in np.flatnonzero(mask)]
@@ -0,0 +1,352 @@
+import itertools
+import time
+
+import bpy
+
+from .core import instrument_log
+from .objects import linked_duplicate_index
+from .profiler import scene_profiler
+
+#---------------
+# USER INTERFACE
+#---------------
+# Define the panel for the UI in the N-panel. Only the scope row is drawn here, every
+# tool section is a child panel that starts closed, so a closed section costs nothing
+# on a redraw.
+class OBJECT_PT_GillyToolsPanel(bpy.types.Panel):
+    bl_label = "Gilly Tools"
+    bl_idname = "OBJECT_PT_GillyToolsPanel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'Gilly Tools'  # Custom tab name
+    
+    def draw(self, context):
+        layout = self.layout
+
+        # Objects the UV, material and curve tools work on
+        scope_settings = context.scene.batch_scope_settings
+        row = layout.row(align=True)
+        row.prop(scope_settings, "scope", text="Work On")
+        if scope_settings.scope == 'COLLECTION':
+            layout.prop(scope_settings, "collection", text="")
+
+# Shared settings of the tool sections below the main panel. With instrumentation on,
+# the time each section spends in draw() is kept next to the operator log. Subclasses
+# define draw_section(context), which draws the section's contents and which draw() times.
+class GillyToolsSubPanel:
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'Gilly Tools'
+    bl_parent_id = "OBJECT_PT_GillyToolsPanel"
+    bl_options = {'DEFAULT_CLOSED'}
+    bl_icon = 'NONE'
+
+    def draw_header(self, context):
+        self.layout.label(icon=self.bl_icon)
+
+    def draw(self, context):
+        if not context.scene.instrumentation_settings.enabled:
+            self.draw_section(context)
+            return
+        start = time.perf_counter()
+        self.draw_section(context)
+        instrument_log.record_draw(self.bl_label, time.perf_counter() - start)
+
+# Define the panel section for selecting objects and working with instances
+class OBJECT_PT_GillyObjectsPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "Objects & Instances"
+    bl_idname = "OBJECT_PT_GillyObjectsPanel"
+    bl_icon = 'OUTLINER'
+
+    def draw_section(self, context):
+        layout = self.layout
+        box = layout.box()
+        col = box.column()
+        query_settings = context.scene.scene_query_settings
+        col.prop(query_settings, "query", text="", icon='VIEWZOOM')
+        row = col.row(align=True)
+        row.operator("object.select_by_query")
+        row.prop(query_settings, "extend", text="", icon='ADD')
+        col.operator("object.selected_linked_duplicates")
+        col.operator("object.select_data_users")
+
+        # Largest groups of objects sharing one data block
+        duplicate_settings = context.scene.linked_duplicate_settings
+        col.prop(duplicate_settings, "show_groups", icon='TRIA_DOWN' if duplicate_settings.show_groups else 'TRIA_RIGHT')
+        if duplicate_settings.show_groups:
+            col.prop(duplicate_settings, "max_groups")
+            # The index is built by opening the list or by the update operator, never here
+            index = linked_duplicate_index
+            groups = []
+            if index.is_current(context.scene):
+                groups = index.duplicate_groups()[:duplicate_settings.max_groups]
+            else:
+                col.operator("object.index_linked_duplicates", icon='FILE_REFRESH')
+            for data_key in groups:
+                row = col.row(align=True)
+                row.label(text="{} ({})".format(index.data_block(data_key).name, len(index.groups[data_key])))
+                op = row.operator("object.select_duplicate_group", text="", icon='RESTRICT_SELECT_OFF')
+                op.group = str(data_key)
+                op = row.operator("object.select_duplicate_group", text="", icon='RESTRICT_SELECT_ON')
+                op.group = str(data_key)
+                op.deselect = True
+
+        box = layout.box()
+        col = box.column()
+        col.label(text="Deduplicate Meshes")
+        deduplicate_settings = context.scene.deduplicate_mesh_settings
+        col.prop(deduplicate_settings, "tolerance")
+        col.prop(deduplicate_settings, "selected_only")
+        col.operator("object.deduplicate_meshes")
+
+        box = layout.box()
+        col = box.column()
+        col.label(text="Linked Duplicates to Instances")
+        instance_settings = context.scene.instance_conversion_settings
+        col.prop(instance_settings, "min_count")
+        col.prop(instance_settings, "selected_only")
+        row = col.row(align=True)
+        row.operator("object.convert_duplicates_to_instances")
+        row.operator("object.realize_instances")
+
+# Define the panel section listing the heaviest objects of the scene
+class OBJECT_PT_GillyProfilerPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "Scene Profiler"
+    bl_idname = "OBJECT_PT_GillyProfilerPanel"
+    bl_icon = 'SORTTIME'
+
+    def draw_section(self, context):
+        col = self.layout.column()
+        profile_settings = context.scene.scene_profile_settings
+        row = col.row(align=True)
+        row.operator("object.profile_scene", icon='FILE_REFRESH')
+        row.operator("object.profile_scene", text="", icon='RECOVER_LAST').full = True
+        row.operator("object.export_scene_profile", text="", icon='EXPORT')
+        col.prop(profile_settings, "measure_time")
+        row = col.row(align=True)
+        row.prop(profile_settings, "sort_by", text="")
+        row.prop(profile_settings, "max_entries")
+        col.template_list("OBJECT_UL_SceneProfile", "", profile_settings, "entries", profile_settings, "active_index")
+        if scene_profiler.rows:
+            col.label(text="{} objects profiled, {} changed since".format(len(scene_profiler.rows), len(scene_profiler.dirty)))
+
+# Define the panel section showing the timing log of the toolbox operators
+class OBJECT_PT_GillyInstrumentationPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "Instrumentation"
+    bl_idname = "OBJECT_PT_GillyInstrumentationPanel"
+    bl_icon = 'TIME'
+
+    def draw_section(self, context):
+        col = self.layout.column()
+        instrument_settings = context.scene.instrumentation_settings
+        row = col.row(align=True)
+        row.prop(instrument_settings, "enabled")
+        row.prop(instrument_settings, "trace_memory")
+        row = col.row(align=True)
+        row.prop(instrument_settings, "shown_records")
+        row.prop(instrument_settings, "max_records")
+        row = col.row(align=True)
+        row.operator("object.export_instrumentation_log", icon='EXPORT')
+        row.operator("object.clear_instrumentation_log", text="", icon='TRASH')
+        for record in itertools.islice(reversed(instrument_log.records), instrument_settings.shown_records):
+            sub = col.column(align=True)
+            sub.label(text="{}: {:.1f} ms{}".format(record.label, record.seconds * 1000, " (failed)" if record.error else ""),
+                      icon='ERROR' if record.error else 'DOT')
+            details = "{objects} objects, {data_blocks} data, {rna_writes} writes".format(**record.counts)
+            if record.python_peak_bytes is not None:
+                details += ", {:.1f} MB peak".format(record.python_peak_bytes / 2**20)
+            sub.label(text=details)
+            for name, seconds in sorted(record.phases.items(), key=lambda item: -item[1]):
+                sub.label(text="{}: {:.1f} ms".format(name, seconds * 1000))
+
+        # Draw time of each open section, the mean over its last redraws
+        if instrument_log.draw_times:
+            col.separator()
+            col.label(text="Panel draw time")
+            for name, samples in sorted(instrument_log.draw_times.items()):
+                col.label(text="{}: {:.2f} ms mean, {:.2f} ms max".format(
+                    name, 1000 * sum(samples) / len(samples), 1000 * max(samples)))
+
+# Define the panel section for moving objects between collections
+class OBJECT_PT_GillyCollectionPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "Move to Collection"
+    bl_idname = "OBJECT_PT_GillyCollectionPanel"
+    bl_icon = 'GROUP'
+
+    def draw_section(self, context):
+        col = self.layout.column()
+        # Dropdown menu to select the collection, its items come from _collection_cache
+        col.prop(context.scene, "chosen_collection", text="", icon='GROUP')
+
+        settings = context.scene.collection_relink_settings
+        col.row().prop(settings, "mode", expand=True)
+
+        # Button to move the objects in scope to the chosen collection
+        op = col.operator("object.move_to_chosen_collection", text="Move to Collection")
+        op.collection_name = context.scene.chosen_collection
+        op.mode = settings.mode
+
+# Define the panel section for custom properties
+class OBJECT_PT_GillyCustomPropertiesPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "Custom Properties"
+    bl_idname = "OBJECT_PT_GillyCustomPropertiesPanel"
+    bl_icon = 'CONSOLE'
+
+    def draw_section(self, context):
+        add_settings = context.scene.add_custom_property_settings
+        remove_settings = context.scene.remove_custom_property_settings
+        col = self.layout.column()
+        
+        col.label(text="Add Custom Property")
+        
+        col.prop(add_settings, "property_name", text="Name")
+        col.row().prop(add_settings, "target", expand=True)
+        add_settings.draw_value(col)
+        col.operator("object.add_custom_property")
+        
+        col.separator()
+        
+        col.label(text="Remove Custom Property")
+        
+        col.prop(remove_settings, "property_name", text="Name")
+        col.row().prop(remove_settings, "target", expand=True)
+        col.operator("object.remove_custom_property")
+
+        col.separator()
+
+        col.label(text="Select by Custom Property")
+        select_settings = context.scene.select_custom_property_settings
+        col.prop(select_settings, "property_name", text="Name")
+        col.row().prop(select_settings, "target", expand=True)
+        col.prop(select_settings, "match_value")
+        if select_settings.match_value:
+            select_settings.draw_value(col)
+        col.operator("object.select_by_custom_property")
+
+        col.separator()
+
+        row = col.row(align=True)
+        row.operator("object.import_custom_properties", text="Import", icon='IMPORT')
+        row.operator("object.export_custom_properties", text="Export", icon='EXPORT')
+
+# Define the panel section for UV maps
+class OBJECT_PT_GillyUVPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "UV Tools"
+    bl_idname = "OBJECT_PT_GillyUVPanel"
+    bl_icon = 'UV'
+
+    def draw_section(self, context):
+        col = self.layout.column()
+        
+        col.label(text="Rename UV")        
+        col.prop(context.scene.rename_uv_settings, "uv_name", text="New Name")
+        col.operator("object.rename_uv")
+        col.separator()
+        col.operator("object.remove_inactive_uv", text="Remove Inactive Maps")
+        col.separator()
+        uv_audit_settings = context.scene.uv_audit_settings
+        row = col.row(align=True)
+        row.prop(uv_audit_settings, "remove_duplicates", toggle=True)
+        row.prop(uv_audit_settings, "remove_degenerate", toggle=True)
+        row.prop(uv_audit_settings, "remove_unreferenced", toggle=True)
+        col.prop(uv_audit_settings, "report_only")
+        col.operator("object.audit_uv_maps")
+
+# Define the panel section for materials
+class OBJECT_PT_GillyMaterialsPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "Materials"
+    bl_idname = "OBJECT_PT_GillyMaterialsPanel"
+    bl_icon = 'MATERIAL'
+
+    def draw_section(self, context):
+        self.layout.operator("object.remove_unused_materials", text="Remove Unused Materials")
+
+# Define the panel section for curves
+class OBJECT_PT_GillyCurvesPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "Curves"
+    bl_idname = "OBJECT_PT_GillyCurvesPanel"
+    bl_icon = 'CURVE_BEZCURVE'
+
+    def draw_section(self, context):
+        layout = self.layout
+        set_curve_resolution_settings = context.scene.set_curve_resolution_settings
+        col = layout.column()
+        
+        # Curves Section - Extrude
+        col.label(text="Extrude Curves")
+        
+        extrude_settings = context.scene.extrude_settings
+    
+        col.prop(extrude_settings, "extrude_value")
+        col.operator("object.extrude_curves", text="Extrude")
+        
+        # Curves Section - Fill Mode
+        row = layout.row(align=True)
+        row.label(text="Fill Mode")  
+        row.operator("object.change_curve_fill_mode", text="Both").fill_mode = 'BOTH'
+        row.operator("object.change_curve_fill_mode", text="Back").fill_mode = 'BACK'
+        row.operator("object.change_curve_fill_mode", text="Front").fill_mode = 'FRONT'
+        
+        # Curves Section - Resolution Preview U
+        col = layout.column()
+        col.label(text="Curve Resolution") 
+        
+        col.prop(set_curve_resolution_settings, "use_adaptive")
+        if set_curve_resolution_settings.use_adaptive:
+            col.prop(set_curve_resolution_settings, "adaptive_mode")
+            if set_curve_resolution_settings.adaptive_mode != 'ANGLE':
+                col.prop(set_curve_resolution_settings, "segment_length")
+            if set_curve_resolution_settings.adaptive_mode != 'LENGTH':
+                col.prop(set_curve_resolution_settings, "max_angle")
+            row = col.row(align=True)
+            row.prop(set_curve_resolution_settings, "min_resolution")
+            row.prop(set_curve_resolution_settings, "max_resolution")
+            col.operator("object.set_adaptive_curve_resolution", text="Set Resolution")
+        else:
+            col.prop(set_curve_resolution_settings, "resolution_u", text="Resolution U")
+            col.operator("object.set_curve_resolution", text="Set Resolution")
+
+# Define the panel section for baking particle simulations
+class OBJECT_PT_GillyParticlesPanel(GillyToolsSubPanel, bpy.types.Panel):
+    bl_label = "Particle Simulation"
+    bl_idname = "OBJECT_PT_GillyParticlesPanel"
+    bl_icon = 'PARTICLES'
+
+    def draw_section(self, context):
+        layout = self.layout
+        col = layout.column()
+        particle_bake_settings = context.scene.particle_bake_settings
+        col.prop(particle_bake_settings, "bake_target")
+        if particle_bake_settings.bake_target == 'OBJECTS':
+            col.prop(particle_bake_settings, "bake_method")
+            col.prop(particle_bake_settings, "use_decimation")
+            if particle_bake_settings.use_decimation:
+                col.prop(particle_bake_settings, "decimate_tolerance")
+        col.prop(particle_bake_settings, "use_disk_cache")
+        col.prop(particle_bake_settings, "use_parallel")
+        uses_cache = particle_bake_settings.use_disk_cache or particle_bake_settings.use_parallel
+        if particle_bake_settings.use_parallel:
+            col.prop(particle_bake_settings, "worker_count")
+        if uses_cache:
+            col.prop(particle_bake_settings, "cache_directory", text="")
+            col.prop(particle_bake_settings, "cache_chunk_frames")
+        row = layout.row(align=True)
+        row.operator("object.bake_particle_simulation", text="Bake Particle Simulation")
+        if uses_cache:
+            row = layout.row(align=True)
+            row.operator("object.apply_particle_cache", text="Apply Cache")
+
+# Child panels in the order they are shown
+GILLY_TOOLS_SUBPANELS = (
+    OBJECT_PT_GillyObjectsPanel,
+    OBJECT_PT_GillyProfilerPanel,
+    OBJECT_PT_GillyCollectionPanel,
+    OBJECT_PT_GillyCustomPropertiesPanel,
+    OBJECT_PT_GillyUVPanel,
+    OBJECT_PT_GillyMaterialsPanel,
+    OBJECT_PT_GillyCurvesPanel,
+    OBJECT_PT_GillyParticlesPanel,
+    OBJECT_PT_GillyInstrumentationPanel,
+)
+
+classes = (OBJECT_PT_GillyToolsPanel,) + GILLY_TOOLS_SUBPANELS
@@ -0,0 +1,17 @@
+import importlib
+import os
+import sys
+
+# Script for background Blender processes, which run the add-on without installing it:
+#   blender -b file.blend --python gilly_toolbox/worker.py -- bake-worker --emitter ...
+# Blender runs it as a plain script, so it puts the directory holding the package on
+# sys.path and hands the arguments after "--" to cli.main(). Without any it just
+# registers the add-on, like running the old single file did.
+if __name__ == "__main__":
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(package_dir))
+    package_name = os.path.basename(package_dir)
+    if "--" in sys.argv:
+        importlib.import_module(package_name + ".cli").main(sys.argv[sys.argv.index("--") + 1:])
+    else:
+        importlib.import_module(package_name).register()
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The add-on modules import bpy at the top, so the tests need Blender's Python module
+# (pip install bpy). Without it there is nothing to collect.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import bpy  # noqa: F401
+except ImportError:
+    collect_ignore_glob = ["test_*.py"]
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from gilly_toolbox.bake import decimate_channel, frame_chunks, split_chunks
+
+# Values an F-curve plays back from the kept keys: linear between keys, held after a
+# stepped key and constant before the first and after the last key
+def play_back(values, keep, step):
+    played = np.empty_like(values)
+    for col in range(values.shape[1]):
+        keys = np.flatnonzero(keep[:, col])
+        for frame in range(values.shape[0]):
+            before, after = keys[keys <= frame], keys[keys >= frame]
+            first = before[-1] if len(before) else after[0]
+            second = after[0] if len(after) else first
+            if second == first or step[first, col]:
+                played[frame, col] = values[first, col]
+            else:
+                t = (frame - first) / (second - first)
+                played[frame, col] = values[first, col] + (values[second, col] - values[first, col]) * t
+    return played
+
+def decimate(values, care=None, transitions=None, tolerance=1e-4):
+    values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+    care = np.ones(values.shape, dtype=bool) if care is None else np.asarray(care).reshape(values.shape)
+    transitions = np.zeros(values.shape, dtype=bool) if transitions is None \
+        else np.asarray(transitions).reshape(values.shape)
+    keep, step = decimate_channel(values, care, transitions, tolerance)
+    return values, care, keep, step
+
+
+def test_straight_move_keeps_its_ends():
+    _, _, keep, step = decimate(np.arange(10.0))
+    assert np.flatnonzero(keep[:, 0]).tolist() == [0, 9]
+    assert not step.any()
+
+def test_held_value_keeps_one_key():
+    _, _, keep, _ = decimate(np.full(8, 2.5))
+    assert np.flatnonzero(keep[:, 0]).tolist() == [0, 7]
+
+@pytest.mark.parametrize("tolerance", [1e-4, 0.01, 0.1])
+def test_played_back_values_stay_within_tolerance(tolerance):
+    frames = np.arange(60)
+    values = np.stack([np.sin(frames * 0.2), frames * 0.5, (frames % 20) ** 2 * 0.01], axis=1)
+    values, care, keep, step = decimate(values, tolerance=tolerance)
+    played = play_back(values, keep, step)
+    assert np.abs(played - values).max() <= tolerance + 1e-9
+    assert keep.sum() < keep.size
+
+def test_looser_tolerance_keeps_fewer_keys():
+    values = np.sin(np.arange(100) * 0.1)
+    counts = [decimate(values, tolerance=tolerance)[2].sum() for tolerance in (1e-4, 1e-2, 1e-1)]
+    assert counts[0] > counts[1] > counts[2]
+
+def test_frames_outside_the_alive_window_are_not_keyed():
+    # Alive on frames 3..6, with junk values while dead
+    alive = np.zeros(10, dtype=bool)
+    alive[3:7] = True
+    transitions = np.zeros(10, dtype=bool)
+    transitions[1:] = alive[1:] != alive[:-1]
+    values = np.where(alive, np.arange(10.0), [50, -7, 12, 0, 0, 0, 0, 99, -3, 40])
+    values, care, keep, step = decimate(values, alive, transitions)
+    assert not (keep & ~care).any()
+    assert np.flatnonzero(keep[:, 0]).tolist() == [3, 6]
+    played = play_back(values, keep, step)
+    assert np.allclose(played[alive[:, None]], values[alive[:, None]])
+
+def test_key_before_a_new_alive_state_is_stepped():
+    # Visibility scale is cared for everywhere and jumps at birth and death
+    alive = np.zeros(12, dtype=bool)
+    alive[4:9] = True
+    transitions = np.zeros(12, dtype=bool)
+    transitions[1:] = alive[1:] != alive[:-1]
+    values = np.where(alive, 1.0, 0.0)
+    values, care, keep, step = decimate(values, None, transitions)
+    played = play_back(values, keep, step)
+    assert np.array_equal(played, values)
+    assert keep[4, 0] and keep[9, 0]
+    assert step[np.flatnonzero(keep[:4, 0])[-1], 0]
+
+def test_particle_that_is_never_alive_gets_one_key():
+    values, care, keep, _ = decimate(np.arange(5.0), np.zeros(5, dtype=bool))
+    assert np.flatnonzero(keep[:, 0]).tolist() == [0]
+
+def test_particles_are_decimated_independently():
+    values = np.stack([np.arange(10.0), np.full(10, 3.0), np.arange(10.0) ** 2], axis=1)
+    values, care, keep, step = decimate(values)
+    assert np.flatnonzero(keep[:, 0]).tolist() == [0, 9]
+    assert np.flatnonzero(keep[:, 1]).tolist() == [0, 9]
+    assert np.abs(play_back(values, keep, step) - values).max() <= 1e-4
+
+
+def test_frame_chunks_cover_the_range():
+    assert frame_chunks(1, 10, 4) == [(1, 4), (5, 8), (9, 10)]
+    assert frame_chunks(5, 5, 10) == [(5, 5)]
+    assert frame_chunks(0, 7, 4) == [(0, 3), (4, 7)]
+
+def test_split_chunks_keeps_order_and_balances():
+    chunks = frame_chunks(1, 70, 10)
+    runs = split_chunks(chunks, 3)
+    assert [len(run) for run in runs] == [3, 2, 2]
+    assert sum(runs, []) == chunks
+
+def test_split_chunks_never_makes_empty_runs():
+    chunks = frame_chunks(1, 20, 10)
+    assert split_chunks(chunks, 8) == [[(1, 10)], [(11, 20)]]
+    assert split_chunks(chunks, 0) == [chunks]
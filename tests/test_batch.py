@@ -0,0 +1,27 @@
+import bpy
+import pytest
+
+from gilly_toolbox.batch import pipeline_adaptive_curve_resolution
+
+@pytest.fixture
+def curve_object():
+    bpy.ops.wm.read_homefile(use_empty=True)
+    curve = bpy.data.curves.new("Curve", 'CURVE')
+    curve.resolution_u = 4
+    spline = curve.splines.new('NURBS')
+    spline.points.add(2)
+    for point, co in zip(spline.points, [(0, 0, 0, 1), (2, 0, 0, 1), (2, 2, 0, 1)]):
+        point.co = co
+    obj = bpy.data.objects.new("Curve", curve)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+def test_adaptive_curve_resolution_pipeline(curve_object):
+    assert pipeline_adaptive_curve_resolution([curve_object], 'LENGTH', 0.1, 10.0, 1, 12) == 1
+    assert curve_object.data.resolution_u == 12
+    assert pipeline_adaptive_curve_resolution([curve_object], 'LENGTH', 0.1, 10.0, 1, 12) == 0
+
+def test_adaptive_curve_resolution_pipeline_rejects_swapped_caps(curve_object):
+    with pytest.raises(ValueError, match="max_resolution 4 is below min_resolution 8"):
+        pipeline_adaptive_curve_resolution([curve_object], min_resolution=8, max_resolution=4)
+    assert curve_object.data.resolution_u == 4
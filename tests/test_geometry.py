@@ -0,0 +1,72 @@
+import math
+
+import bpy
+import numpy as np
+import pytest
+
+from gilly_toolbox.geometry import adaptive_curve_resolution, spline_segments, vector_angles
+
+@pytest.fixture
+def curve():
+    curve = bpy.data.curves.new("Curve", 'CURVE')
+    yield curve
+    bpy.data.curves.remove(curve)
+
+def add_spline(curve, kind, points, cyclic=False):
+    spline = curve.splines.new(kind)
+    if kind == 'BEZIER':
+        spline.bezier_points.add(len(points) - 1)
+        for point, co in zip(spline.bezier_points, points):
+            point.co = co
+            point.handle_left_type = point.handle_right_type = 'VECTOR'
+    else:
+        spline.points.add(len(points) - 1)
+        for point, co in zip(spline.points, points):
+            point.co = (*co, 1.0)
+    spline.use_cyclic_u = cyclic
+    return spline
+
+
+def test_vector_angles():
+    a = np.array([[1.0, 0, 0], [1, 0, 0], [1, 0, 0], [0, 0, 0]])
+    b = np.array([[0.0, 2, 0], [-1, 0, 0], [3, 0, 0], [1, 0, 0]])
+    assert np.allclose(vector_angles(a, b), [math.pi / 2, math.pi, 0, 0])
+
+def test_single_point_splines_have_no_segments(curve):
+    nurbs = curve.splines.new('NURBS')
+    assert len(nurbs.points) == 1
+    assert spline_segments(nurbs) is None
+    bezier = curve.splines.new('BEZIER')
+    assert spline_segments(bezier) is None
+    assert adaptive_curve_resolution(curve, 'BOTH', 0.1, 0.1, 3, 64) == 3
+
+def test_poly_splines_have_no_resolution(curve):
+    assert spline_segments(add_spline(curve, 'POLY', [(0, 0, 0), (1, 0, 0), (1, 1, 0)])) is None
+
+def test_nurbs_segments(curve):
+    spline = add_spline(curve, 'NURBS', [(0, 0, 0), (2, 0, 0), (2, 2, 0)])
+    lengths, turning = spline_segments(spline)
+    assert np.allclose(lengths, [2, 2])
+    assert np.allclose(turning, [math.pi / 4, math.pi / 4])
+
+def test_cyclic_nurbs_segments(curve):
+    spline = add_spline(curve, 'NURBS', [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], cyclic=True)
+    lengths, turning = spline_segments(spline)
+    assert np.allclose(lengths, 1)
+    assert np.allclose(turning, math.pi / 2)
+
+def test_straight_bezier_segments(curve):
+    spline = add_spline(curve, 'BEZIER', [(0, 0, 0), (3, 0, 0), (6, 0, 0)])
+    lengths, turning = spline_segments(spline)
+    assert np.allclose(lengths, [3, 3])
+    assert np.allclose(turning, 0)
+
+@pytest.mark.parametrize("mode, expected", [('LENGTH', 20), ('ANGLE', 8), ('BOTH', 20)])
+def test_adaptive_curve_resolution(curve, mode, expected):
+    add_spline(curve, 'NURBS', [(0, 0, 0), (2, 0, 0), (2, 2, 0)])
+    assert adaptive_curve_resolution(curve, mode, 0.1, math.pi / 32, 1, 64) == expected
+
+def test_adaptive_curve_resolution_caps(curve):
+    add_spline(curve, 'NURBS', [(0, 0, 0), (2, 0, 0), (2, 2, 0)])
+    assert adaptive_curve_resolution(curve, 'LENGTH', 0.1, 0.1, 1, 12) == 12
+    assert adaptive_curve_resolution(curve, 'LENGTH', 10.0, 0.1, 6, 64) == 6
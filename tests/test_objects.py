@@ -0,0 +1,96 @@
+import bpy
+import pytest
+
+from gilly_toolbox.objects import base_name, plan_relink, relink_objects
+
+def new_collection(name, parent):
+    collection = bpy.data.collections.new(name)
+    parent.children.link(collection)
+    return collection
+
+def new_object(name, *collections):
+    obj = bpy.data.objects.new(name, None)
+    for collection in collections:
+        collection.objects.link(obj)
+    return obj
+
+def collection_names(obj):
+    return sorted(collection.name for collection in obj.users_collection)
+
+def plan_size(plan):
+    links, unlinks, creates = plan
+    return (sum(len(objects) for _, objects in links.values()),
+            sum(len(objects) for _, objects in unlinks.values()), len(creates))
+
+# Scene collection > Props > Rocks, Scene collection > Set, and an Archive target
+@pytest.fixture
+def scene():
+    bpy.ops.wm.read_homefile(use_empty=True)
+    scene = bpy.context.scene
+    props = new_collection("Props", scene.collection)
+    new_collection("Rocks", props)
+    new_collection("Set", scene.collection)
+    new_collection("Archive", scene.collection)
+    return scene
+
+def collections():
+    return bpy.data.collections
+
+
+def test_base_name():
+    assert base_name("Rocks.001") == "Rocks"
+    assert base_name("Rocks") == "Rocks"
+    assert base_name("v1.5a") == "v1.5a"
+
+@pytest.mark.parametrize("mode", ['MOVE', 'LINK', 'COPY_HIERARCHY'])
+def test_plan_is_idempotent(scene, mode):
+    objects = [new_object("Rock", collections()["Rocks"]),
+               new_object("Stage", collections()["Set"], collections()["Props"])]
+    target = collections()["Archive"]
+    assert plan_size(plan_relink(scene, objects, target, mode)) != (0, 0, 0)
+    relink_objects(scene, objects, target, mode)
+    created = len(collections())
+    assert plan_size(plan_relink(scene, objects, target, mode)) == (0, 0, 0)
+    relink_objects(scene, objects, target, mode)
+    assert len(collections()) == created
+
+def test_plan_does_not_change_the_file(scene):
+    rock = new_object("Rock", collections()["Rocks"])
+    plan_relink(scene, [rock], collections()["Archive"], 'COPY_HIERARCHY')
+    assert collection_names(rock) == ["Rocks"]
+    assert len(collections()) == 4
+
+def test_move(scene):
+    stage = new_object("Stage", collections()["Set"], collections()["Props"])
+    assert relink_objects(scene, [stage], collections()["Archive"], 'MOVE') == (1, 2, 0)
+    assert collection_names(stage) == ["Archive"]
+
+def test_link_keeps_current_collections(scene):
+    rock = new_object("Rock", collections()["Rocks"])
+    assert relink_objects(scene, [rock], collections()["Archive"], 'LINK') == (1, 0, 0)
+    assert collection_names(rock) == ["Archive", "Rocks"]
+
+def test_copy_hierarchy_mirrors_paths_once(scene):
+    rocks = [new_object("Rock", collections()["Rocks"]), new_object("Pebble", collections()["Rocks"])]
+    stage = new_object("Stage", scene.collection)
+    target = collections()["Archive"]
+    assert relink_objects(scene, rocks + [stage], target, 'COPY_HIERARCHY') == (3, 3, 2)
+    props = target.children[0]
+    assert base_name(props.name) == "Props"
+    assert [base_name(child.name) for child in props.children] == ["Rocks"]
+    assert all(list(obj.users_collection) == [props.children[0]] for obj in rocks)
+    assert collection_names(stage) == ["Archive"]
+
+def test_copy_hierarchy_reuses_existing_mirrors(scene):
+    target = collections()["Archive"]
+    mirror = new_collection("Props.001", target)
+    rock = new_object("Rock", collections()["Props"])
+    assert relink_objects(scene, [rock], target, 'COPY_HIERARCHY') == (1, 1, 0)
+    assert list(rock.users_collection) == [mirror]
+
+def test_target_outside_the_scene(scene):
+    outside = bpy.data.collections.new("Outside")
+    rock = new_object("Rock", collections()["Rocks"])
+    assert plan_size(plan_relink(scene, [rock], outside, 'LINK')) == (1, 0, 0)
+    relink_objects(scene, [rock], outside, 'LINK')
+    assert plan_size(plan_relink(scene, [rock], outside, 'LINK')) == (0, 0, 0)
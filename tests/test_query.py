@@ -0,0 +1,80 @@
+import bpy
+import pytest
+
+from gilly_toolbox.query import parse_query, parse_query_number, query_objects, split_query_terms
+
+
+def test_split_query_terms_at_and():
+    assert split_query_terms("type = MESH and faces > 10 AND uv_maps = 0") == \
+        ["type = MESH ", " faces > 10 ", " uv_maps = 0"]
+
+def test_split_query_terms_keeps_quoted_and():
+    assert split_query_terms('name = "Salt and Pepper" and type = MESH') == \
+        ['name = "Salt and Pepper" ', " type = MESH"]
+    assert split_query_terms("data = 'bread and butter'") == ["data = 'bread and butter'"]
+
+def test_split_query_terms_unclosed_quote_runs_to_the_end():
+    assert split_query_terms('name = "Salt and Pepper') == ['name = "Salt and Pepper']
+
+def test_split_query_terms_needs_a_whole_word():
+    assert split_query_terms("name = Sandy and material = Brand") == ["name = Sandy ", " material = Brand"]
+
+def test_parse_query_terms():
+    assert parse_query("type = MESH and not Faces >= 100k and prop.Tag and name != 'Rock*'") == [
+        (False, "type", "=", "MESH"),
+        (True, "faces", ">=", "100k"),
+        (False, "prop.Tag", None, None),
+        (False, "name", "!=", "Rock*"),
+    ]
+
+def test_parse_query_quoted_value_with_and():
+    assert parse_query('collection = "Props and Set" and uv_maps = 0') == [
+        (False, "collection", "=", "Props and Set"),
+        (False, "uv_maps", "=", "0"),
+    ]
+
+@pytest.mark.parametrize("text", ["", "type =", "= MESH", "type = MESH and"])
+def test_parse_query_rejects_unreadable_terms(text):
+    with pytest.raises(ValueError):
+        parse_query(text)
+
+@pytest.mark.parametrize("text, number", [
+    ("12", 12.0), ("2.5", 2.5), ("-1", -1.0), ("100k", 100e3), ("1.5K", 1.5e3), ("2m", 2e6), (" 3M ", 3e6),
+])
+def test_parse_query_number(text, number):
+    assert parse_query_number(text) == number
+
+@pytest.mark.parametrize("text", ["", "k", "ten", "10x", "1e", "5km"])
+def test_parse_query_number_rejects_bad_numbers(text):
+    with pytest.raises(ValueError, match="is not a number"):
+        parse_query_number(text)
+
+
+@pytest.fixture
+def scene():
+    bpy.ops.wm.read_homefile(use_empty=True)
+    scene = bpy.context.scene
+    mesh = bpy.data.meshes.new("Quad")
+    mesh.from_pydata([(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)], [], [(0, 1, 2, 3)])
+    for name, data in (("Quad", mesh), ("Empty", None), ("Lamp", bpy.data.lights.new("Lamp", 'POINT'))):
+        scene.collection.objects.link(bpy.data.objects.new(name, data))
+    return scene
+
+def names(objects):
+    return sorted(obj.name for obj in objects)
+
+def test_mesh_counts_leave_out_objects_without_a_mesh(scene):
+    assert names(query_objects(scene, "faces < 1")) == []
+    assert names(query_objects(scene, "vertices != 4")) == []
+    assert names(query_objects(scene, "uv_maps = 0")) == ["Quad"]
+    assert names(query_objects(scene, "not faces > 0")) == ["Empty", "Lamp"]
+
+def test_query_errors(scene):
+    with pytest.raises(ValueError, match="needs a comparison"):
+        query_objects(scene, "type")
+    with pytest.raises(ValueError, match="only supports = and !="):
+        query_objects(scene, "type > MESH")
+    with pytest.raises(ValueError, match="Unknown query field"):
+        query_objects(scene, "colour = red")
+    with pytest.raises(ValueError, match="is not a number"):
+        query_objects(scene, "faces >> 10")